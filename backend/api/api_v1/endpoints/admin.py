@@ -1,62 +1,188 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from typing import Any, Dict, List, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from backend.models.user import User, UserRole
-from backend.api.api_v1.endpoints.health_records import get_current_active_user
+from backend.core.query_budget import query_budget
+from backend.db.database import get_async_engine, get_engine, get_replica_engines
+from backend.db.pool import pool_stats
+from backend.db.replicas import read_only, replica_of, replicas
+from backend.db.session import get_async_db
+from backend.models.user import User
+from backend.schemas.user import AdminUserResponse
+from backend.api.deps import get_current_admin_user
+from backend.services.activity import recent_activities, record_activity
+from backend.services.fast_json import fast_json_enabled, response_columns, rows_response
+from backend.services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, paginate
+from backend.services.principal_cache import Principal, principal_cache
+from backend.services.response_cache import response_cache
+from backend.services.rollups import ACTIVE_USERS, RECORDS, USERS, RollupDeltas, read_totals
+from backend.services.trends import series_cache
+from backend.utils.security import token_cache
 
 router = APIRouter()
 
-# Dependency for getting admin user
-async def get_current_admin_user(current_user: User = Depends(get_current_active_user)) -> User:
+@router.get("/dashboard")
+@query_budget(max_queries=3)
+@read_only
+async def admin_dashboard(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_admin_user)
+):
     """
-    Check if current user is admin
+    Admin dashboard statistics.
+    Read from the maintained counters and the bounded activity log, so the
+    cost does not depend on the size of the users and health_records tables.
     """
-    if current_user.role != UserRole.ADMIN:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Admin privileges required"
-        )
-    return current_user
+    return await response_cache.respond(
+        request,
+        key="admin-dashboard",
+        compute=lambda: compute_dashboard(db),
+        cache=replica_of(db) is None,
+    )
 
-@router.get("/dashboard")
-async def admin_dashboard(current_user: User = Depends(get_current_admin_user)):
+async def compute_dashboard(db: AsyncSession) -> Dict[str, Any]:
     """
-    Admin dashboard statistics
+    Counters and recent activity shown on the admin dashboard
     """
-    # This is a placeholder - will be implemented with actual dashboard data
+    totals = await read_totals(db, [USERS, ACTIVE_USERS, RECORDS])
+    
     return {
-        "user_count": 150,
-        "active_users": 120,
-        "health_records_count": 450,
-        "recent_activities": [
-            {"user_id": 1, "activity": "created health record", "timestamp": "2023-05-20T14:30:00Z"},
-            {"user_id": 2, "activity": "updated profile", "timestamp": "2023-05-20T15:45:00Z"}
-        ]
+        "user_count": totals[USERS],
+        "active_users": totals[ACTIVE_USERS],
+        "health_records_count": totals[RECORDS],
+        "recent_activities": await recent_activities(db),
     }
 
-@router.get("/users")
-async def admin_users(current_user: User = Depends(get_current_admin_user)):
+@router.get("/users", response_model=List[AdminUserResponse])
+@query_budget(max_queries=3)
+@read_only
+async def admin_users(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_admin_user)
+):
     """
-    Admin user management
+    Admin user management: users with their status, newest first.
+    The next page's cursor is returned in the X-Next-Cursor header.
     """
-    # This is a placeholder - will be implemented with actual user management data
-    return [
-        {"id": 1, "username": "user1", "email": "user1@example.com", "is_active": True, "role": "user"},
-        {"id": 2, "username": "admin1", "email": "admin1@example.com", "is_active": True, "role": "admin"}
-    ]
+    if fast_json_enabled():
+        query = select(*response_columns(User, AdminUserResponse))
+        return rows_response(*await paginate(db, query, User, cursor, limit))
+    
+    users, next_cursor = await paginate(db, select(User), User, cursor, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return users
+
+async def set_user_active(db: AsyncSession, user_id: int, is_active: bool, current_user: Principal) -> User:
+    """
+    Activate or deactivate a user, keeping the active user counter in step
+    """
+    user = await db.get(User, user_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    if not is_active and user.id == current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cannot deactivate your own account"
+        )
+    
+    # Only an actual change moves the counter; the principal cache drops the user on commit
+    if user.is_active != is_active:
+        await RollupDeltas().change_active(user.is_active, is_active).apply(db)
+        user.is_active = is_active
+        await record_activity(
+            db, current_user.id, f"{'activated' if is_active else 'deactivated'} user #{user.id}"
+        )
+        await db.commit()
+    
+    return user
 
 @router.put("/users/{user_id}/activate")
-async def activate_user(user_id: int, current_user: User = Depends(get_current_admin_user)):
+@query_budget(max_queries=10)
+async def activate_user(
+    user_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_admin_user)
+):
     """
     Activate a user
     """
-    # This is a placeholder - will be implemented with actual activation logic
-    return {"id": user_id, "status": "activated"}
+    user = await set_user_active(db, user_id, True, current_user)
+    return {"id": user.id, "status": "activated"}
 
 @router.put("/users/{user_id}/deactivate")
-async def deactivate_user(user_id: int, current_user: User = Depends(get_current_admin_user)):
+@query_budget(max_queries=10)
+async def deactivate_user(
+    user_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_admin_user)
+):
     """
     Deactivate a user
     """
-    # This is a placeholder - will be implemented with actual deactivation logic
-    return {"id": user_id, "status": "deactivated"} 
\ No newline at end of file
+    user = await set_user_active(db, user_id, False, current_user)
+    return {"id": user.id, "status": "deactivated"}
+
+@router.get("/auth-cache")
+@query_budget(max_queries=1)
+async def auth_cache_stats(current_user: Principal = Depends(get_current_admin_user)):
+    """
+    Hit/miss counters of the authenticated principal cache
+    """
+    return principal_cache.stats()
+
+@router.get("/token-cache")
+@query_budget(max_queries=1)
+async def token_cache_stats(current_user: Principal = Depends(get_current_admin_user)):
+    """
+    Hit/miss counters of the verified access token cache and revoked tokens
+    """
+    return token_cache.stats()
+
+@router.get("/response-cache")
+@query_budget(max_queries=1)
+async def response_cache_stats(current_user: Principal = Depends(get_current_admin_user)):
+    """
+    Hit/miss counters and data generation of the analytics and dashboard response cache
+    """
+    return response_cache.stats()
+
+@router.get("/trends-cache")
+@query_budget(max_queries=1)
+async def trends_cache_stats(current_user: Principal = Depends(get_current_admin_user)):
+    """
+    Hit/miss counters of the per-user health trends series cache
+    """
+    return series_cache.stats()
+
+@router.get("/db-pool")
+@query_budget(max_queries=1)
+async def db_pool_stats(current_user: Principal = Depends(get_current_admin_user)):
+    """
+    Connection pool gauges (in use, overflow) and checkout wait times of the
+    async engine used by the API, the sync engine used by scripts and the
+    read replicas' engines
+    """
+    return {
+        "async": pool_stats(get_async_engine()),
+        "sync": pool_stats(get_engine()),
+        **{f"replica{index}": pool_stats(replica) for index, replica in enumerate(get_replica_engines())},
+    }
+
+@router.get("/replicas")
+@query_budget(max_queries=1)
+async def replica_stats(current_user: Principal = Depends(get_current_admin_user)):
+    """
+    Read replicas: whether each is up, sessions routed to it and connection
+    failures, plus read-only requests that fell back to the primary
+    """
+    return replicas.stats()
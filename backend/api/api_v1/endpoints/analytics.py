@@ -1,129 +1,80 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Request
 from typing import List, Dict, Any
-from datetime import datetime, timedelta
-from sqlalchemy import func, extract, cast, Integer
-from sqlalchemy.orm import Session
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from backend.api.api_v1.endpoints.health_records import get_current_active_user
-from backend.models.user import User, UserRole
-from backend.models.health_record import HealthRecord
-from backend.db.session import get_db
+from backend.core.query_budget import query_budget
+from backend.api.deps import get_current_admin_user
+from backend.services.principal_cache import Principal
+from backend.models.health_record import RiskLevel
+from backend.db.replicas import read_only, replica_of
+from backend.db.session import get_async_db
+from backend.services.response_cache import response_cache
+from backend.services.rollups import RECORDS, REGISTRATIONS, risk_level_totals, sum_per_month
 
 router = APIRouter()
 
-# Dependency for getting admin user
-async def get_current_admin_user(current_user: User = Depends(get_current_active_user)) -> User:
+# Number of calendar months shown in the summary charts
+MONTHS_IN_SUMMARY = 6
+
+def get_month_starts(current_date: datetime, months: int) -> List[datetime]:
     """
-    Check if current user is admin
+    Return the first instant of each of the last ``months`` calendar months,
+    oldest first, followed by the start of the next month as the upper bound.
     """
-    if current_user.role != UserRole.ADMIN:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Admin privileges required for analytics"
-        )
-    return current_user
+    # Months counted from year 0 make the calendar arithmetic linear
+    first = current_date.year * 12 + current_date.month - 1 - (months - 1)
+    return [datetime(i // 12, i % 12 + 1, 1) for i in range(first, first + months + 1)]
 
-@router.get("/summary")
-async def get_analytics_summary(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user)
-):
+async def compute_analytics_summary(db: AsyncSession, month_starts: List[datetime]) -> Dict[str, Any]:
     """
-    Get analytics summary data
-    Only accessible to admin users
+    Build the analytics summary from the rollup tables
     """
-    # Get current date for date calculations
-    current_date = datetime.now()
-    
-    # Query for records per month (last 6 months)
-    records_per_month_query = []
-    for i in range(6):
-        month_date = current_date - timedelta(days=30 * i)
-        month_num = month_date.month
-        year = month_date.year
-        
-        # Count records for this month
-        count = db.query(func.count(HealthRecord.id))\
-            .filter(
-                extract('month', HealthRecord.created_at) == month_num,
-                extract('year', HealthRecord.created_at) == year
-            ).scalar() or 0
-        
-        # Format month name
-        month_name = month_date.strftime("%b %Y")
-        
-        records_per_month_query.append({
-            "month": month_name,
-            "count": count
-        })
-    
-    # Query for user registrations per month (last 6 months)
-    registrations_per_month_query = []
-    for i in range(6):
-        month_date = current_date - timedelta(days=30 * i)
-        month_num = month_date.month
-        year = month_date.year
-        
-        # Count users registered in this month
-        count = db.query(func.count(User.id))\
-            .filter(
-                extract('month', User.created_at) == month_num,
-                extract('year', User.created_at) == year
-            ).scalar() or 0
-        
-        # Format month name
-        month_name = month_date.strftime("%b %Y")
-        
-        registrations_per_month_query.append({
-            "month": month_name,
-            "count": count
-        })
-    
-    # Query for risk distribution based on health metrics
-    # Count normal records
-    normal_count = db.query(func.count(HealthRecord.id))\
-        .filter(
-            HealthRecord.heart_rate.between(60, 100),
-            HealthRecord.blood_pressure_systolic.between(90, 139),
-            HealthRecord.blood_pressure_diastolic.between(60, 89),
-            (cast(HealthRecord.weight / func.power(HealthRecord.height / 100, 2), Integer)).between(18, 24)
-        ).scalar() or 0
-    
-    # Count mild risk records
-    mild_count = db.query(func.count(HealthRecord.id))\
-        .filter(
-            (HealthRecord.heart_rate.between(50, 59) | HealthRecord.heart_rate.between(101, 110)) |
-            (HealthRecord.blood_pressure_systolic.between(140, 159) | HealthRecord.blood_pressure_diastolic.between(90, 99)) |
-            (cast(HealthRecord.weight / func.power(HealthRecord.height / 100, 2), Integer)).between(25, 29)
-        ).scalar() or 0
-    
-    # Count moderate risk records
-    moderate_count = db.query(func.count(HealthRecord.id))\
-        .filter(
-            (HealthRecord.heart_rate.between(40, 49) | HealthRecord.heart_rate.between(111, 120)) |
-            (HealthRecord.blood_pressure_systolic.between(160, 179) | HealthRecord.blood_pressure_diastolic.between(100, 109)) |
-            (cast(HealthRecord.weight / func.power(HealthRecord.height / 100, 2), Integer)).between(30, 34)
-        ).scalar() or 0
+    # Read from the rollups: at most one row per day per metric, whatever
+    # the size of health_records
+    records_per_month = await sum_per_month(db, RECORDS, month_starts)
+    registrations_per_month = await sum_per_month(db, REGISTRATIONS, month_starts)
     
-    # Count severe risk records
-    severe_count = db.query(func.count(HealthRecord.id))\
-        .filter(
-            (HealthRecord.heart_rate < 40) | (HealthRecord.heart_rate > 120) |
-            (HealthRecord.blood_pressure_systolic >= 180) | (HealthRecord.blood_pressure_diastolic >= 110) |
-            (cast(HealthRecord.weight / func.power(HealthRecord.height / 100, 2), Integer)) >= 35
-        ).scalar() or 0
+    # Risk distribution from the all-time totals (one row per level)
+    risk_counts = await risk_level_totals(db)
     
     # Risk distribution data
     risk_distribution = [
-        {"name": "Bình thường", "value": normal_count, "color": "#4caf50"},  # Green
-        {"name": "Nhẹ", "value": mild_count, "color": "#ff9800"},          # Orange
-        {"name": "Trung bình", "value": moderate_count, "color": "#f44336"},   # Red
-        {"name": "Nghiêm trọng", "value": severe_count, "color": "#9c27b0"}   # Purple
+        {"name": "Bình thường", "value": risk_counts[RiskLevel.NORMAL.value], "color": "#4caf50"},  # Green
+        {"name": "Nhẹ", "value": risk_counts[RiskLevel.MILD.value], "color": "#ff9800"},          # Orange
+        {"name": "Trung bình", "value": risk_counts[RiskLevel.MODERATE.value], "color": "#f44336"},   # Red
+        {"name": "Nghiêm trọng", "value": risk_counts[RiskLevel.SEVERE.value], "color": "#9c27b0"}   # Purple
     ]
     
     # Return all analytics data
     return {
-        "recordsPerMonth": list(reversed(records_per_month_query)),
-        "registrationsPerMonth": list(reversed(registrations_per_month_query)),
+        "recordsPerMonth": records_per_month,
+        "registrationsPerMonth": registrations_per_month,
         "riskDistribution": risk_distribution
-    } 
\ No newline at end of file
+    }
+
+@router.get("/summary")
+@query_budget(max_queries=4)
+@read_only
+async def get_analytics_summary(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_admin_user)
+):
+    """
+    Get analytics summary data
+    Only accessible to admin users
+    
+    Served from the response cache until the next write to users or health
+    records; clients revalidating with If-None-Match get 304 without any query.
+    """
+    # Calendar month boundaries for the last 6 months (oldest first)
+    month_starts = get_month_starts(datetime.utcnow(), MONTHS_IN_SUMMARY)
+    
+    # The result only depends on the data and on the current month
+    return await response_cache.respond(
+        request,
+        key=f"analytics-summary:{month_starts[-2]:%Y-%m}",
+        compute=lambda: compute_analytics_summary(db, month_starts),
+        cache=replica_of(db) is None,
+    )
@@ -1,23 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request, Header
+from fastapi import APIRouter, Depends, HTTPException, status, Header
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 
-from backend.db.session import get_db
+from backend.core.query_budget import query_budget
+from backend.db.session import get_async_db
 from backend.models.user import User, UserRole
 from backend.schemas.user import UserCreate, UserResponse, UserLogin, Token
-from backend.services.auth import create_user, authenticate_user, get_current_user, get_user_from_token
+from backend.services.auth import create_user, authenticate_user, ahash_password, get_user_from_token
+from backend.services.token_revocation import revoke_token
+from jose import JWTError
+
 from backend.utils.security import create_access_token
 
 router = APIRouter()
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+@query_budget(max_queries=10)
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Register a new user with default role='user'
     """
     # Check if the email already exists
-    db_user = db.query(User).filter(User.email == user_data.email).first()
+    db_user = await db.scalar(select(User).where(User.email == user_data.email))
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -28,20 +34,22 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     if not user_data.role:
         user_data.role = UserRole.USER
     
-    # Create the user
-    user = create_user(db, user_data)
+    # Hash on the worker pool, then create the user
+    password_hash = await ahash_password(user_data.password)
+    user = await create_user(db, user_data, password_hash=password_hash)
     return user
 
 @router.post("/login", response_model=Token)
+@query_budget(max_queries=2)
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Authenticate a user and return a JWT token.
     Supports OAuth2PasswordRequestForm (for Swagger UI).
     """
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -65,14 +73,15 @@ async def login(
     }
 
 @router.post("/login-json", response_model=Token)
+@query_budget(max_queries=2)
 async def login_json(
     form_data: UserLogin,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Alternative login endpoint that accepts JSON instead of form data
     """
-    user = authenticate_user(db, form_data.email, form_data.password)
+    user = await authenticate_user(db, form_data.email, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -96,9 +105,10 @@ async def login_json(
     }
 
 @router.get("/me", response_model=UserResponse)
+@query_budget(max_queries=2)
 async def read_users_me(
     authorization: Optional[str] = Header(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get current user information based on token
@@ -111,7 +121,7 @@ async def read_users_me(
         )
     
     token = authorization.split(" ")[1]
-    current_user = get_user_from_token(db, token=token)
+    current_user = await get_user_from_token(db, token=token)
     
     if not current_user:
         raise HTTPException(
@@ -123,9 +133,10 @@ async def read_users_me(
     return current_user
 
 @router.post("/refresh-token", response_model=Token)
+@query_budget(max_queries=2)
 async def refresh_token(
     authorization: Optional[str] = Header(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Refresh access token
@@ -141,7 +152,7 @@ async def refresh_token(
     token = authorization.split(" ")[1]
     
     # Validate current token and get user
-    current_user = get_user_from_token(db, token=token)
+    current_user = await get_user_from_token(db, token=token)
     
     if not current_user:
         raise HTTPException(
@@ -162,4 +173,29 @@ async def refresh_token(
             "email": current_user.email,
             "role": current_user.role
         }
-    } 
\ No newline at end of file
+    }
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+@query_budget(max_queries=2)
+async def logout(authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_async_db)):
+    """
+    Revoke the presented access token; every worker rejects it from now on
+    """
+    if not authorization or not authorization.startswith("Bearer "):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    token = authorization.split(" ")[1]
+    try:
+        await revoke_token(db, token)
+    except JWTError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    return None
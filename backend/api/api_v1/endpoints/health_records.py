@@ -1,49 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body, Header
-from typing import List, Dict, Any, Optional
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Header, Query, Response
+from fastapi.responses import StreamingResponse
 from datetime import datetime
+from typing import List, Dict, Any, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from backend.db.session import get_db
-from backend.models.user import User, UserRole
+from backend.api.deps import get_current_active_user
+from backend.core.config import settings
+from backend.core.query_budget import query_budget
+from backend.db.replicas import read_only, replica_of
+from backend.db.session import get_async_db
+from backend.models.user import UserRole
 from backend.models.health_record import HealthRecord
 from backend.schemas.health_record import HealthRecordCreate, HealthRecordResponse, HealthRecordUpdate
-from backend.services.auth import get_user_from_token
+from backend.services.activity import record_activity
+from backend.services.fast_json import RowsJSONResponse, fast_json_enabled, response_columns, rows_response
+from backend.services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, paginate
+from backend.services.principal_cache import Principal
+from backend.services.record_batch import create_records
+from backend.services.record_export import EXPORT_MEDIA_TYPES, negotiate_export_format, stream_user_records
+from backend.services.record_import import import_records
+from backend.services.risk import classify_record
+from backend.services.rollups import RollupDeltas
+from backend.services.trends import compute_trends, load_series
 
 router = APIRouter()
 
-# Dependency for getting the current user
-async def get_current_active_user(
-    authorization: Optional[str] = Header(None),
-    db: Session = Depends(get_db)
-) -> User:
-    """
-    Get the current authenticated user from JWT token.
-    """
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Not authenticated",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    
-    token = authorization.split(" ")[1]
-    user = get_user_from_token(db, token)
-    
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    
-    return user
-
 # Create a health record
 @router.post("/", response_model=HealthRecordResponse, status_code=status.HTTP_201_CREATED)
+@query_budget(max_queries=10)
 async def create_health_record(
     record_data: HealthRecordCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """
     Create a new health record for the current user
@@ -56,46 +45,179 @@ async def create_health_record(
         heart_rate=record_data.heart_rate,
         blood_pressure_systolic=record_data.blood_pressure_systolic,
         blood_pressure_diastolic=record_data.blood_pressure_diastolic,
-        symptoms=record_data.symptoms
+        symptoms=record_data.symptoms,
+        risk_level=classify_record(
+            record_data.height,
+            record_data.weight,
+            record_data.heart_rate,
+            record_data.blood_pressure_systolic,
+            record_data.blood_pressure_diastolic,
+        )
     )
     
-    # Add to database
+    # Add to database, counting the record in the rollups and the activity log.
+    # The flush fills in the id and created_at, and sessions keep their state
+    # on commit, so the response needs no further SELECT
     db.add(db_record)
-    db.commit()
-    db.refresh(db_record)
+    await db.flush()
+    await RollupDeltas().add_record(db_record.created_at, db_record.risk_level).apply(db)
+    await record_activity(db, current_user.id, f"created health record #{db_record.id}")
+    await db.commit()
     
     return db_record
 
+# Create many health records in one request
+@router.post("/batch", response_model=Dict[str, Any])
+# Up to four INSERT chunks, each read back on MySQL
+@query_budget(max_queries=16)
+async def create_health_records_batch(
+    items: List[Any] = Body(...),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user)
+):
+    """
+    Create up to HEALTH_RECORD_BATCH_MAX_ITEMS health records for the current
+    user in one transaction, e.g. readings synced from a wearable.
+    
+    Items are validated individually and may carry their own ``created_at``.
+    The response lists every item in request order with its status: created
+    (with id, created_at and risk_level) or invalid (with the error).
+    """
+    if len(items) > settings.HEALTH_RECORD_BATCH_MAX_ITEMS:
+        # 413 by number: its constant name depends on the Starlette version
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.HEALTH_RECORD_BATCH_MAX_ITEMS} records per batch"
+        )
+    
+    return await create_records(db, current_user.id, items)
+
 # Get all health records or only user's records
 @router.get("/", response_model=List[HealthRecordResponse])
+@query_budget(max_queries=3)
+@read_only
 async def read_health_records(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """
-    Get health records:
+    Get health records, newest first:
     - If admin: all records
     - If user: only their own records
+    
+    Pages are linked by cursor: pass the X-Next-Cursor header of a page as
+    ``cursor`` to get the next one. The header is absent on the last page.
     """
     # Admin can see all records
     if current_user.role == UserRole.ADMIN:
-        records = db.query(HealthRecord).offset(skip).limit(limit).all()
+        query = select(HealthRecord)
     # Regular users can only see their own records
     else:
-        records = db.query(HealthRecord).filter(
-            HealthRecord.user_id == current_user.id
-        ).offset(skip).limit(limit).all()
+        query = select(HealthRecord).where(HealthRecord.user_id == current_user.id)
     
+    # Fast path: Core rows encoded with orjson, no per-row model validation
+    if fast_json_enabled():
+        query = query.with_only_columns(*response_columns(HealthRecord, HealthRecordResponse))
+        return rows_response(*await paginate(db, query, HealthRecord, cursor, limit))
+    
+    records, next_cursor = await paginate(db, query, HealthRecord, cursor, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return records
 
+# Export health records
+# Declared before "/{record_id}" so "export" is not parsed as a record id
+@router.get("/export", response_model=List[HealthRecordResponse])
+@query_budget(max_queries=3)
+@read_only
+async def export_health_records(
+    format: Optional[str] = Query(None, pattern="^(json|ndjson|csv)$"),
+    accept: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user)
+):
+    """
+    Export all health records for the current user.
+    
+    - format=json (default): a single JSON list
+    - format=ndjson or csv (or a matching Accept header): streamed straight
+      from a server-side cursor, so memory stays flat for any history size
+    """
+    export_format = negotiate_export_format(format, accept)
+    if export_format in EXPORT_MEDIA_TYPES:
+        headers = {}
+        if export_format == "csv":
+            headers["Content-Disposition"] = 'attachment; filename="health_records.csv"'
+        # The stream reads through its own session; return the connection
+        # authentication may have used instead of holding it meanwhile
+        replica = replica_of(db)
+        await db.close()
+        return StreamingResponse(
+            stream_user_records(current_user.id, export_format, replica),
+            media_type=EXPORT_MEDIA_TYPES[export_format],
+            headers=headers,
+        )
+    
+    # Get all records for the current user, ordered by date
+    query = (
+        select(HealthRecord)
+        .where(HealthRecord.user_id == current_user.id)
+        .order_by(HealthRecord.created_at.desc())
+    )
+    
+    if fast_json_enabled():
+        query = query.with_only_columns(*response_columns(HealthRecord, HealthRecordResponse))
+        return RowsJSONResponse((await db.execute(query)).all())
+    
+    records = (await db.scalars(query)).all()
+    
+    return records
+
+# Trends over a user's readings
+# Declared before "/{record_id}" so "trends" is not parsed as a record id
+@router.get("/trends", response_model=Dict[str, Any])
+@query_budget(max_queries=3)
+async def read_health_trends(
+    user_id: Optional[int] = None,
+    bucket: str = Query("week", pattern="^(day|week|month)$"),
+    window: int = Query(4, ge=1, le=365),
+    since: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user)
+):
+    """
+    Moving averages, resampled series, summary statistics and week-over-week
+    deltas of weight, BMI, heart rate and blood pressure.
+    
+    - bucket: resample readings per day, week or month
+    - window: number of buckets in each moving average
+    - since: ignore readings before this time
+    - user_id: another user's trends - admin only; defaults to the current user
+    """
+    # Regular users can only see their own trends
+    if user_id is None:
+        user_id = current_user.id
+    elif user_id != current_user.id and current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this user's trends"
+        )
+    
+    series = await load_series(db, user_id)
+    trends = compute_trends(series, bucket, window, since)
+    
+    return {"user_id": user_id, **trends}
+
 # Get a single health record by ID
 @router.get("/{record_id}", response_model=HealthRecordResponse)
+@query_budget(max_queries=3)
 async def read_health_record(
     record_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """
     Get a specific health record by ID:
@@ -103,7 +225,7 @@ async def read_health_record(
     - If user: only their own records
     """
     # Find the record
-    record = db.query(HealthRecord).filter(HealthRecord.id == record_id).first()
+    record = await db.get(HealthRecord, record_id)
     
     # Check if record exists
     if not record:
@@ -123,11 +245,12 @@ async def read_health_record(
 
 # Update a health record
 @router.put("/{record_id}", response_model=HealthRecordResponse)
+@query_budget(max_queries=12)
 async def update_health_record(
     record_id: int,
     record_data: HealthRecordUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """
     Update a health record:
@@ -135,7 +258,7 @@ async def update_health_record(
     - If user: only their own records
     """
     # Find the record
-    record = db.query(HealthRecord).filter(HealthRecord.id == record_id).first()
+    record = await db.get(HealthRecord, record_id)
     
     # Check if record exists
     if not record:
@@ -157,18 +280,30 @@ async def update_health_record(
         if value is not None:
             setattr(record, field, value)
     
-    # Commit changes
-    db.commit()
-    db.refresh(record)
+    # Re-classify with the merged values
+    previous_risk_level = record.risk_level
+    record.risk_level = classify_record(
+        record.height,
+        record.weight,
+        record.heart_rate,
+        record.blood_pressure_systolic,
+        record.blood_pressure_diastolic,
+    )
+    await RollupDeltas().change_risk_level(record.created_at, previous_risk_level, record.risk_level).apply(db)
+    await record_activity(db, current_user.id, f"updated health record #{record.id}")
+    
+    # Commit changes; the record already holds the values written
+    await db.commit()
     
     return record
 
 # Delete a health record
 @router.delete("/{record_id}", status_code=status.HTTP_204_NO_CONTENT)
+@query_budget(max_queries=10)
 async def delete_health_record(
     record_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """
     Delete a health record:
@@ -176,7 +311,7 @@ async def delete_health_record(
     - If user: only their own records
     """
     # Find the record
-    record = db.query(HealthRecord).filter(HealthRecord.id == record_id).first()
+    record = await db.get(HealthRecord, record_id)
     
     # Check if record exists
     if not record:
@@ -192,67 +327,26 @@ async def delete_health_record(
             detail="Not authorized to delete this record"
         )
     
-    # Delete the record
-    db.delete(record)
-    db.commit()
+    # Delete the record and uncount it from the rollups
+    await db.delete(record)
+    await RollupDeltas().add_record(record.created_at, record.risk_level, -1).apply(db)
+    await record_activity(db, current_user.id, f"deleted health record #{record_id}")
+    await db.commit()
     
     return None
 
-# Export health records
-@router.get("/export", response_model=List[HealthRecordResponse])
-async def export_health_records(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
-):
-    """
-    Export all health records for the current user
-    """
-    # Get all records for the current user, ordered by date
-    records = db.query(HealthRecord)\
-        .filter(HealthRecord.user_id == current_user.id)\
-        .order_by(HealthRecord.created_at.desc())\
-        .all()
-    
-    return records
-
 # Import health records
 @router.post("/import", response_model=Dict[str, Any])
+# Up to four IMPORT_BATCH_SIZE batches; larger imports overrun it
+@query_budget(max_queries=15)
 async def import_health_records(
     records_data: List[Dict[str, Any]] = Body(...),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """
-    Import health records for the current user
+    Import health records for the current user.
+    Rows are validated and inserted in batches; invalid rows are reported
+    individually without discarding the rest of their batch.
     """
-    imported_count = 0
-    errors = []
-    
-    for record_data in records_data:
-        try:
-            # Create a new health record instance
-            db_record = HealthRecord(
-                user_id=current_user.id,
-                height=record_data.get("height"),
-                weight=record_data.get("weight"),
-                heart_rate=record_data.get("heart_rate") or record_data.get("heartRate"),
-                blood_pressure_systolic=record_data.get("blood_pressure_systolic") or record_data.get("bloodPressureSystolic"),
-                blood_pressure_diastolic=record_data.get("blood_pressure_diastolic") or record_data.get("bloodPressureDiastolic"),
-                symptoms=record_data.get("symptoms"),
-                created_at=datetime.fromisoformat(record_data.get("created_at", "")) if record_data.get("created_at") else datetime.now()
-            )
-            
-            # Add to database
-            db.add(db_record)
-            db.commit()
-            imported_count += 1
-            
-        except Exception as e:
-            errors.append(f"Error importing record: {str(e)}")
-            db.rollback()
-    
-    return {
-        "status": "success" if not errors else "partial",
-        "imported_count": imported_count,
-        "errors": errors
-    } 
\ No newline at end of file
+    return await import_records(db, current_user.id, records_data)
@@ -1,68 +1,70 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Header
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from typing import List, Optional
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from backend.db.session import get_db
-from backend.models.user import User, UserRole
+from backend.core.query_budget import query_budget
+from backend.db.replicas import read_only
+from backend.db.session import get_async_db
+from backend.models.user import User
 from backend.models.health_record import HealthRecord
 from backend.schemas.health_record import HealthRecordResponse
 from backend.schemas.user import UserResponse
-from backend.api.api_v1.endpoints.health_records import get_current_active_user
-from backend.services.auth import get_user_from_token
+from backend.api.deps import get_current_active_user, get_current_admin_user
+from backend.services.fast_json import fast_json_enabled, response_columns, rows_response
+from backend.services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, paginate
+from backend.services.principal_cache import Principal
 
 router = APIRouter()
 
-# Dependency for getting the current admin user
-async def get_current_admin_user(
-    authorization: Optional[str] = Header(None),
-    db: Session = Depends(get_db)
-) -> User:
-    """
-    Get the current authenticated admin user
-    """
-    # First get the authenticated user
-    current_user = await get_current_active_user(authorization, db)
-    
-    # Then check if they have admin role
-    if current_user.role != UserRole.ADMIN:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to access this endpoint"
-        )
-    
-    return current_user
-
 @router.get("/", response_model=List[UserResponse])
+@query_budget(max_queries=3)
+@read_only
 async def read_users(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user)
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_admin_user)
 ):
     """
-    Retrieve all users - admin only
+    Retrieve users, newest first - admin only.
+    The next page's cursor is returned in the X-Next-Cursor header.
     """
-    users = db.query(User).all()
+    # Fast path: Core rows encoded with orjson, no per-row model validation
+    if fast_json_enabled():
+        query = select(*response_columns(User, UserResponse))
+        return rows_response(*await paginate(db, query, User, cursor, limit))
+    
+    users, next_cursor = await paginate(db, select(User), User, cursor, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return users
 
 @router.get("/me", response_model=UserResponse)
+@query_budget(max_queries=3)
 async def read_user_me(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """
     Get current user
     """
-    return current_user
+    # The principal only carries id/role, load the full profile for the response
+    return await db.get(User, current_user.id)
 
 @router.get("/{user_id}")
+@query_budget(max_queries=3)
+@read_only
 async def read_user(
     user_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_admin_user)
 ):
     """
     Get a specific user by ID - admin only
     """
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -71,31 +73,42 @@ async def read_user(
     return user
 
 @router.get("/{user_id}/health-records", response_model=List[HealthRecordResponse])
+@query_budget(max_queries=3)
+@read_only
 async def get_user_health_records(
     user_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user)
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_admin_user)
 ):
     """
-    Get health records for a specific user - admin only
+    Get health records for a specific user, newest first - admin only.
+    The next page's cursor is returned in the X-Next-Cursor header.
     """
     # Verify the user exists
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    # Get the user's health records
-    records = db.query(HealthRecord)\
-        .filter(HealthRecord.user_id == user_id)\
-        .order_by(HealthRecord.created_at.desc())\
-        .all()
+    # Get one page of the user's health records
+    query = select(HealthRecord).where(HealthRecord.user_id == user_id)
+    if fast_json_enabled():
+        query = query.with_only_columns(*response_columns(HealthRecord, HealthRecordResponse))
+        return rows_response(*await paginate(db, query, HealthRecord, cursor, limit))
+    
+    records, next_cursor = await paginate(db, query, HealthRecord, cursor, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     
     return records
 
 @router.put("/{user_id}")
+@query_budget(max_queries=0)
 async def update_user(user_id: int):
     """
     Update a user
@@ -0,0 +1,66 @@
+"""
+Dependencies shared by the API endpoints.
+
+Every endpoint and dependency takes its session from ``get_async_db``, so
+FastAPI resolves it once per request: a request works in one session, which
+checks out a connection on its first query. Authentication is resolved once
+as well: ``get_current_active_user`` turns the bearer token into a cached
+principal, and role checks such as ``get_current_admin_user`` build on it
+rather than repeating the lookup.
+"""
+from typing import Optional
+
+from fastapi import Depends, Header, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.db.session import get_async_db
+from backend.models.user import UserRole
+from backend.services.auth import get_principal_from_token
+from backend.services.principal_cache import Principal
+
+
+# Dependency for getting the current user
+async def get_current_active_user(
+    authorization: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+) -> Principal:
+    """
+    Get the current authenticated user from JWT token.
+    Returns a cached principal (id, role, is_active) rather than the full user.
+    """
+    if not authorization or not authorization.startswith("Bearer "):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    token = authorization.split(" ")[1]
+    user = await get_principal_from_token(db, token)
+
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Inactive user"
+        )
+
+    return user
+
+# Dependency for getting the current admin user
+async def get_current_admin_user(current_user: Principal = Depends(get_current_active_user)) -> Principal:
+    """
+    Check if current user is admin
+    """
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required"
+        )
+    return current_user
@@ -0,0 +1,123 @@
+"""
+Monthly analytics aggregation benchmark.
+
+Seeds ``health_records`` (10M rows by default) and ``users``, then times the
+previous per-month ``extract()`` COUNT loop, the single range + GROUP BY
+over the raw tables, and the rollup read now used by ``/analytics/summary``
+(``services/rollups.py``). The rollup and raw results are compared.
+
+Seeding 10M rows takes a while; pass ``--records`` for a quicker run, and
+``--reuse`` to keep an already seeded database between runs.
+
+Usage:
+    python -m backend.bench.analytics_monthly --records 10000000 --repeat 5
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+
+from backend.bench.common import (
+    create_schema, seed_health_records, seed_users, summarize, use_bench_database,
+)
+
+
+async def legacy_monthly_counts(db, model, current_date):
+    """The pre-rewrite implementation: 6 COUNTs over extract(month/year)"""
+    from sqlalchemy import extract, func, select
+
+    result = []
+    for i in range(6):
+        month_date = current_date - timedelta(days=30 * i)
+        count = await db.scalar(
+            select(func.count(model.id)).where(
+                extract('month', model.created_at) == month_date.month,
+                extract('year', model.created_at) == month_date.year,
+            )
+        ) or 0
+        result.append({"month": month_date.strftime("%b %Y"), "count": count})
+    return list(reversed(result))
+
+
+async def count_per_month(db, column, month_starts):
+    """The single-query rewrite over the raw tables: a half-open range bucketed with CASE"""
+    from sqlalchemy import case, func, literal_column, select
+
+    months = len(month_starts) - 1
+    bucket = case(
+        *[(column < month_starts[i + 1], i) for i in range(months)]
+    ).label("bucket")
+    rows = await db.execute(
+        select(bucket, func.count())
+        .where(column >= month_starts[0], column < month_starts[-1])
+        .group_by(literal_column("bucket"))
+    )
+    counts = {row[0]: row[1] for row in rows}
+    return [
+        {"month": month_starts[i].strftime("%b %Y"), "count": counts.get(i, 0)}
+        for i in range(months)
+    ]
+
+
+async def run(repeat: int) -> dict:
+    from backend.api.api_v1.endpoints.analytics import MONTHS_IN_SUMMARY, get_month_starts
+    from backend.db.database import AsyncSessionLocal, async_engine
+    from backend.models.health_record import HealthRecord
+    from backend.models.user import User
+    from backend.services.rollups import RECORDS, REGISTRATIONS, sum_per_month
+
+    timings = {"legacy": [], "grouped": [], "rollups": []}
+    async with AsyncSessionLocal() as db:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            await legacy_monthly_counts(db, HealthRecord, datetime.utcnow())
+            await legacy_monthly_counts(db, User, datetime.utcnow())
+            timings["legacy"].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            month_starts = get_month_starts(datetime.utcnow(), MONTHS_IN_SUMMARY)
+            grouped = [
+                await count_per_month(db, HealthRecord.created_at, month_starts),
+                await count_per_month(db, User.created_at, month_starts),
+            ]
+            timings["grouped"].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            rolled_up = [
+                await sum_per_month(db, RECORDS, month_starts),
+                await sum_per_month(db, REGISTRATIONS, month_starts),
+            ]
+            timings["rollups"].append(time.perf_counter() - start)
+            assert rolled_up == grouped, "rollups disagree with the raw tables"
+    await async_engine.dispose()
+
+    return {name: summarize(values) for name, values in timings.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monthly analytics aggregation benchmark")
+    parser.add_argument("--records", type=int, default=10_000_000, help="Seeded health records")
+    parser.add_argument("--users", type=int, default=100_000, help="Seeded users")
+    parser.add_argument("--days-back", type=int, default=730, help="Spread of created_at values")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per implementation")
+    parser.add_argument("--reuse", action="store_true", help="Reuse an existing seeded database")
+    args = parser.parse_args()
+
+    use_bench_database("hpn_mec_bench_analytics.db", fresh=not args.reuse)
+    create_schema()
+    if not args.reuse:
+        started = time.perf_counter()
+        user_ids = seed_users(args.users, days_back=args.days_back)
+        seed_health_records(user_ids, args.records, days_back=args.days_back)
+        print(f"Seeded {args.records} records in {time.perf_counter() - started:.1f}s")
+
+        from backend.rollup import rebuild_rollups
+        rebuild_rollups()
+
+    result = asyncio.run(run(args.repeat))
+    print(json.dumps({"records": args.records, "users": args.users, **result}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Batch health record creation benchmark.
+
+Simulates a wearable bridge uploading a day of readings (one per minute,
+``--readings`` in total) for one user, in two modes:
+
+- ``single``: one ``POST /health-records/`` per reading, ``--concurrency``
+  requests in flight
+- ``batch``: ``POST /health-records/batch`` with ``--batch-size`` readings
+  per request, sent one after another
+
+Reports readings per second, request count and the p50/p99 latency of a
+request in each mode, and checks that every reading was stored. Use
+``BENCH_DATABASE_URL`` to run against MySQL.
+
+Usage:
+    python -m backend.bench.batch_create --readings 1440 --batch-sizes 50 500 1440
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from backend.bench.common import (
+    BENCH_PASSWORD, BENCH_USER_EMAIL, create_bench_user, create_schema, make_client,
+    summarize, use_bench_database,
+)
+
+RECORDS = "/api/v1/health-records"
+
+
+def day_of_readings(count: int) -> list:
+    """One reading per minute, ending now"""
+    rng = random.Random(5)
+    start = datetime.utcnow() - timedelta(minutes=count)
+    return [
+        {
+            "height": 172.0,
+            "weight": round(70 + rng.random(), 1),
+            "heart_rate": rng.randint(55, 110),
+            "blood_pressure_systolic": rng.randint(105, 150),
+            "blood_pressure_diastolic": rng.randint(65, 92),
+            "created_at": (start + timedelta(minutes=i)).isoformat(),
+        }
+        for i in range(count)
+    ]
+
+
+async def upload_single(client, headers: dict, readings: list, concurrency: int) -> list:
+    latencies = []
+    pending = iter(readings)
+
+    async def worker():
+        for reading in pending:
+            started = time.perf_counter()
+            response = await client.post(f"{RECORDS}/", json=reading, headers=headers)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+
+async def upload_batches(client, headers: dict, readings: list, batch_size: int) -> list:
+    latencies = []
+    for offset in range(0, len(readings), batch_size):
+        started = time.perf_counter()
+        response = await client.post(f"{RECORDS}/batch", json=readings[offset:offset + batch_size], headers=headers)
+        response.raise_for_status()
+        assert response.json()["error_count"] == 0, response.json()
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+async def count_records(user_id: int) -> int:
+    from sqlalchemy import func, select
+
+    from backend.db.database import AsyncSessionLocal
+    from backend.models.health_record import HealthRecord
+
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(select(func.count(HealthRecord.id)).where(HealthRecord.user_id == user_id))
+
+
+async def run(args, user_id: int) -> list:
+    from backend.db.database import async_engine
+    from backend.main import app
+
+    readings = day_of_readings(args.readings)
+    results = []
+    async with make_client(app) as client:
+        response = await client.post(
+            "/api/v1/auth/login-json", json={"email": BENCH_USER_EMAIL, "password": BENCH_PASSWORD}
+        )
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        modes = [("single", None)] + [("batch", size) for size in args.batch_sizes]
+        for mode, batch_size in modes:
+            before = await count_records(user_id)
+            started = time.perf_counter()
+            if mode == "single":
+                latencies = await upload_single(client, headers, readings, args.concurrency)
+            else:
+                latencies = await upload_batches(client, headers, readings, batch_size)
+            elapsed = time.perf_counter() - started
+            stored = await count_records(user_id) - before
+            assert stored == len(readings), f"{mode}: stored {stored} of {len(readings)} readings"
+
+            summary = summarize(latencies, elapsed)
+            results.append({
+                "mode": mode,
+                "batch_size": batch_size,
+                "requests": summary["count"],
+                "readings_per_second": round(len(readings) / elapsed, 2),
+                "seconds": round(elapsed, 3),
+                "p50_ms": summary["p50_ms"],
+                "p99_ms": summary["p99_ms"],
+            })
+
+    await async_engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch health record creation benchmark")
+    parser.add_argument("--readings", type=int, default=1440, help="Readings to upload per mode")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[50, 500, 1440])
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight in single mode")
+    args = parser.parse_args()
+
+    use_bench_database("hpn_mec_bench_batch_create.db")
+    create_schema()
+    user_id = create_bench_user(BENCH_USER_EMAIL)
+
+    results = asyncio.run(run(args, user_id))
+    print(json.dumps({"benchmark": "batch_create", "readings": args.readings, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Worker cold-start benchmark.
+
+Starts fresh Python processes that each behave like a new uvicorn worker and
+times how long it takes until the worker has answered its first
+database-backed request (``GET /health-records/?limit=50``), in two modes:
+
+- ``eager``: what importing ``backend.main`` used to do, i.e. create the
+  engine and run ``Base.metadata.create_all`` (one inspection per table)
+  before the app exists
+- ``lazy``: import the app without touching the database, run the lifespan
+  startup (which only reads ``migration_history`` on a migrated database),
+  then serve
+
+The database is brought up to date with ``migrate.py`` first, as in a
+deployment. Reported per mode (medians over ``--runs`` processes): app
+import, startup, first request and their total, plus the wall time of the
+whole process including interpreter start.
+
+``create_all`` costs round trips (a few statements per table) that a local
+SQLite file answers in microseconds, so a network round trip is emulated
+with ``--rtt``: every statement sleeps that long first. Use
+``BENCH_DATABASE_URL`` with a MySQL URL and ``--rtt 0`` to measure a real
+server instead.
+
+Usage:
+    python -m backend.bench.cold_start --runs 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from backend.bench.common import (
+    BENCH_USER_EMAIL, create_bench_user, seed_health_records, use_bench_database,
+)
+
+MODES = ["eager", "lazy"]
+
+# Run in a fresh interpreter; prints the timings as JSON
+WORKER = """
+import asyncio, json, os, sys, time
+import httpx
+
+from sqlalchemy import event
+from backend.db.database import on_engine_created
+
+rtt = float(os.environ["BENCH_RTT"])
+def emulate_round_trip(engine):
+    if rtt:
+        event.listen(engine, "before_cursor_execute", lambda *args: time.sleep(rtt))
+on_engine_created(emulate_round_trip)
+
+started = time.perf_counter()
+mode = sys.argv[1]
+if mode == "eager":
+    import backend.models
+    from backend.db.database import Base, engine
+    Base.metadata.create_all(bind=engine)
+from backend.main import app
+from backend.db import database
+imported = time.perf_counter()
+engine_on_import = bool(database.created_engines())
+
+async def serve():
+    headers = {"Authorization": "Bearer " + os.environ["BENCH_TOKEN"]}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        if mode == "lazy":
+            async with app.router.lifespan_context(app):
+                ready = time.perf_counter()
+                response = await client.get("/api/v1/health-records/?limit=50", headers=headers)
+        else:
+            ready = time.perf_counter()
+            response = await client.get("/api/v1/health-records/?limit=50", headers=headers)
+    assert response.status_code == 200, response.text
+    return ready, time.perf_counter()
+
+ready, answered = asyncio.run(serve())
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "startup_ms": (ready - imported) * 1000,
+    "first_request_ms": (answered - ready) * 1000,
+    "total_ms": (answered - started) * 1000,
+    "engine_on_import": engine_on_import,
+}))
+"""
+
+
+def run_worker(mode: str, token: str, rtt: float) -> dict:
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", WORKER, mode], cwd=root, capture_output=True, text=True,
+        env={**os.environ, "BENCH_TOKEN": token, "BENCH_RTT": str(rtt)},
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    if completed.returncode != 0:
+        raise RuntimeError(f"{mode} worker failed:\n{completed.stderr}")
+    return {**json.loads(completed.stdout.strip().splitlines()[-1]), "process_ms": wall_ms}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker cold-start benchmark")
+    parser.add_argument("--runs", type=int, default=10, help="Processes per mode")
+    parser.add_argument("--records", type=int, default=1000)
+    parser.add_argument("--rtt", type=float, default=0.002, help="Emulated DB round trip in seconds")
+    args = parser.parse_args()
+
+    use_bench_database("hpn_mec_bench_cold_start.db")
+
+    # A migrated database, as in a deployment
+    from backend.db.database import SessionLocal
+    from backend.migrate import migrate_up
+
+    with SessionLocal() as session:
+        migrate_up(session)
+    user_id = create_bench_user(BENCH_USER_EMAIL)
+    seed_health_records([user_id], args.records)
+
+    from backend.utils.security import create_access_token
+    token = create_access_token(user_id)
+
+    samples = {mode: [] for mode in MODES}
+    # Alternate modes so file system caches warm both equally
+    for _ in range(args.runs):
+        for mode in MODES:
+            samples[mode].append(run_worker(mode, token, args.rtt))
+
+    results = {}
+    for mode, runs in samples.items():
+        results[mode] = {
+            key: round(statistics.median(run[key] for run in runs), 2)
+            for key in ("import_ms", "startup_ms", "first_request_ms", "total_ms", "process_ms")
+        }
+        results[mode]["engine_on_import"] = runs[0]["engine_on_import"]
+
+    print(json.dumps({"benchmark": "cold_start", "runs": args.runs, "rtt": args.rtt, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Benchmarks run against a throwaway SQLite database by default so they can be
+executed without a MySQL server. Set ``BENCH_DATABASE_URL`` to point them at a
+real database instead. ``use_bench_database()`` must be called before any
+``backend`` module that reads settings is imported.
+"""
+import os
+import random
+import statistics
+import tempfile
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+
+BENCH_USER_EMAIL = "bench.user@example.com"
+BENCH_ADMIN_EMAIL = "bench.admin@example.com"
+BENCH_PASSWORD = "benchpassword123"
+
+
+def use_bench_database(name: str = "hpn_mec_bench.db", fresh: bool = True) -> str:
+    """
+    Point ``DATABASE_URL`` at the benchmark database and return the URL.
+
+    Args:
+        name: SQLite file name, created in the system temp directory
+        fresh: Remove an existing SQLite file first
+    """
+    url = os.getenv("BENCH_DATABASE_URL")
+    if not url:
+        path = os.path.join(tempfile.gettempdir(), name)
+        if fresh and os.path.exists(path):
+            os.remove(path)
+        url = f"sqlite:///{path}"
+    os.environ["DATABASE_URL"] = url
+    return url
+
+
+def create_schema() -> None:
+    """Create all tables on the benchmark database"""
+    import backend.models  # noqa: F401 - register models on the metadata
+    from backend.db.database import Base, engine
+
+    Base.metadata.create_all(bind=engine)
+
+
+def create_bench_user(email: str = BENCH_USER_EMAIL, role: str = "user") -> int:
+    """Insert a user with the shared benchmark password and return its id"""
+    from backend.db.database import SessionLocal
+    from backend.models.user import User, UserRole
+    from backend.services.auth import get_password_hash
+
+    db = SessionLocal()
+    try:
+        user = User(
+            email=email,
+            name=email.split("@")[0],
+            password_hash=get_password_hash(BENCH_PASSWORD),
+            role=UserRole(role),
+        )
+        db.add(user)
+        db.commit()
+        return user.id
+    finally:
+        db.close()
+
+
+def seed_users(count: int, days_back: int = 365, chunk_size: int = 10_000) -> List[int]:
+    """
+    Bulk insert ``count`` users with spread-out registration dates.
+    All share a precomputed hash of ``BENCH_PASSWORD``.
+
+    Returns:
+        list: Ids of the inserted users
+    """
+    from sqlalchemy import func, select
+
+    from backend.db.database import engine
+    from backend.models.user import User
+    from backend.services.auth import get_password_hash
+
+    password_hash = get_password_hash(BENCH_PASSWORD)
+    now = datetime.utcnow()
+    rng = random.Random(42)
+
+    with engine.begin() as connection:
+        start_id = (connection.execute(select(func.max(User.id))).scalar() or 0) + 1
+        for offset in range(0, count, chunk_size):
+            rows = [
+                {
+                    "id": start_id + i,
+                    "name": f"bench user {start_id + i}",
+                    "email": f"bench{start_id + i}@example.com",
+                    "password_hash": password_hash,
+                    "role": "USER",
+                    "is_active": True,
+                    "created_at": now - timedelta(seconds=rng.randrange(days_back * 86400)),
+                }
+                for i in range(offset, min(count, offset + chunk_size))
+            ]
+            connection.execute(User.__table__.insert(), rows)
+
+    return list(range(start_id, start_id + count))
+
+
+def seed_health_records(user_ids: Sequence[int], count: int, days_back: int = 365,
+                        chunk_size: int = 50_000) -> None:
+    """
+    Bulk insert ``count`` health records spread over ``user_ids`` and the
+    last ``days_back`` days, committing once per chunk.
+    """
+    from backend.db.database import engine
+    from backend.models.health_record import HealthRecord
+
+    now = datetime.utcnow()
+    rng = random.Random(7)
+    table = HealthRecord.__table__
+
+    for offset in range(0, count, chunk_size):
+        rows = [
+            {
+                "user_id": user_ids[i % len(user_ids)],
+                "height": 150.0 + rng.random() * 40,
+                "weight": 45.0 + rng.random() * 60,
+                "heart_rate": rng.randint(45, 130),
+                "blood_pressure_systolic": rng.randint(95, 185),
+                "blood_pressure_diastolic": rng.randint(55, 94),
+                "symptoms": None,
+                "created_at": now - timedelta(seconds=rng.randrange(days_back * 86400)),
+            }
+            for i in range(offset, min(count, offset + chunk_size))
+        ]
+        with engine.begin() as connection:
+            connection.execute(table.insert(), rows)
+
+
+def make_client(app, base_url: str = "http://bench"):
+    """Return an httpx client that drives the ASGI app in-process"""
+    import httpx
+
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url=base_url, timeout=60)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of ``values`` (0 for an empty list)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies: List[float], elapsed: Optional[float] = None) -> Dict[str, float]:
+    """
+    Summarize a list of latencies (in seconds) as milliseconds.
+
+    Args:
+        latencies: Per-request latencies in seconds
+        elapsed: Wall-clock duration of the run, used for throughput
+    """
+    summary = {
+        "count": len(latencies),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+    if elapsed:
+        summary["per_second"] = round(len(latencies) / elapsed, 2)
+    return summary
+
+
+async def asgi_get(app, path: str, headers: Optional[Dict[str, str]] = None) -> Dict[str, float]:
+    """
+    Drive one GET request through the ASGI app without buffering the body.
+
+    ``httpx.ASGITransport`` collects the whole response before returning it,
+    which hides streaming behaviour. This driver only counts body bytes, so it
+    measures time to first byte and keeps the client side out of memory
+    numbers.
+
+    Returns:
+        dict: status, ttfb_ms, total_ms and bytes
+    """
+    import asyncio
+    import time
+
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+    result = {"status": 0, "ttfb_ms": None, "bytes": 0}
+    disconnected = asyncio.Event()
+    started = time.perf_counter()
+
+    async def receive():
+        if not result.get("_request_sent"):
+            result["_request_sent"] = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            result["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            body = message.get("body", b"")
+            if body and result["ttfb_ms"] is None:
+                result["ttfb_ms"] = round((time.perf_counter() - started) * 1000, 3)
+            result["bytes"] += len(body)
+            if not message.get("more_body"):
+                disconnected.set()
+
+    await app(scope, receive, send)
+    result.pop("_request_sent", None)
+    result["total_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    return result
@@ -0,0 +1,114 @@
+"""
+Sync vs async database engine load test.
+
+Builds a small FastAPI app with two equivalent ``async def`` endpoints that
+list a user's latest health records: one uses the blocking ``SessionLocal``
+(the pattern the API used before), the other the ``AsyncSessionLocal`` path
+now used by the endpoints. Each is driven at increasing concurrency and the
+requests per second and latency percentiles are reported.
+
+SQLite answers in microseconds from a local file, so the network round trip
+a MySQL driver waits on is emulated with ``--rtt``: the sync endpoint blocks
+for that long (as pymysql does), the async one awaits it (as aiomysql does).
+Use ``BENCH_DATABASE_URL`` with a MySQL URL and ``--rtt 0`` to measure a
+real server instead. Because the clients share the event loop with the app,
+throughput is the reliable figure; latency under the sync engine is
+understated since clients cannot even send while the loop is blocked.
+
+Usage:
+    python -m backend.bench.db_engine_compare --clients 50 100 250 500 --requests 2000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from backend.bench.common import (
+    create_bench_user, create_schema, make_client, seed_health_records, summarize, use_bench_database,
+)
+
+
+def build_app(user_id: int, rtt: float):
+    from fastapi import Depends, FastAPI
+    from sqlalchemy import select
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    from backend.db.database import SessionLocal
+    from backend.db.session import get_async_db
+    from backend.models.health_record import HealthRecord
+
+    app = FastAPI()
+    query = select(HealthRecord).where(HealthRecord.user_id == user_id)\
+        .order_by(HealthRecord.created_at.desc()).limit(50)
+
+    # The session is closed inline: with a threadpool-closed get_db, blocked
+    # checkouts on the loop can deadlock the pool once clients > pool size
+    @app.get("/sync")
+    async def list_sync():
+        with SessionLocal() as db:
+            records = db.scalars(query).all()
+            if rtt:
+                time.sleep(rtt)
+            return len(records)
+
+    @app.get("/async")
+    async def list_async(db: AsyncSession = Depends(get_async_db)):
+        records = (await db.scalars(query)).all()
+        if rtt:
+            await asyncio.sleep(rtt)
+        return len(records)
+
+    return app
+
+
+async def drive(app, path: str, clients: int, total: int) -> dict:
+    latencies = []
+    remaining = total
+
+    async with make_client(app) as client:
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                start = time.perf_counter()
+                response = await client.get(path)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+
+    # Async pool connections belong to this event loop
+    from backend.db.database import async_engine
+    await async_engine.dispose()
+
+    return summarize(latencies, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync vs async engine load test")
+    parser.add_argument("--clients", type=int, nargs="+", default=[50, 100, 250, 500])
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per run")
+    parser.add_argument("--records", type=int, default=1000, help="Seeded records")
+    parser.add_argument("--rtt", type=float, default=0.002, help="Emulated DB round trip in seconds")
+    args = parser.parse_args()
+
+    use_bench_database("hpn_mec_bench_engines.db")
+    create_schema()
+    user_id = create_bench_user()
+    seed_health_records([user_id], args.records)
+    app = build_app(user_id, args.rtt)
+
+    results = []
+    for clients in args.clients:
+        for mode in ("sync", "async"):
+            stats = asyncio.run(drive(app, f"/{mode}", clients, args.requests))
+            results.append({"engine": mode, "clients": clients, **stats})
+            print(f"{mode:<6} clients={clients:<4} rps={stats['per_second']:<9} p99={stats['p99_ms']}ms")
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
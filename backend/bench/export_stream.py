@@ -0,0 +1,109 @@
+"""
+Health record export benchmark.
+
+Seeds one user with ``--records`` health records (1M by default), then
+exports them once per format: the buffered JSON list and the streamed
+NDJSON and CSV bodies. Each export runs in a fresh interpreter so its peak
+RSS (``ru_maxrss``) is not polluted by seeding or by the other formats; the
+RSS right before the request is reported too, so the growth caused by the
+export itself is visible.
+
+Usage:
+    python -m backend.bench.export_stream --records 1000000
+    python -m backend.bench.export_stream --records 1000000 --reuse --formats ndjson csv
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+
+from backend.bench.common import (
+    BENCH_USER_EMAIL, asgi_get, create_bench_user, create_schema, seed_health_records,
+    use_bench_database,
+)
+
+DATABASE_NAME = "hpn_mec_bench_export.db"
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MiB"""
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+async def export_once(export_format: str) -> dict:
+    from sqlalchemy import select
+
+    from backend.db.database import SessionLocal, async_engine
+    from backend.main import app
+    from backend.models.user import User
+    from backend.utils.security import create_access_token
+
+    with SessionLocal() as db:
+        user_id = db.scalar(select(User.id).where(User.email == BENCH_USER_EMAIL))
+    token = create_access_token(subject=user_id)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    # Warm up imports, the engine and the principal cache on a tiny request
+    await asgi_get(app, "/api/v1/health-records/?limit=1", headers)
+
+    rss_before = peak_rss_mb()
+    result = await asgi_get(app, f"/api/v1/health-records/export?format={export_format}", headers)
+    await async_engine.dispose()
+
+    return {
+        "format": export_format,
+        **result,
+        "rss_before_mb": rss_before,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_child(export_format: str) -> dict:
+    """Run a single export in a fresh interpreter and return its result"""
+    output = subprocess.run(
+        [sys.executable, "-m", "backend.bench.export_stream", "--child", export_format],
+        check=True,
+        capture_output=True,
+        text=True,
+        env=os.environ.copy(),
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Health record export benchmark")
+    parser.add_argument("--records", type=int, default=1_000_000)
+    parser.add_argument("--formats", nargs="+", default=["json", "ndjson", "csv"],
+                        choices=["json", "ndjson", "csv"])
+    parser.add_argument("--reuse", action="store_true", help="Reuse the seeded database from a previous run")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        use_bench_database(DATABASE_NAME, fresh=False)
+        print(json.dumps(asyncio.run(export_once(args.child))))
+        return
+
+    use_bench_database(DATABASE_NAME, fresh=not args.reuse)
+    if not args.reuse:
+        create_schema()
+        user_id = create_bench_user()
+        seed_health_records([user_id], args.records)
+
+    results = []
+    for export_format in args.formats:
+        result = run_child(export_format)
+        results.append(result)
+        print(f"{export_format:<7} ttfb={result['ttfb_ms']}ms total={result['total_ms']}ms "
+              f"bytes={result['bytes']} rss {result['rss_before_mb']} -> {result['peak_rss_mb']} MiB")
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Health trends benchmark.
+
+Seeds one user with ``--records`` readings and times
+``GET /health-records/trends`` for each bucket size through the in-process
+app, both cold (series cache cleared before every request, so the readings
+are loaded from the database) and warm (series served from the cache).
+Warm requests should stay under 50 ms at 100k readings.
+
+Usage:
+    python -m backend.bench.health_trends --records 100000 --repeat 20
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from backend.bench.common import (
+    BENCH_PASSWORD, BENCH_USER_EMAIL, asgi_get, create_bench_user, create_schema,
+    make_client, seed_health_records, summarize, use_bench_database,
+)
+
+
+async def run(repeat: int) -> list:
+    from backend.db.database import async_engine
+    from backend.main import app
+    from backend.services.trends import BUCKETS, series_cache
+
+    async with make_client(app) as client:
+        response = await client.post(
+            "/api/v1/auth/login-json", json={"email": BENCH_USER_EMAIL, "password": BENCH_PASSWORD}
+        )
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    results = []
+    for bucket in BUCKETS:
+        path = f"/api/v1/health-records/trends?bucket={bucket}&window=4"
+        result = {"bucket": bucket}
+        for mode in ("cold", "warm"):
+            latencies = []
+            for _ in range(repeat):
+                if mode == "cold":
+                    series_cache.clear()
+                started = time.perf_counter()
+                response = await asgi_get(app, path, headers)
+                latencies.append(time.perf_counter() - started)
+                assert response["status"] == 200, response
+            result[mode] = summarize(latencies)
+        result["bytes"] = response["bytes"]
+        results.append(result)
+
+    await async_engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Health trends benchmark")
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    use_bench_database("hpn_mec_bench_trends.db")
+    create_schema()
+    user_id = create_bench_user(BENCH_USER_EMAIL)
+    seed_health_records([user_id], args.records)
+
+    results = asyncio.run(run(args.repeat))
+    print(json.dumps({"benchmark": "health_trends", "records": args.records, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
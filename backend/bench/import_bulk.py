@@ -0,0 +1,112 @@
+"""
+Health record import benchmark.
+
+Times the batched import pipeline (``services/record_import.py``) for 1k,
+100k and 1M rows, and optionally the previous one-commit-per-row loop for
+the sizes up to ``--legacy-max``.
+
+Rows are passed to the service directly so the numbers reflect validation
+and database work rather than parsing a multi-hundred-megabyte JSON body.
+
+Usage:
+    python -m backend.bench.import_bulk --sizes 1000 100000 1000000 --legacy-max 10000
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from backend.bench.common import create_bench_user, create_schema, use_bench_database
+
+
+def make_rows(count: int) -> list:
+    """Rows shaped like a frontend export, half of them camelCase"""
+    rng = random.Random(count)
+    now = datetime.utcnow()
+    rows = []
+    for i in range(count):
+        systolic = rng.randint(100, 170)
+        row = {
+            "height": round(150 + rng.random() * 40, 1),
+            "weight": round(45 + rng.random() * 60, 1),
+            "symptoms": None,
+            "created_at": (now - timedelta(minutes=i)).isoformat(),
+        }
+        if i % 2:
+            row.update(heartRate=rng.randint(50, 120), bloodPressureSystolic=systolic,
+                       bloodPressureDiastolic=systolic - rng.randint(30, 50))
+        else:
+            row.update(heart_rate=rng.randint(50, 120), blood_pressure_systolic=systolic,
+                       blood_pressure_diastolic=systolic - rng.randint(30, 50))
+        rows.append(row)
+    return rows
+
+
+async def legacy_import(db, user_id: int, rows: list) -> int:
+    """The pre-rewrite loop: one ORM object and one commit per row"""
+    from backend.models.health_record import HealthRecord
+
+    imported = 0
+    for record_data in rows:
+        db.add(HealthRecord(
+            user_id=user_id,
+            height=record_data.get("height"),
+            weight=record_data.get("weight"),
+            heart_rate=record_data.get("heart_rate") or record_data.get("heartRate"),
+            blood_pressure_systolic=record_data.get("blood_pressure_systolic") or record_data.get("bloodPressureSystolic"),
+            blood_pressure_diastolic=record_data.get("blood_pressure_diastolic") or record_data.get("bloodPressureDiastolic"),
+            symptoms=record_data.get("symptoms"),
+            created_at=datetime.fromisoformat(record_data["created_at"]),
+        ))
+        await db.commit()
+        imported += 1
+    return imported
+
+
+async def run(user_id: int, sizes: list, legacy_max: int, batch_size: int) -> list:
+    from backend.db.database import AsyncSessionLocal, async_engine
+    from backend.services.record_import import import_records
+
+    results = []
+    for size in sizes:
+        rows = make_rows(size)
+
+        async with AsyncSessionLocal() as db:
+            result = await import_records(db, user_id, rows, batch_size=batch_size)
+        stats = result["stats"]
+        results.append({"mode": "batched", "rows": size, "imported": result["imported_count"],
+                        "seconds": stats["elapsed_seconds"], "rows_per_second": stats["rows_per_second"]})
+        print(f"batched rows={size:<8} {stats['rows_per_second']} rows/s")
+
+        if size <= legacy_max:
+            async with AsyncSessionLocal() as db:
+                started = time.perf_counter()
+                imported = await legacy_import(db, user_id, rows)
+                elapsed = time.perf_counter() - started
+            results.append({"mode": "legacy", "rows": size, "imported": imported,
+                            "seconds": round(elapsed, 4), "rows_per_second": round(imported / elapsed, 1)})
+            print(f"legacy  rows={size:<8} {round(imported / elapsed, 1)} rows/s")
+
+    await async_engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Health record import benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--legacy-max", type=int, default=10_000, help="Largest size also run through the legacy loop")
+    parser.add_argument("--batch-size", type=int, default=None, help="Override IMPORT_BATCH_SIZE")
+    args = parser.parse_args()
+
+    use_bench_database("hpn_mec_bench_import.db")
+    create_schema()
+    user_id = create_bench_user()
+
+    results = asyncio.run(run(user_id, args.sizes, args.legacy_max, args.batch_size))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+JSON serialization benchmark for list endpoints.
+
+Seeds one user per size with ``--sizes`` health records and measures rows per
+second of the JSON export (``GET /health-records/export``, which returns the
+whole history as one list) with the default path (ORM objects validated
+through ``HealthRecordResponse`` and encoded with ``json``) and with the
+``FAST_JSON_RESPONSES`` path (Core rows encoded with orjson).
+
+Two numbers per size and path:
+
+- ``endpoint``: the full request through the in-process app, query included
+- ``encode``: serialization alone, on rows already fetched, i.e. the part the
+  fast path replaces
+
+Usage:
+    python -m backend.bench.json_serialization --sizes 100 10000 100000 --repeat 5
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import List
+
+from backend.bench.common import (
+    BENCH_PASSWORD, asgi_get, create_bench_user, create_schema, make_client,
+    seed_health_records, use_bench_database,
+)
+
+
+def median_ms(timings: List[float]) -> float:
+    return round(statistics.median(timings) * 1000, 3)
+
+
+def rows_per_second(rows: int, ms: float) -> float:
+    return round(rows / (ms / 1000), 1) if ms else 0.0
+
+
+async def time_endpoint(app, token: str, repeat: int) -> float:
+    """Median latency of the JSON export in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        result = await asgi_get(app, "/api/v1/health-records/export", {"Authorization": f"Bearer {token}"})
+        assert result["status"] == 200, result
+        timings.append(result["total_ms"] / 1000)
+    return median_ms(timings)
+
+
+async def time_encoding(user_id: int, repeat: int) -> dict:
+    """Median time to serialize the user's records on each path, in milliseconds"""
+    from fastapi.responses import JSONResponse
+    from pydantic import TypeAdapter
+    from sqlalchemy import select
+
+    from backend.db.database import AsyncSessionLocal
+    from backend.models.health_record import HealthRecord
+    from backend.schemas.health_record import HealthRecordResponse
+    from backend.services.fast_json import RowsJSONResponse, response_columns
+
+    query = select(HealthRecord).where(HealthRecord.user_id == user_id).order_by(HealthRecord.created_at.desc())
+    async with AsyncSessionLocal() as db:
+        records = (await db.scalars(query)).all()
+        rows = (await db.execute(
+            query.with_only_columns(*response_columns(HealthRecord, HealthRecordResponse))
+        )).all()
+
+    # What FastAPI does with response_model=List[HealthRecordResponse]
+    adapter = TypeAdapter(List[HealthRecordResponse])
+
+    def default_path():
+        validated = adapter.validate_python(records, from_attributes=True)
+        return JSONResponse(adapter.dump_python(validated, mode="json")).body
+
+    def fast_path():
+        return RowsJSONResponse(rows).body
+
+    assert json.loads(default_path()) == json.loads(fast_path()), "fast path output differs"
+
+    timings = {}
+    for name, encode in (("default", default_path), ("fast", fast_path)):
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            encode()
+            samples.append(time.perf_counter() - started)
+        timings[name] = median_ms(samples)
+    return timings
+
+
+async def run(sizes: List[int], repeat: int) -> List[dict]:
+    from backend.core.config import settings
+    from backend.db.database import async_engine
+    from backend.main import app
+
+    results = []
+    async with make_client(app) as client:
+        for size in sizes:
+            email = f"bench.json.{size}@example.com"
+            response = await client.post("/api/v1/auth/login-json", json={"email": email, "password": BENCH_PASSWORD})
+            response.raise_for_status()
+            token = response.json()["access_token"]
+            user_id = response.json()["user"]["id"]
+
+            endpoint = {}
+            for name, enabled in (("default", False), ("fast", True)):
+                settings.FAST_JSON_RESPONSES = enabled
+                await time_endpoint(app, token, 1)  # warm up
+                endpoint[name] = await time_endpoint(app, token, repeat)
+            settings.FAST_JSON_RESPONSES = False
+
+            encode = await time_encoding(user_id, repeat)
+
+            result = {"rows": size}
+            for name in ("default", "fast"):
+                result[name] = {
+                    "endpoint_ms": endpoint[name],
+                    "endpoint_rows_per_second": rows_per_second(size, endpoint[name]),
+                    "encode_ms": encode[name],
+                    "encode_rows_per_second": rows_per_second(size, encode[name]),
+                }
+            result["endpoint_speedup"] = round(endpoint["default"] / endpoint["fast"], 2) if endpoint["fast"] else None
+            result["encode_speedup"] = round(encode["default"] / encode["fast"], 2) if encode["fast"] else None
+            results.append(result)
+
+    await async_engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List endpoint JSON serialization benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    use_bench_database("hpn_mec_bench_json.db")
+    create_schema()
+    for size in args.sizes:
+        user_id = create_bench_user(f"bench.json.{size}@example.com")
+        seed_health_records([user_id], size)
+
+    results = asyncio.run(run(args.sizes, args.repeat))
+    print(json.dumps({"benchmark": "json_serialization", "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""
+API load test.
+
+Seeds the benchmark database with ``--users`` users and ``--records`` health
+records using bulk inserts (rollups are rebuilt afterwards, as after any
+bulk load), then drives each scenario with ``--concurrency`` clients for
+``--duration`` seconds and reports throughput and p50/p95/p99 latency:
+
+- ``login``: ``POST /auth/login-json`` as a random seeded user
+- ``create``: ``POST /health-records/`` with one reading
+- ``list``: ``GET /health-records/?limit=50``
+- ``export``: ``GET /health-records/export`` (the JSON list)
+- ``import``: ``POST /health-records/import`` with ``--import-rows`` readings
+- ``analytics``: ``GET /analytics/summary`` as an admin
+
+By default the app runs in-process behind ``httpx.ASGITransport``, which
+measures the application without a network stack; clients share the event
+loop with the app, so throughput is the reliable figure. With ``--workers N``
+the app is served by ``uvicorn --workers N`` on a local port and driven over
+HTTP instead. Use ``BENCH_DATABASE_URL`` to run against MySQL.
+
+Results are printed as JSON and written to ``--output`` along with the
+configuration and git commit, so runs can be compared over time;
+``--compare`` adds the change in throughput and p99 against an earlier file.
+
+Usage:
+    python -m backend.bench.load_test --users 1000 --records 100000 --concurrency 32 --duration 10
+    python -m backend.bench.load_test --workers 4 --output bench-results.json --compare previous.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
+from backend.bench.common import (
+    BENCH_ADMIN_EMAIL, BENCH_PASSWORD, create_bench_user, create_schema, make_client,
+    seed_health_records, seed_users, summarize, use_bench_database,
+)
+
+SCENARIOS = ["login", "create", "list", "export", "import", "analytics"]
+
+RECORDS = "/api/v1/health-records"
+
+# Seeded users that log in up front to drive the authenticated scenarios
+TOKEN_USERS = 20
+
+
+def random_reading(rng: random.Random) -> dict:
+    return {
+        "height": round(150 + rng.random() * 40, 1),
+        "weight": round(45 + rng.random() * 60, 1),
+        "heart_rate": rng.randint(45, 130),
+        "blood_pressure_systolic": rng.randint(95, 185),
+        "blood_pressure_diastolic": rng.randint(55, 94),
+    }
+
+
+class Context:
+    """Tokens and seeded data shared by the scenarios"""
+
+    def __init__(self, user_ids, user_tokens, admin_token, import_rows):
+        self.user_ids = user_ids
+        self.user_tokens = user_tokens
+        self.admin_token = admin_token
+        self.import_rows = import_rows
+        self.rng = random.Random(11)
+
+    def user_headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.rng.choice(self.user_tokens)}"}
+
+
+async def request(client, ctx: Context, scenario: str):
+    """Send one request of ``scenario``"""
+    if scenario == "login":
+        email = f"bench{ctx.rng.choice(ctx.user_ids)}@example.com"
+        return await client.post("/api/v1/auth/login-json", json={"email": email, "password": BENCH_PASSWORD})
+    if scenario == "create":
+        return await client.post(f"{RECORDS}/", json=random_reading(ctx.rng), headers=ctx.user_headers())
+    if scenario == "list":
+        return await client.get(f"{RECORDS}/?limit=50", headers=ctx.user_headers())
+    if scenario == "export":
+        return await client.get(f"{RECORDS}/export", headers=ctx.user_headers())
+    if scenario == "import":
+        rows = [random_reading(ctx.rng) for _ in range(ctx.import_rows)]
+        return await client.post(f"{RECORDS}/import", json=rows, headers=ctx.user_headers())
+    if scenario == "analytics":
+        return await client.get("/api/v1/analytics/summary", headers={"Authorization": f"Bearer {ctx.admin_token}"})
+    raise ValueError(f"Unknown scenario: {scenario}")
+
+
+async def run_scenario(client, ctx: Context, scenario: str, concurrency: int, duration: float) -> dict:
+    latencies, statuses = [], {}
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            response = await request(client, ctx, scenario)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            if response.status_code < 400:
+                latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        **summarize(latencies, elapsed),
+        "errors": sum(count for status, count in statuses.items() if status >= 400),
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@asynccontextmanager
+async def serve_command(command: list):
+    """
+    httpx client for the app served by ``command`` (which must take the port
+    from ``{port}``) on a local port, once it answers the health check
+    """
+    import httpx
+
+    port = free_port()
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    server = subprocess.Popen(
+        [part.format(port=port) for part in command], cwd=root, env=os.environ.copy(),
+    )
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=60) as client:
+            for _ in range(300):
+                if server.poll() is not None:
+                    raise RuntimeError(f"{command[2]} exited during startup")
+                try:
+                    if (await client.get("/")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                await asyncio.sleep(0.1)
+            else:
+                raise RuntimeError(f"{command[2]} did not start within 30s")
+            yield client
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+@asynccontextmanager
+async def serve(workers: int):
+    """
+    httpx client for the app: in-process, or served by uvicorn with
+    ``workers`` worker processes
+    """
+    if not workers:
+        from backend.main import app
+
+        async with make_client(app) as client:
+            yield client
+        from backend.db.database import async_engine
+        await async_engine.dispose()
+        return
+
+    command = [sys.executable, "-m", "uvicorn", "backend.main:app", "--host", "127.0.0.1",
+               "--port", "{port}", "--workers", str(workers), "--log-level", "warning"]
+    async with serve_command(command) as client:
+        yield client
+
+
+async def login(client, email: str) -> str:
+    response = await client.post("/api/v1/auth/login-json", json={"email": email, "password": BENCH_PASSWORD})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def run(args, user_ids) -> dict:
+    results = {}
+    async with serve(args.workers) as client:
+        sample = user_ids[:TOKEN_USERS]
+        user_tokens = [await login(client, f"bench{user_id}@example.com") for user_id in sample]
+        ctx = Context(user_ids, user_tokens, await login(client, BENCH_ADMIN_EMAIL), args.import_rows)
+
+        for scenario in args.scenarios:
+            results[scenario] = await run_scenario(client, ctx, scenario, args.concurrency, args.duration)
+            print(f"{scenario:<10} rps={results[scenario]['per_second']:<9} "
+                  f"p99={results[scenario]['p99_ms']}ms errors={results[scenario]['errors']}", file=sys.stderr)
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def compare(results: dict, previous: dict) -> dict:
+    """Change in throughput and p99 against an earlier run, in percent"""
+    def change(new, old):
+        return round((new - old) / old * 100, 1) if old else None
+
+    comparison = {"against": previous.get("git_commit"), "scenarios": {}}
+    for scenario, stats in results.items():
+        old = previous.get("results", {}).get(scenario)
+        if old:
+            comparison["scenarios"][scenario] = {
+                "per_second_pct": change(stats.get("per_second", 0), old.get("per_second", 0)),
+                "p99_pct": change(stats["p99_ms"], old["p99_ms"]),
+            }
+    return comparison
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API load test")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per scenario")
+    parser.add_argument("--import-rows", type=int, default=100, help="Rows per import request")
+    parser.add_argument("--workers", type=int, default=0, help="Serve with uvicorn workers instead of in-process")
+    parser.add_argument("--output", help="Write the results JSON to this file")
+    parser.add_argument("--compare", help="Earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    url = use_bench_database("hpn_mec_bench_load.db")
+    create_schema()
+    started = time.perf_counter()
+    user_ids = seed_users(args.users)
+    seed_health_records(user_ids, args.records)
+    create_bench_user(BENCH_ADMIN_EMAIL, role="admin")
+
+    from backend.rollup import rebuild_rollups
+    rebuild_rollups()
+    seed_seconds = round(time.perf_counter() - started, 2)
+
+    report = {
+        "benchmark": "load_test",
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "config": {
+            "database": url.split("://", 1)[0],
+            "users": args.users,
+            "records": args.records,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "import_rows": args.import_rows,
+            "workers": args.workers or "in-process",
+            "seed_seconds": seed_seconds,
+        },
+        "results": asyncio.run(run(args, user_ids)),
+    }
+    if args.compare:
+        with open(args.compare) as f:
+            report["comparison"] = compare(report["results"], json.load(f))
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
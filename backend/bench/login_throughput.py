@@ -0,0 +1,84 @@
+"""
+Login throughput benchmark.
+
+Runs concurrent logins against the in-process ASGI app while a probe task
+polls the ``/`` health check. It reports logins per second and the latency
+of the unrelated probe endpoint, which shows whether bcrypt work is still
+stalling the event loop.
+
+Usage:
+    python -m backend.bench.login_throughput --concurrency 16 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from backend.bench.common import (
+    BENCH_PASSWORD, BENCH_USER_EMAIL, create_bench_user, create_schema,
+    make_client, summarize, use_bench_database,
+)
+
+
+async def run(concurrency: int, duration: float, probe_interval: float) -> dict:
+    from backend.main import app
+
+    login_latencies = []
+    probe_latencies = []
+    rejected = 0
+    deadline = time.perf_counter() + duration
+
+    async with make_client(app) as client:
+        async def login_worker():
+            nonlocal rejected
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                response = await client.post(
+                    "/api/v1/auth/login-json",
+                    json={"email": BENCH_USER_EMAIL, "password": BENCH_PASSWORD},
+                )
+                if response.status_code == 503:
+                    rejected += 1
+                    await asyncio.sleep(0.05)
+                    continue
+                response.raise_for_status()
+                login_latencies.append(time.perf_counter() - start)
+
+        async def probe_worker():
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                response = await client.get("/")
+                response.raise_for_status()
+                probe_latencies.append(time.perf_counter() - start)
+                await asyncio.sleep(probe_interval)
+
+        started = time.perf_counter()
+        await asyncio.gather(probe_worker(), *(login_worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 2),
+        "logins": summarize(login_latencies, elapsed),
+        "rejected_503": rejected,
+        "probe": summarize(probe_latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Login throughput benchmark")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent login clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="Run time in seconds")
+    parser.add_argument("--probe-interval", type=float, default=0.01, help="Delay between probe requests")
+    args = parser.parse_args()
+
+    use_bench_database("hpn_mec_bench_login.db")
+    create_schema()
+    create_bench_user()
+
+    result = asyncio.run(run(args.concurrency, args.duration, args.probe_interval))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
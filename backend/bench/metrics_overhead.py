@@ -0,0 +1,112 @@
+"""
+Metrics middleware overhead benchmark.
+
+Imports the app with ``METRICS_ENABLED=false`` and drives the same requests
+through it bare and wrapped in ``MetricsMiddleware`` with the SQL events
+attached, alternating between the two in rounds so drift (caches, CPU
+frequency) affects both equally. Two endpoints are measured: the ``/``
+health check, where the middleware's fixed cost is largest relative to the
+request, and a page of 50 health records, a typical database-backed request.
+
+Reports the median latency of each variant and the overhead in percent,
+which should stay under 2% for the database-backed endpoint. The last line
+checks that the instrumented requests were actually recorded.
+
+Usage:
+    python -m backend.bench.metrics_overhead --rounds 20 --requests 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+from backend.bench.common import (
+    BENCH_PASSWORD, BENCH_USER_EMAIL, asgi_get, create_bench_user, create_schema,
+    make_client, seed_health_records, use_bench_database,
+)
+
+PATHS = ["/", "/api/v1/health-records/?limit=50"]
+
+
+async def time_requests(app, path: str, headers: dict, count: int) -> list:
+    latencies = []
+    for _ in range(count):
+        started = time.perf_counter()
+        response = await asgi_get(app, path, headers)
+        latencies.append(time.perf_counter() - started)
+        assert response["status"] == 200, response
+    return latencies
+
+
+async def run(rounds: int, requests: int) -> list:
+    from sqlalchemy import event
+
+    from backend.core import metrics
+    from backend.db.database import async_engine
+    from backend.main import app
+
+    async with make_client(app) as client:
+        response = await client.post(
+            "/api/v1/auth/login-json", json={"email": BENCH_USER_EMAIL, "password": BENCH_PASSWORD}
+        )
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    instrumented = metrics.MetricsMiddleware(app)
+    sync_engine = async_engine.sync_engine
+
+    results = []
+    for path in PATHS:
+        # Warm up caches and the pool on both variants
+        await time_requests(app, path, headers, requests // 4 or 1)
+        await time_requests(instrumented, path, headers, requests // 4 or 1)
+
+        samples = {"plain": [], "metrics": []}
+        for _ in range(rounds):
+            samples["plain"] += await time_requests(app, path, headers, requests)
+
+            metrics.instrument_engine(sync_engine)
+            samples["metrics"] += await time_requests(instrumented, path, headers, requests)
+            event.remove(sync_engine, "before_cursor_execute", metrics._before_cursor_execute)
+            event.remove(sync_engine, "after_cursor_execute", metrics._after_cursor_execute)
+
+        plain = statistics.median(samples["plain"])
+        measured = statistics.median(samples["metrics"])
+        results.append({
+            "path": path,
+            "requests": len(samples["plain"]),
+            "plain_p50_ms": round(plain * 1000, 4),
+            "metrics_p50_ms": round(measured * 1000, 4),
+            "overhead_us": round((measured - plain) * 1_000_000, 2),
+            "overhead_pct": round((measured - plain) / plain * 100, 2),
+        })
+
+    await async_engine.dispose()
+    recorded = sum(metrics.registry.requests.values.values())
+    assert recorded >= rounds * requests * len(PATHS), "middleware did not record the requests"
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Metrics middleware overhead benchmark")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per variant and round")
+    parser.add_argument("--records", type=int, default=1000)
+    args = parser.parse_args()
+
+    # The benchmark adds the middleware itself
+    os.environ["METRICS_ENABLED"] = "false"
+
+    use_bench_database("hpn_mec_bench_metrics.db")
+    create_schema()
+    user_id = create_bench_user(BENCH_USER_EMAIL)
+    seed_health_records([user_id], args.records)
+
+    results = asyncio.run(run(args.rounds, args.requests))
+    print(json.dumps({"benchmark": "metrics_overhead", "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Pagination depth benchmark.
+
+Seeds one user with ``--records`` health records and times fetching page N
+of that user's listing for increasing N, with keyset pagination
+(``services/pagination.py``) and with the equivalent ``ORDER BY ... OFFSET``
+query. Keyset latency should stay flat as N grows; OFFSET grows linearly.
+
+The cursor for page N is computed once, outside the timed section, from the
+row just before the page, exactly as a client walking the pages would have
+received it.
+
+Usage:
+    python -m backend.bench.pagination_depth --records 1000000 --pages 1 10 100 1000 10000
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from backend.bench.common import (
+    BENCH_USER_EMAIL, create_bench_user, create_schema, seed_health_records,
+    use_bench_database,
+)
+
+
+async def time_query(run, repeat: int) -> float:
+    """Median latency of ``run()`` in milliseconds"""
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await run()
+        latencies.append(time.perf_counter() - started)
+    return round(statistics.median(latencies) * 1000, 3)
+
+
+async def run(pages: list, page_size: int, repeat: int, offset_max: int) -> list:
+    from sqlalchemy import select
+
+    from backend.db.database import AsyncSessionLocal, async_engine
+    from backend.models.health_record import HealthRecord
+    from backend.models.user import User
+    from backend.services.pagination import encode_cursor, paginate
+
+    async with AsyncSessionLocal() as db:
+        user_id = await db.scalar(select(User.id).where(User.email == BENCH_USER_EMAIL))
+
+    query = select(HealthRecord).where(HealthRecord.user_id == user_id)
+    ordered = query.order_by(HealthRecord.created_at.desc(), HealthRecord.id.desc())
+
+    results = []
+    async with AsyncSessionLocal() as db:
+        for page in pages:
+            skip = (page - 1) * page_size
+            cursor = None
+            if skip:
+                previous = (await db.execute(
+                    select(HealthRecord.created_at, HealthRecord.id)
+                    .where(HealthRecord.user_id == user_id)
+                    .order_by(HealthRecord.created_at.desc(), HealthRecord.id.desc())
+                    .offset(skip - 1).limit(1)
+                )).first()
+                if previous is None:
+                    print(f"page {page} is past the end of the seeded data, skipping")
+                    continue
+                cursor = encode_cursor(previous.created_at, previous.id)
+
+            async def keyset():
+                rows, _ = await paginate(db, query, HealthRecord, cursor, page_size)
+                db.expunge_all()
+                return rows
+
+            async def offset():
+                rows = (await db.scalars(ordered.offset(skip).limit(page_size))).all()
+                db.expunge_all()
+                return rows
+
+            # Both strategies must return the same page
+            keyset_ids = [record.id for record in await keyset()]
+            offset_ids = [record.id for record in await offset()]
+            assert keyset_ids == offset_ids, f"page {page} differs between keyset and offset"
+
+            result = {"page": page, "keyset_ms": await time_query(keyset, repeat)}
+            if page <= offset_max:
+                result["offset_ms"] = await time_query(offset, repeat)
+            results.append(result)
+            print(f"page={page:<6} keyset={result['keyset_ms']}ms offset={result.get('offset_ms', '-')}ms")
+
+    await async_engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pagination depth benchmark")
+    parser.add_argument("--records", type=int, default=1_000_000)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 100, 1_000, 10_000])
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--offset-max", type=int, default=10_000, help="Deepest page also timed with OFFSET")
+    parser.add_argument("--reuse", action="store_true", help="Reuse the seeded database from a previous run")
+    args = parser.parse_args()
+
+    use_bench_database("hpn_mec_bench_pagination.db", fresh=not args.reuse)
+    if not args.reuse:
+        create_schema()
+        user_id = create_bench_user()
+        seed_health_records([user_id], args.records)
+
+    results = asyncio.run(run(args.pages, args.page_size, args.repeat, args.offset_max))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Connection pool saturation benchmark.
+
+Runs the in-process app with a deliberately small pool (``--pool-size``,
+``--max-overflow``, ``--pool-timeout``) and drives a connection-holding
+endpoint (the JSON export of a user with ``--records`` records) with an
+increasing number of concurrent clients. For each level it reports request
+throughput and latency, how many requests were shed with 503 because no
+connection became free within the pool timeout, and the pool's own view:
+checkout wait percentiles, timeouts and the peak number of connections in
+use and in overflow.
+
+Below the pool capacity checkout waits stay near zero; past it requests
+queue for connections, waits approach the timeout and the excess is shed.
+
+Usage:
+    python -m backend.bench.pool_saturation --pool-size 2 --max-overflow 2 --clients 2 4 8 32 128
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from backend.bench.common import (
+    BENCH_PASSWORD, BENCH_USER_EMAIL, create_bench_user, create_schema, make_client,
+    seed_health_records, summarize, use_bench_database,
+)
+
+PATH = "/api/v1/health-records/export"
+
+
+async def run_level(app, client, headers, clients: int, duration: float) -> dict:
+    from backend.db.database import async_engine
+    from backend.db.pool import PoolMetrics
+
+    pool = async_engine.pool
+    pool.metrics = PoolMetrics()
+    latencies, statuses = [], {}
+    peak = {"checked_out": 0, "overflow": 0}
+    deadline = time.perf_counter() + duration
+    done = asyncio.Event()
+
+    async def sample_gauges():
+        while not done.is_set():
+            peak["checked_out"] = max(peak["checked_out"], pool.checkedout())
+            peak["overflow"] = max(peak["overflow"], pool.overflow())
+            await asyncio.sleep(0.005)
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            response = await client.get(PATH, headers=headers)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            if response.status_code == 200:
+                latencies.append(time.perf_counter() - started)
+
+    sampler = asyncio.create_task(sample_gauges())
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(clients)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await sampler
+
+    return {
+        "clients": clients,
+        "statuses": statuses,
+        "ok": summarize(latencies, elapsed),
+        "shed": sum(count for status, count in statuses.items() if status == 503),
+        "pool": {
+            **pool.metrics.snapshot(),
+            "peak_checked_out": peak["checked_out"],
+            "peak_overflow": max(peak["overflow"], 0),
+        },
+    }
+
+
+async def run(levels, duration: float) -> list:
+    from backend.db.database import async_engine
+    from backend.main import app
+
+    results = []
+    async with make_client(app) as client:
+        response = await client.post(
+            "/api/v1/auth/login-json", json={"email": BENCH_USER_EMAIL, "password": BENCH_PASSWORD}
+        )
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        for clients in levels:
+            results.append(await run_level(app, client, headers, clients, duration))
+
+    await async_engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Connection pool saturation benchmark")
+    parser.add_argument("--pool-size", type=int, default=2)
+    parser.add_argument("--max-overflow", type=int, default=2)
+    parser.add_argument("--pool-timeout", type=float, default=0.5)
+    parser.add_argument("--clients", type=int, nargs="+", default=[2, 4, 8, 32, 128])
+    parser.add_argument("--records", type=int, default=2000, help="Records returned per request")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per concurrency level")
+    args = parser.parse_args()
+
+    # Pool settings are read when the engines are created
+    os.environ["DB_POOL_SIZE"] = str(args.pool_size)
+    os.environ["DB_MAX_OVERFLOW"] = str(args.max_overflow)
+    os.environ["DB_POOL_TIMEOUT"] = str(args.pool_timeout)
+
+    use_bench_database("hpn_mec_bench_pool.db")
+    create_schema()
+    user_id = create_bench_user(BENCH_USER_EMAIL)
+    seed_health_records([user_id], args.records)
+
+    results = asyncio.run(run(args.clients, args.duration))
+    print(json.dumps({
+        "benchmark": "pool_saturation",
+        "pool_size": args.pool_size,
+        "max_overflow": args.max_overflow,
+        "pool_timeout": args.pool_timeout,
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
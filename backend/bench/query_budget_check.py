@@ -0,0 +1,159 @@
+"""
+SQL query budget check.
+
+Runs the in-process app with ``QUERY_BUDGET_MODE=enforce`` against a seeded
+database (two users with ``--records`` health records each, one admin) and
+sends a request to every endpoint that declares a budget with
+``@query_budget``. The principal cache is cleared before each request, so
+authentication is counted at its worst case. A user with many records makes
+N+1 lazy loads show up as a budget overrun rather than as one extra query.
+
+Prints one line per request with the statements it ran before responding, and
+exits with status 1 if any request exceeded its budget or failed, or if an API
+route declares no budget. Meant to run in CI.
+
+Usage:
+    python -m backend.bench.query_budget_check --records 50
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+from backend.bench.common import (
+    BENCH_ADMIN_EMAIL, BENCH_PASSWORD, BENCH_USER_EMAIL, create_bench_user, create_schema,
+    make_client, seed_health_records, use_bench_database,
+)
+
+RECORD = {
+    "height": 170,
+    "weight": 70,
+    "heart_rate": 72,
+    "blood_pressure_systolic": 120,
+    "blood_pressure_diastolic": 80,
+}
+
+
+def requests_to_check(user_id: int, record_ids: list) -> list:
+    """(method, path, role, body) of one request per budgeted endpoint"""
+    records = "/api/v1/health-records"
+    return [
+        ("POST", "/api/v1/auth/register", None, {"email": "budget.check@example.com", "name": "budget", "password": BENCH_PASSWORD}),
+        ("POST", "/api/v1/auth/login-json", None, {"email": BENCH_USER_EMAIL, "password": BENCH_PASSWORD}),
+        ("GET", "/api/v1/auth/me", "user", None),
+        ("POST", "/api/v1/auth/refresh-token", "user", None),
+        ("POST", f"{records}/", "user", RECORD),
+        ("POST", f"{records}/batch", "user", [RECORD] * 100),
+        ("POST", f"{records}/import", "user", [RECORD] * 100),
+        ("GET", f"{records}/", "user", None),
+        ("GET", f"{records}/", "admin", None),
+        ("GET", f"{records}/export", "user", None),
+        ("GET", f"{records}/export?format=csv", "user", None),
+        ("GET", f"{records}/trends", "user", None),
+        ("GET", f"{records}/{record_ids[0]}", "user", None),
+        ("PUT", f"{records}/{record_ids[0]}", "user", {"weight": 71}),
+        ("DELETE", f"{records}/{record_ids[1]}", "user", None),
+        ("GET", "/api/v1/users/", "admin", None),
+        ("GET", "/api/v1/users/me", "user", None),
+        ("GET", f"/api/v1/users/{user_id}", "admin", None),
+        ("GET", f"/api/v1/users/{user_id}/health-records", "admin", None),
+        ("PUT", f"/api/v1/users/{user_id}", None, None),
+        ("GET", "/api/v1/analytics/summary", "admin", None),
+        ("GET", "/api/v1/admin/dashboard", "admin", None),
+        ("GET", "/api/v1/admin/users", "admin", None),
+        ("PUT", f"/api/v1/admin/users/{user_id}/deactivate", "admin", None),
+        ("PUT", f"/api/v1/admin/users/{user_id}/activate", "admin", None),
+        ("GET", "/api/v1/admin/auth-cache", "admin", None),
+        ("GET", "/api/v1/admin/token-cache", "admin", None),
+        ("GET", "/api/v1/admin/response-cache", "admin", None),
+        ("GET", "/api/v1/admin/trends-cache", "admin", None),
+        ("GET", "/api/v1/admin/db-pool", "admin", None),
+        ("GET", "/api/v1/admin/replicas", "admin", None),
+        # Revokes the user's token, so it goes last
+        ("POST", "/api/v1/auth/logout", "user", None),
+    ]
+
+
+def unbudgeted_routes() -> list:
+    """Endpoints of the API routers that declare no query budget"""
+    from fastapi.routing import APIRoute
+
+    from backend.api.api_v1.endpoints import admin, analytics, auth, health_records, users
+    from backend.core.query_budget import endpoint_budget
+
+    return [
+        f"{module.__name__.rsplit('.', 1)[-1]}: {','.join(sorted(route.methods))} {route.path}"
+        for module in (auth, users, health_records, admin, analytics)
+        for route in module.router.routes
+        if isinstance(route, APIRoute) and endpoint_budget(route.endpoint) is None
+    ]
+
+
+async def run(user_id: int) -> int:
+    from sqlalchemy import select
+
+    from backend.core.query_budget import QUERY_COUNT_HEADER, QueryBudgetExceeded
+    from backend.db.database import AsyncSessionLocal, async_engine
+    from backend.main import app
+    from backend.models.health_record import HealthRecord
+    from backend.services.principal_cache import principal_cache
+
+    async with AsyncSessionLocal() as db:
+        record_ids = (await db.scalars(
+            select(HealthRecord.id).where(HealthRecord.user_id == user_id).order_by(HealthRecord.id).limit(2)
+        )).all()
+
+    failures = 0
+    async with make_client(app) as client:
+        headers = {}
+        for role, email in (("user", BENCH_USER_EMAIL), ("admin", BENCH_ADMIN_EMAIL)):
+            response = await client.post("/api/v1/auth/login-json", json={"email": email, "password": BENCH_PASSWORD})
+            response.raise_for_status()
+            headers[role] = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        for method, path, role, body in requests_to_check(user_id, record_ids):
+            principal_cache.clear()
+            try:
+                response = await client.request(method, path, headers=headers.get(role), json=body)
+            except QueryBudgetExceeded as error:
+                failures += 1
+                print(f"FAIL {method} {path}: {error}")
+                continue
+            if response.status_code >= 400:
+                failures += 1
+                print(f"FAIL {method} {path}: status {response.status_code}")
+                continue
+            # The header misses statements run while a body streams; those
+            # still count against the budget above
+            print(f"ok   {method} {path}: {response.headers.get(QUERY_COUNT_HEADER)} statements before the response")
+
+    for route in unbudgeted_routes():
+        failures += 1
+        print(f"FAIL no budget: {route}")
+
+    await async_engine.dispose()
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQL query budget check")
+    parser.add_argument("--records", type=int, default=50, help="Health records per user")
+    args = parser.parse_args()
+
+    # Read when the app is imported
+    os.environ["QUERY_BUDGET_MODE"] = "enforce"
+
+    use_bench_database("hpn_mec_bench_query_budget.db")
+    create_schema()
+    user_id = create_bench_user(BENCH_USER_EMAIL)
+    other_id = create_bench_user("bench.other@example.com")
+    create_bench_user(BENCH_ADMIN_EMAIL, role="admin")
+    seed_health_records([user_id, other_id], args.records * 2)
+
+    failures = asyncio.run(run(user_id))
+    print(f"{failures} endpoint(s) over budget or failing")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Read replica routing check.
+
+Seeds a SQLite primary, copies it to a second file opened read-only as the
+replica (``DATABASE_REPLICA_URLS``) and sends the authenticated requests of
+``query_budget_check.py`` to the in-process app in three phases:
+
+- ``routed``: endpoints marked ``read_only`` must read from the replica and
+  run nothing on the primary but principal lookups; every other endpoint
+  must leave the replica alone. The listings and exports in
+  ``EXPECTED_READ_ONLY`` must be marked ``read_only``
+- ``failover``: with the replica file removed, read-only endpoints must
+  still succeed, from the primary
+- ``recovered``: with the file back and ``DATABASE_REPLICA_RETRY_SECONDS``
+  elapsed, read-only endpoints must read from the replica again
+
+Prints one line per request and exits with status 1 on any violation.
+Meant to run in CI.
+
+Usage:
+    python -m backend.bench.replica_routing_check --records 50
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from backend.bench.common import (
+    BENCH_ADMIN_EMAIL, BENCH_PASSWORD, BENCH_USER_EMAIL, create_bench_user, create_schema,
+    make_client, seed_health_records, use_bench_database,
+)
+from backend.bench.query_budget_check import requests_to_check
+from backend.bench.request_scope_check import USER_LOOKUP
+
+RETRY_SECONDS = 0.5
+
+# Listings, exports and lookups that must be served from the replicas
+EXPECTED_READ_ONLY = {
+    ("GET", "/api/v1/health-records/"),
+    ("GET", "/api/v1/health-records/export"),
+    ("GET", "/api/v1/health-records/export?format=csv"),
+    ("GET", "/api/v1/users/"),
+    ("GET", "/api/v1/admin/users"),
+    ("GET", "/api/v1/analytics/summary"),
+    ("GET", "/api/v1/admin/dashboard"),
+}
+
+
+class StatementLog:
+    """Statements run on one engine since the last reset"""
+
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+
+class Checks(list):
+    """Requests to send, remembering which went to read-only endpoints"""
+
+    def __init__(self, checks):
+        super().__init__(checks)
+        self.read_only = set()
+
+
+class RecordRoute:
+    """ASGI wrapper keeping the route the app matched for the last request"""
+
+    def __init__(self, app):
+        self.app = app
+        self.endpoint = None
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.endpoint = getattr(scope.get("route"), "endpoint", None)
+
+
+async def run_phase(phase: str, recorder, logs, client, headers, checks, replica_expected: bool) -> int:
+    from backend.db.replicas import is_read_only
+
+    primary_log, replica_log = logs
+    failures = 0
+    for method, path, role, body in checks:
+        if phase != "routed" and (method, path) not in checks.read_only:
+            continue
+
+        primary_log.statements.clear()
+        replica_log.statements.clear()
+        response = await client.request(method, path, headers=headers[role], json=body)
+        read_only = is_read_only(recorder.endpoint)
+        if read_only:
+            checks.read_only.add((method, path))
+        primary = [statement for statement in primary_log.statements if not USER_LOOKUP.search(statement)]
+        replica = replica_log.statements
+
+        problems = []
+        if response.status_code >= 400:
+            problems.append(f"status {response.status_code}")
+        if (method, path) in EXPECTED_READ_ONLY and not read_only:
+            problems.append("listing not marked read_only")
+        if read_only and replica_expected:
+            if not replica:
+                problems.append("nothing read from the replica")
+            if primary:
+                problems.append(f"{len(primary)} statement(s) on the primary")
+        elif replica:
+            problems.append(f"{len(replica)} statement(s) on the replica")
+
+        failures += bool(problems)
+        where = "replica" if replica else "primary"
+        detail = "; ".join(problems) or f"{'read-only' if read_only else 'primary'} endpoint served by the {where}"
+        print(f"{'FAIL' if problems else 'ok  '} [{phase}] {method} {path}: {detail}")
+    return failures
+
+
+async def run(user_id: int, replica_path: str) -> int:
+    from sqlalchemy import event, select
+
+    from backend.db.database import AsyncSessionLocal, get_async_engine, get_replica_engines
+    from backend.db.replicas import replicas
+    from backend.main import app
+    from backend.models.health_record import HealthRecord
+
+    async with AsyncSessionLocal() as db:
+        record_ids = (await db.scalars(
+            select(HealthRecord.id).where(HealthRecord.user_id == user_id).order_by(HealthRecord.id).limit(2)
+        )).all()
+
+    (replica,) = get_replica_engines()
+    logs = (StatementLog(), StatementLog())
+    event.listen(get_async_engine().sync_engine, "before_cursor_execute", logs[0])
+    event.listen(replica.sync_engine, "before_cursor_execute", logs[1])
+
+    checks = Checks(check for check in requests_to_check(user_id, record_ids)
+                    if check[2] is not None and not check[1].endswith("/logout"))
+    recorder = RecordRoute(app)
+    failures = 0
+    async with make_client(recorder) as client:
+        headers = {}
+        for role, email in (("user", BENCH_USER_EMAIL), ("admin", BENCH_ADMIN_EMAIL)):
+            response = await client.post("/api/v1/auth/login-json", json={"email": email, "password": BENCH_PASSWORD})
+            response.raise_for_status()
+            headers[role] = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        failures += await run_phase("routed", recorder, logs, client, headers, checks, replica_expected=True)
+
+        # Take the replica away: new connections to it fail
+        os.rename(replica_path, replica_path + ".away")
+        await replica.dispose()
+        failures += await run_phase("failover", recorder, logs, client, headers, checks, replica_expected=False)
+        if replicas.stats()["primary_fallbacks"] == 0:
+            print("FAIL no read-only request fell back to the primary")
+            failures += 1
+
+        os.rename(replica_path + ".away", replica_path)
+        time.sleep(RETRY_SECONDS)
+        failures += await run_phase("recovered", recorder, logs, client, headers, checks, replica_expected=True)
+
+    print(replicas.stats())
+    await get_async_engine().dispose()
+    await replica.dispose()
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read replica routing check")
+    parser.add_argument("--records", type=int, default=50, help="Health records per user")
+    args = parser.parse_args()
+
+    primary_url = use_bench_database("hpn_mec_bench_replica_routing.db")
+    replica_path = os.path.join(tempfile.gettempdir(), "hpn_mec_bench_replica_routing_replica.db")
+    os.environ["DATABASE_REPLICA_URLS"] = f"sqlite:///file:{replica_path}?mode=ro&uri=true"
+    os.environ["DATABASE_REPLICA_RETRY_SECONDS"] = str(RETRY_SECONDS)
+
+    create_schema()
+    user_id = create_bench_user(BENCH_USER_EMAIL)
+    create_bench_user(BENCH_ADMIN_EMAIL, role="admin")
+    seed_health_records([user_id], args.records)
+
+    from backend.db.database import get_engine
+    get_engine().dispose()
+    shutil.copyfile(primary_url[len("sqlite:///"):], replica_path)
+
+    failures = asyncio.run(run(user_id, replica_path))
+    print(f"{failures} request(s) violating the replica routing rules")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
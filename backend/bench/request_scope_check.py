@@ -0,0 +1,146 @@
+"""
+Request-scoped session check.
+
+Sends the authenticated requests of ``query_budget_check.py`` to the
+in-process app against a seeded database, with the principal cache cleared
+before each one so authentication has to read the user. For every request
+it counts:
+
+- connection checkouts from the async engine's pool, and the most
+  connections the request held at once
+- lookups of the authenticated user (``SELECT ... FROM users`` by that
+  user's id)
+
+Each request must check out exactly one connection and look the user up
+exactly once. Streamed exports are the exception to the first rule: the
+stream reads through its own session after the request's session has
+returned its connection, so they check out two, one at a time. Imports
+commit once per batch and once more for the activity entry, so they check
+out one connection per batch plus one, also one at a time.
+
+Prints one line per request and exits with status 1 on any violation.
+Meant to run in CI.
+
+Usage:
+    python -m backend.bench.request_scope_check --records 50
+"""
+import argparse
+import asyncio
+import re
+import sys
+
+from backend.bench.common import (
+    BENCH_ADMIN_EMAIL, BENCH_PASSWORD, BENCH_USER_EMAIL, create_bench_user, create_schema,
+    make_client, seed_health_records, use_bench_database,
+)
+from backend.bench.query_budget_check import requests_to_check
+
+USER_LOOKUP = re.compile(r"\bFROM users\b.*\bWHERE users\.id = ", re.DOTALL)
+
+
+class Counters:
+    """Pool and statement counters of the request in flight"""
+
+    def __init__(self):
+        self.reset(None)
+
+    def reset(self, user_id):
+        self.user_id = user_id
+        self.checkouts = 0
+        self.held = 0
+        self.peak = 0
+        self.user_lookups = 0
+
+    def checkout(self, *args):
+        self.checkouts += 1
+        self.held += 1
+        self.peak = max(self.peak, self.held)
+
+    def checkin(self, *args):
+        self.held -= 1
+
+    def statement(self, conn, cursor, statement, parameters, context, executemany):
+        if USER_LOOKUP.search(statement) and self.user_id in (parameters or ()):
+            self.user_lookups += 1
+
+
+async def run(user_id: int, admin_id: int) -> int:
+    from sqlalchemy import event, select
+
+    from backend.db.database import AsyncSessionLocal, get_async_engine
+    from backend.main import app
+    from backend.models.health_record import HealthRecord
+    from backend.services.principal_cache import principal_cache
+    from backend.services.record_export import EXPORT_MEDIA_TYPES
+
+    engine = get_async_engine().sync_engine
+    async with AsyncSessionLocal() as db:
+        record_ids = (await db.scalars(
+            select(HealthRecord.id).where(HealthRecord.user_id == user_id).order_by(HealthRecord.id).limit(2)
+        )).all()
+
+    counters = Counters()
+    event.listen(engine.pool, "checkout", counters.checkout)
+    event.listen(engine.pool, "checkin", counters.checkin)
+    event.listen(engine, "before_cursor_execute", counters.statement)
+
+    failures = 0
+    async with make_client(app) as client:
+        headers = {}
+        for role, email in (("user", BENCH_USER_EMAIL), ("admin", BENCH_ADMIN_EMAIL)):
+            response = await client.post("/api/v1/auth/login-json", json={"email": email, "password": BENCH_PASSWORD})
+            response.raise_for_status()
+            headers[role] = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        for method, path, role, body in requests_to_check(user_id, record_ids):
+            # Logout only revokes the token, without touching the database
+            if role is None or path.endswith("/logout"):
+                continue
+
+            principal_cache.clear()
+            counters.reset(user_id if role == "user" else admin_id)
+            response = await client.request(method, path, headers=headers[role], json=body)
+
+            streamed = response.headers.get("content-type", "").split(";")[0] in EXPORT_MEDIA_TYPES.values()
+            expected_checkouts = 2 if streamed else 1
+            if path.endswith("/import") and response.status_code < 400:
+                expected_checkouts = response.json()["stats"]["batches"] + 1
+            problems = []
+            if response.status_code >= 400:
+                problems.append(f"status {response.status_code}")
+            if counters.checkouts != expected_checkouts:
+                problems.append(f"{counters.checkouts} checkouts, expected {expected_checkouts}")
+            if counters.peak != 1:
+                problems.append(f"held {counters.peak} connections at once")
+            if counters.user_lookups != 1:
+                problems.append(f"looked the user up {counters.user_lookups} times")
+
+            failures += bool(problems)
+            detail = "; ".join(problems) or (
+                f"{counters.checkouts} checkout(s), {counters.user_lookups} user lookup"
+            )
+            print(f"{'FAIL' if problems else 'ok  '} {method} {path}: {detail}")
+
+    await get_async_engine().dispose()
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Request-scoped session check")
+    parser.add_argument("--records", type=int, default=50, help="Health records per user")
+    args = parser.parse_args()
+
+    use_bench_database("hpn_mec_bench_request_scope.db")
+    create_schema()
+    user_id = create_bench_user(BENCH_USER_EMAIL)
+    other_id = create_bench_user("bench.other@example.com")
+    admin_id = create_bench_user(BENCH_ADMIN_EMAIL, role="admin")
+    seed_health_records([user_id, other_id], args.records * 2)
+
+    failures = asyncio.run(run(user_id, admin_id))
+    print(f"{failures} request(s) violating the one checkout / one user lookup rule")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
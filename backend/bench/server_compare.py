@@ -0,0 +1,148 @@
+"""
+Production launcher vs development runner benchmark.
+
+Serves the app on a local port in two ways and drives the same scenarios
+against each over HTTP:
+
+- ``dev``: ``uvicorn backend.main:app --reload``, what ``python -m
+  backend.main`` runs: one worker process under a file-watching reloader
+- ``serve``: ``python -m backend.serve``, i.e. gunicorn (or ``uvicorn
+  --workers``) with one worker per CPU unless ``--workers`` is given,
+  uvloop/httptools when installed, tuned keep-alive and backlog
+
+Load comes from ``--client-processes`` processes with ``--concurrency``
+connections in total, so the client is not the bottleneck of a multi-worker
+server. Scenarios are those of ``load_test.py``. Reports throughput,
+p50/p95/p99 latency and errors per variant and scenario, and the throughput
+ratio of ``serve`` over ``dev``.
+
+Usage:
+    python -m backend.bench.server_compare --scenarios list create --concurrency 64 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from backend.bench.common import (
+    BENCH_ADMIN_EMAIL, create_bench_user, create_schema, seed_health_records, seed_users,
+    summarize, use_bench_database,
+)
+from backend.bench.load_test import SCENARIOS, TOKEN_USERS, Context, login, request, serve_command
+
+VARIANTS = ["dev", "serve"]
+
+
+def server_command(variant: str, workers: int) -> list:
+    if variant == "dev":
+        return [sys.executable, "-m", "uvicorn", "backend.main:app", "--reload",
+                "--host", "127.0.0.1", "--port", "{port}", "--log-level", "warning"]
+    command = [sys.executable, "-m", "backend.serve", "--host", "127.0.0.1", "--port", "{port}"]
+    return command + (["--workers", str(workers)] if workers else [])
+
+
+async def drive(base_url: str, ctx: Context, scenario: str, concurrency: int, duration: float) -> tuple:
+    import httpx
+
+    latencies, statuses = [], {}
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        async def worker():
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    response = await request(client, ctx, scenario)
+                    status = response.status_code
+                except httpx.TransportError:
+                    status = 599
+                statuses[status] = statuses.get(status, 0) + 1
+                if status < 400:
+                    latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, statuses
+
+
+def client_process(args: tuple) -> tuple:
+    base_url, ctx, scenario, concurrency, duration = args
+    return asyncio.run(drive(base_url, ctx, scenario, concurrency, duration))
+
+
+def run_clients(base_url: str, ctx: Context, scenario: str, args) -> dict:
+    per_process = max(1, args.concurrency // args.client_processes)
+    jobs = [(base_url, ctx, scenario, per_process, args.duration)] * args.client_processes
+    started = time.perf_counter()
+    with multiprocessing.Pool(args.client_processes) as pool:
+        outcomes = pool.map(client_process, jobs)
+    elapsed = time.perf_counter() - started
+
+    latencies, statuses = [], {}
+    for process_latencies, process_statuses in outcomes:
+        latencies += process_latencies
+        for status, count in process_statuses.items():
+            statuses[status] = statuses.get(status, 0) + count
+    return {
+        **summarize(latencies, elapsed),
+        "errors": sum(count for status, count in statuses.items() if status >= 400),
+    }
+
+
+async def run_variant(variant: str, user_ids: list, args) -> dict:
+    results = {}
+    async with serve_command(server_command(variant, args.workers)) as client:
+        user_tokens = [await login(client, f"bench{user_id}@example.com") for user_id in user_ids[:TOKEN_USERS]]
+        ctx = Context(user_ids, user_tokens, await login(client, BENCH_ADMIN_EMAIL), args.import_rows)
+        base_url = str(client.base_url)
+        warmup = argparse.Namespace(**{**vars(args), "duration": 1.0})
+
+        for scenario in args.scenarios:
+            # Warm up the workers' caches and pools
+            await asyncio.to_thread(run_clients, base_url, ctx, scenario, warmup)
+            results[scenario] = await asyncio.to_thread(run_clients, base_url, ctx, scenario, args)
+            print(f"{variant:<6} {scenario:<10} rps={results[scenario]['per_second']:<9} "
+                  f"p99={results[scenario]['p99_ms']}ms errors={results[scenario]['errors']}", file=sys.stderr)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Production launcher vs development runner benchmark")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=["list", "create"])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--records", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=64, help="Connections in total")
+    parser.add_argument("--client-processes", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per scenario")
+    parser.add_argument("--workers", type=int, default=0, help="Workers for serve (default: one per CPU)")
+    parser.add_argument("--import-rows", type=int, default=100, help="Rows per import request")
+    args = parser.parse_args()
+
+    use_bench_database("hpn_mec_bench_server_compare.db")
+    create_schema()
+    user_ids = seed_users(args.users)
+    seed_health_records(user_ids, args.records)
+    create_bench_user(BENCH_ADMIN_EMAIL, role="admin")
+
+    from backend.rollup import rebuild_rollups
+    rebuild_rollups()
+
+    results = {variant: asyncio.run(run_variant(variant, user_ids, args)) for variant in VARIANTS}
+    ratios = {
+        scenario: round(results["serve"][scenario]["per_second"] / results["dev"][scenario]["per_second"], 2)
+        for scenario in args.scenarios
+        if results["dev"][scenario].get("per_second")
+    }
+    print(json.dumps({
+        "benchmark": "server_compare",
+        "cpus": os.cpu_count(),
+        "concurrency": args.concurrency,
+        "results": results,
+        "serve_over_dev": ratios,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
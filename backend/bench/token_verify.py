@@ -0,0 +1,85 @@
+"""
+Access token verification microbenchmark.
+
+Creates ``--tokens`` distinct access tokens and decodes them round-robin
+``--decodes`` times per variant, without the app or a database:
+
+- ``jose`` / ``pyjwt``: ``verify_access_token`` with that library, i.e. a
+  signature check and claim parsing on every call
+- ``jose_cached`` / ``pyjwt_cached``: ``decode_access_token`` with
+  ``JWT_BACKEND`` set to that library and a warm token cache, the path every
+  authenticated request takes
+
+Reports decodes per second, mean microseconds per decode and the speedup
+over uncached python-jose. PyJWT variants are skipped when it is not
+installed.
+
+Usage:
+    python -m backend.bench.token_verify --tokens 1000 --decodes 200000
+"""
+import argparse
+import json
+import time
+
+VARIANTS = ["jose", "pyjwt", "jose_cached", "pyjwt_cached"]
+
+
+def time_decodes(decode, tokens: list, count: int) -> float:
+    started = time.perf_counter()
+    for i in range(count):
+        decode(tokens[i % len(tokens)])
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Access token verification microbenchmark")
+    parser.add_argument("--tokens", type=int, default=1000, help="Distinct tokens presented")
+    parser.add_argument("--decodes", type=int, default=200_000, help="Decodes per variant")
+    args = parser.parse_args()
+
+    from backend.core.config import settings
+    from backend.utils import security
+
+    tokens = [security.create_access_token(user_id) for user_id in range(1, args.tokens + 1)]
+    # Room for every token, so the cached variants measure hits only
+    security.token_cache.max_entries = max(security.token_cache.max_entries, args.tokens)
+
+    results = []
+    for variant in VARIANTS:
+        backend, _, cached = variant.partition("_")
+        if backend == "pyjwt" and security.pyjwt is None:
+            results.append({"variant": variant, "skipped": "PyJWT is not installed"})
+            continue
+
+        if cached:
+            settings.JWT_BACKEND = backend
+            security.token_cache.clear()
+            decode = security.decode_access_token
+        else:
+            def decode(token, backend=backend):
+                return security.verify_access_token(token, backend)
+
+        # Warm up (and fill the cache)
+        time_decodes(decode, tokens, len(tokens))
+        elapsed = time_decodes(decode, tokens, args.decodes)
+        results.append({
+            "variant": variant,
+            "decodes_per_second": round(args.decodes / elapsed),
+            "mean_us": round(elapsed / args.decodes * 1_000_000, 2),
+        })
+
+    baseline = results[0]["decodes_per_second"]
+    for result in results:
+        if "decodes_per_second" in result:
+            result["speedup"] = round(result["decodes_per_second"] / baseline, 1)
+
+    print(json.dumps({
+        "benchmark": "token_verify",
+        "tokens": args.tokens,
+        "cache": security.token_cache.stats(),
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Post-commit refresh benchmark.
+
+Write endpoints used to call ``db.refresh()`` after ``commit()``, one more
+SELECT for values the session already held. This benchmark drives
+``POST /health-records/`` and ``PUT /health-records/{id}`` with
+``--concurrency`` clients for ``--duration`` seconds in two variants,
+alternating in rounds:
+
+- ``refresh``: ``AsyncSession.commit`` is patched to refresh every health
+  record and user in the session afterwards, as the endpoints did
+- ``no_refresh``: the endpoints as they are
+
+Reports writes per second, p50/p99 latency and SQL statements per request
+for each variant. Registration is left out: password hashing dominates it.
+A local SQLite file answers a SELECT in microseconds, so the gain grows with
+the database round trip; use ``BENCH_DATABASE_URL`` to measure MySQL.
+
+Usage:
+    python -m backend.bench.write_refresh --concurrency 16 --duration 5 --rounds 3
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from contextlib import contextmanager
+
+from backend.bench.common import (
+    BENCH_PASSWORD, BENCH_USER_EMAIL, create_bench_user, create_schema, make_client,
+    seed_health_records, summarize, use_bench_database,
+)
+
+RECORDS = "/api/v1/health-records"
+SCENARIOS = ["create", "update"]
+VARIANTS = ["refresh", "no_refresh"]
+
+
+@contextmanager
+def refresh_after_commit():
+    """Restore the old behaviour: refresh the written objects after each commit"""
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    from backend.models.health_record import HealthRecord
+    from backend.models.user import User
+
+    commit = AsyncSession.commit
+
+    async def commit_and_refresh(self):
+        written = [obj for obj in self.identity_map.values() if isinstance(obj, (HealthRecord, User))]
+        await commit(self)
+        for obj in written:
+            await self.refresh(obj)
+
+    AsyncSession.commit = commit_and_refresh
+    try:
+        yield
+    finally:
+        AsyncSession.commit = commit
+
+
+def random_reading(rng: random.Random) -> dict:
+    return {
+        "height": round(150 + rng.random() * 40, 1),
+        "weight": round(45 + rng.random() * 60, 1),
+        "heart_rate": rng.randint(45, 130),
+        "blood_pressure_systolic": rng.randint(95, 185),
+        "blood_pressure_diastolic": rng.randint(55, 94),
+    }
+
+
+async def run_scenario(client, headers: dict, scenario: str, record_ids: list,
+                       concurrency: int, duration: float) -> tuple:
+    from backend.core.query_budget import QUERY_COUNT_HEADER
+
+    rng = random.Random(3)
+    latencies, statements = [], []
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            if scenario == "create":
+                response = await client.post(f"{RECORDS}/", json=random_reading(rng), headers=headers)
+            else:
+                record_id = rng.choice(record_ids)
+                response = await client.put(f"{RECORDS}/{record_id}", json={"weight": round(50 + rng.random() * 40, 1)},
+                                            headers=headers)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+            statements.append(int(response.headers[QUERY_COUNT_HEADER]))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, statements, time.perf_counter() - started
+
+
+async def run(args, user_id: int) -> list:
+    from sqlalchemy import select
+
+    from backend.db.database import AsyncSessionLocal, async_engine
+    from backend.main import app
+    from backend.models.health_record import HealthRecord
+
+    async with AsyncSessionLocal() as db:
+        record_ids = (await db.scalars(select(HealthRecord.id).where(HealthRecord.user_id == user_id))).all()
+
+    results = []
+    async with make_client(app) as client:
+        response = await client.post(
+            "/api/v1/auth/login-json", json={"email": BENCH_USER_EMAIL, "password": BENCH_PASSWORD}
+        )
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        for scenario in SCENARIOS:
+            samples = {variant: ([], [], 0.0) for variant in VARIANTS}
+            for _ in range(args.rounds):
+                for variant in VARIANTS:
+                    if variant == "refresh":
+                        with refresh_after_commit():
+                            measured = await run_scenario(client, headers, scenario, record_ids,
+                                                          args.concurrency, args.duration)
+                    else:
+                        measured = await run_scenario(client, headers, scenario, record_ids,
+                                                      args.concurrency, args.duration)
+                    latencies, statements, elapsed = samples[variant]
+                    samples[variant] = (latencies + measured[0], statements + measured[1], elapsed + measured[2])
+
+            per_second = {}
+            for variant, (latencies, statements, elapsed) in samples.items():
+                summary = summarize(latencies, elapsed)
+                per_second[variant] = summary["per_second"]
+                results.append({
+                    "scenario": scenario,
+                    "variant": variant,
+                    "writes_per_second": summary["per_second"],
+                    "p50_ms": summary["p50_ms"],
+                    "p99_ms": summary["p99_ms"],
+                    "statements_per_request": round(sum(statements) / len(statements), 2),
+                })
+            results[-1]["gain_pct"] = round((per_second["no_refresh"] - per_second["refresh"]) / per_second["refresh"] * 100, 1)
+
+    await async_engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Post-commit refresh benchmark")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per variant and round")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--records", type=int, default=1000)
+    args = parser.parse_args()
+
+    # The statement count is reported in a response header
+    os.environ["QUERY_BUDGET_MODE"] = "log"
+
+    use_bench_database("hpn_mec_bench_write_refresh.db")
+    create_schema()
+    user_id = create_bench_user(BENCH_USER_EMAIL)
+    seed_health_records([user_id], args.records)
+
+    results = asyncio.run(run(args, user_id))
+    print(json.dumps({"benchmark": "write_refresh", "concurrency": args.concurrency, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,398 @@
+"""
+Prometheus-style request metrics.
+
+``MetricsMiddleware`` is a pure ASGI middleware that records, per route
+template (e.g. ``/api/v1/health-records/{record_id}``, never the raw path):
+
+- ``http_requests_total``: requests by method, route and status
+- ``http_request_duration_seconds``: latency histogram, up to the last body byte
+- ``http_requests_in_flight``: requests currently being served, by method
+- ``http_response_size_bytes``: response body size histogram
+- ``http_request_db_seconds`` / ``http_request_db_queries``: time spent in
+  SQL statements and number of statements per request, measured with
+  ``before_cursor_execute`` / ``after_cursor_execute`` on the engines passed
+  to ``instrument_engine``
+
+Per-request DB time is collected in a context variable, so statements run
+by concurrent requests are never mixed up. Connection pool gauges of the
+API engines are read at scrape time.
+
+``render`` returns everything in the Prometheus text exposition format for
+the ``/metrics`` endpoint. The registry is a handful of dicts and bisects,
+cheap enough to run permanently (see ``bench/metrics_overhead.py``).
+
+The registry is per process. With several workers a scrape reaches one of
+them, so each worker also writes a snapshot of its registry and pool stats
+to a shared directory (``METRICS_MULTIPROCESS_DIR``, see ``run_metrics_flush``)
+and ``render`` adds up its own live values and the other workers' latest
+snapshots. Snapshots of exited workers are kept, so counters never go back.
+"""
+import asyncio
+import contextvars
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+# Histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Label used for requests that matched no route, to bound cardinality
+UNMATCHED_ROUTE = "unmatched"
+
+Labels = Tuple[str, ...]
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels, amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def dump(self) -> list:
+        return [[list(labels), value] for labels, value in self.values.items()]
+
+    def merge(self, dumped: list) -> None:
+        for labels, value in dumped:
+            self.inc(tuple(labels), value)
+
+    def collect(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    def dec(self, labels: Labels, amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) - amount
+
+    def collect(self) -> List[str]:
+        lines = super().collect()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # labels -> [count per bucket (+Inf last), sum]
+        self.values: Dict[Labels, list] = {}
+
+    def observe(self, labels: Labels, value: float) -> None:
+        entry = self.values.get(labels)
+        if entry is None:
+            entry = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+
+    def dump(self) -> list:
+        return [[list(labels), list(counts), total] for labels, (counts, total) in self.values.items()]
+
+    def merge(self, dumped: list) -> None:
+        for labels, counts, total in dumped:
+            entry = self.values.setdefault(tuple(labels), [[0] * (len(self.buckets) + 1), 0.0])
+            entry[0] = [mine + theirs for mine, theirs in zip(entry[0], counts)]
+            entry[1] += total
+
+    def collect(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        bucket_names = (*self.label_names, "le")
+        for labels, (counts, total) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                le = bound if bound == "+Inf" else _format_value(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(bucket_names, (*labels, le))} {cumulative}")
+            label_text = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+def _format_labels(names: Sequence[str], values: Iterable) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+class MetricsRegistry:
+    """
+    The metrics recorded by ``MetricsMiddleware``
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        route = ("method", "route")
+        self.requests = Counter("http_requests_total", "HTTP requests served.", (*route, "status"))
+        self.duration = Histogram(
+            "http_request_duration_seconds", "HTTP request latency, up to the last body byte.", route, LATENCY_BUCKETS
+        )
+        # Labelled by method only: the route is not known until routing ran
+        self.in_flight = Gauge("http_requests_in_flight", "HTTP requests currently being served.", ("method",))
+        self.response_size = Histogram(
+            "http_response_size_bytes", "HTTP response body size.", route, SIZE_BUCKETS
+        )
+        self.db_time = Histogram(
+            "http_request_db_seconds", "Time spent in SQL statements per HTTP request.", route, LATENCY_BUCKETS
+        )
+        self.db_queries = Histogram(
+            "http_request_db_queries", "SQL statements executed per HTTP request.", route, QUERY_BUCKETS
+        )
+
+    def metrics(self) -> tuple:
+        return (self.requests, self.duration, self.in_flight, self.response_size, self.db_time, self.db_queries)
+
+    def collect(self) -> List[str]:
+        with self.lock:
+            lines = []
+            for metric in self.metrics():
+                lines.extend(metric.collect())
+            return lines
+
+    def snapshot(self) -> Dict[str, list]:
+        """Values of every metric by name, JSON-serializable"""
+        with self.lock:
+            return {metric.name: metric.dump() for metric in self.metrics()}
+
+    def merge(self, snapshot: Dict[str, list]) -> None:
+        """Add the values of a ``snapshot`` (of another process) to this registry"""
+        with self.lock:
+            for metric in self.metrics():
+                metric.merge(snapshot.get(metric.name, []))
+
+
+# Shared registry
+registry = MetricsRegistry()
+
+
+class RequestStats:
+    """SQL activity of the current request"""
+
+    __slots__ = ("db_seconds", "db_queries")
+
+    def __init__(self):
+        self.db_seconds = 0.0
+        self.db_queries = 0
+
+
+# Stats of the request being served in the current context
+current_request: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar(
+    "metrics_current_request", default=None
+)
+
+
+def route_label(scope) -> str:
+    """Route template of the matched route, so paths with ids share a label"""
+    path_format = getattr(scope.get("route"), "path_format", None)
+    if path_format is None:
+        return UNMATCHED_ROUTE
+
+    # Routes of an included router may report their path without the
+    # router's prefix; take the prefix from the request path
+    suffix = path_format
+    for name, value in scope.get("path_params", {}).items():
+        suffix = suffix.replace("{" + name + "}", str(value))
+    path = scope.get("path", "")
+    if suffix != path and path.endswith(suffix):
+        return path[:len(path) - len(suffix)] + path_format
+    return path_format
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware feeding ``registry``. Body chunks are passed through
+    untouched, only their sizes are counted.
+    """
+
+    def __init__(self, app, registry: MetricsRegistry = registry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        registry = self.registry
+        method = scope["method"]
+        stats = RequestStats()
+        token = current_request.set(stats)
+        response = {"status": 500, "bytes": 0}
+        with registry.lock:
+            registry.in_flight.inc((method,))
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response["bytes"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            current_request.reset(token)
+            # Routing has filled in scope["route"] by now
+            labels = (method, route_label(scope))
+            with registry.lock:
+                registry.in_flight.dec((method,))
+                registry.requests.inc((*labels, str(response["status"])))
+                registry.duration.observe(labels, elapsed)
+                registry.response_size.observe(labels, response["bytes"])
+                registry.db_time.observe(labels, stats.db_seconds)
+                registry.db_queries.observe(labels, stats.db_queries)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_request.get() is not None:
+        conn.info.setdefault("metrics_query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_request.get()
+    if stats is None:
+        return
+    started = conn.info.get("metrics_query_started")
+    if started:
+        stats.db_seconds += time.perf_counter() - started.pop()
+        stats.db_queries += 1
+
+
+def instrument_engine(engine) -> None:
+    """
+    Attribute the time of every statement run on ``engine`` (a sync Engine,
+    e.g. ``async_engine.sync_engine``) to the current request
+    """
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _pool_stats(engines: Optional[Dict[str, object]]) -> Dict[str, dict]:
+    from backend.db.pool import pool_stats
+
+    return {name: pool_stats(engine) for name, engine in (engines or {}).items()}
+
+
+def _pool_lines(stats: Dict[str, dict]) -> List[str]:
+    gauges = [
+        ("db_pool_connections_in_use", "Connections checked out of the pool.", "gauge", "checked_out"),
+        ("db_pool_overflow", "Connections open beyond the pool size.", "gauge", "overflow"),
+        ("db_pool_checkouts_total", "Connections checked out of the pool.", "counter", "checkouts"),
+        ("db_pool_checkout_timeouts_total", "Checkouts that timed out waiting for a connection.", "counter", "timeouts"),
+    ]
+    lines = []
+    for metric, documentation, kind, key in gauges:
+        samples = [(name, values[key]) for name, values in stats.items() if key in values]
+        if not samples:
+            continue
+        lines += [f"# HELP {metric} {documentation}", f"# TYPE {metric} {kind}"]
+        lines += [f'{metric}{{engine="{name}"}} {value}' for name, value in samples]
+    return lines
+
+
+# (pid, snapshot file name) of this process; workers forked from a master
+# that imported this module must not share the name
+_snapshot_name = (None, None)
+
+
+def snapshot_file(directory: str) -> str:
+    """Path of this process's snapshot in ``directory``"""
+    global _snapshot_name
+    pid = os.getpid()
+    if _snapshot_name[0] != pid:
+        _snapshot_name = (pid, f"{pid}-{uuid.uuid4().hex[:8]}.json")
+    return os.path.join(directory, _snapshot_name[1])
+
+
+def write_snapshot(directory: str, engines: Optional[Dict[str, object]] = None) -> None:
+    """Write this process's metrics and pool stats to ``directory``"""
+    path = snapshot_file(directory)
+    with open(path + ".tmp", "w") as file:
+        json.dump({"metrics": registry.snapshot(), "pools": _pool_stats(engines)}, file)
+    # Readers never see a partial file
+    os.replace(path + ".tmp", path)
+
+
+async def run_metrics_flush(directory: str, interval: float, engines) -> None:
+    """
+    Call ``write_snapshot`` every ``interval`` seconds until cancelled
+
+    Args:
+        engines: Callable returning the engines whose pool stats to include
+    """
+    while True:
+        await asyncio.sleep(interval)
+        write_snapshot(directory, engines())
+
+
+def _other_snapshots(directory: str) -> List[dict]:
+    own = snapshot_file(directory)
+    snapshots = []
+    for path in glob.glob(os.path.join(directory, "*.json")):
+        if path == own:
+            continue
+        try:
+            with open(path) as file:
+                snapshots.append(json.load(file))
+        except (OSError, ValueError):
+            # Removed while listing
+            continue
+    return snapshots
+
+
+def render(engines: Optional[Dict[str, object]] = None, directory: Optional[str] = None) -> str:
+    """
+    All metrics in the Prometheus text exposition format
+
+    Args:
+        engines: Engines whose pool gauges to include, by label
+        directory: Shared snapshot directory; the other workers' snapshots
+            found there are added to this process's values
+    """
+    source = registry
+    pools = _pool_stats(engines)
+    if directory:
+        source = MetricsRegistry()
+        source.merge(registry.snapshot())
+        for snapshot in _other_snapshots(directory):
+            source.merge(snapshot.get("metrics", {}))
+            for name, stats in snapshot.get("pools", {}).items():
+                totals = pools.setdefault(name, {})
+                for key, value in stats.items():
+                    if isinstance(value, (int, float)):
+                        totals[key] = totals.get(key, 0) + value
+    lines = source.collect() + _pool_lines(pools)
+    return "\n".join(lines) + "\n"
+
+
+# Content type of ``render``'s output
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
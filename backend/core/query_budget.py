@@ -0,0 +1,172 @@
+"""
+Per-request SQL query counting and N+1 detection, for development and CI.
+
+``QueryBudgetMiddleware`` counts the statements every request runs (through
+``before_cursor_execute`` on the engines passed to ``count_queries``) and
+groups them by fingerprint: the statement with literals, placeholders and
+``IN`` lists normalized, so the same query with different ids is one
+fingerprint. Endpoints declare how many statements they may run with
+``@query_budget(max_queries=N)``.
+
+``QUERY_BUDGET_MODE`` selects what happens:
+
+- ``off``: nothing is counted, the default for production
+- ``log``: every response carries an ``X-Query-Count`` header; requests over
+  budget, or running one fingerprint ``N_PLUS_ONE_THRESHOLD`` times or more
+  (the shape of an N+1 lazy load), are logged with their fingerprints
+- ``enforce``: as ``log``, and a request over budget raises
+  ``QueryBudgetExceeded`` once its response is complete, so the test client
+  that sent it fails
+
+``bench/query_budget_check.py`` drives every budgeted endpoint in enforce
+mode and is meant to run in CI.
+"""
+import contextvars
+import logging
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Callable, Optional
+
+from sqlalchemy import event
+
+from backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Response header with the number of statements a request ran
+QUERY_COUNT_HEADER = "X-Query-Count"
+
+# Executions of one fingerprint in one request reported as a likely N+1
+N_PLUS_ONE_THRESHOLD = 5
+
+MODES = ("off", "log", "enforce")
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """Raised in enforce mode when a request ran more statements than its budget"""
+
+
+def query_budget(max_queries: int) -> Callable:
+    """
+    Declare the maximum number of SQL statements an endpoint may run,
+    dependencies (authentication included) counted
+
+    Apply below the route decorator::
+
+        @router.get("/")
+        @query_budget(max_queries=3)
+        async def read_items(...):
+    """
+    def decorator(endpoint: Callable) -> Callable:
+        endpoint.__query_budget__ = max_queries
+        return endpoint
+    return decorator
+
+
+def endpoint_budget(endpoint: Optional[Callable]) -> Optional[int]:
+    """Budget declared on ``endpoint``, or None"""
+    return getattr(endpoint, "__query_budget__", None)
+
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|%\(\w+\)s|%s|:\w+|\$\d+")
+_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACES = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def fingerprint(statement: str) -> str:
+    """``statement`` with literals and parameters replaced by ``?``"""
+    normalized = _LITERALS.sub("?", statement)
+    normalized = _LISTS.sub("(?...)", normalized)
+    return _SPACES.sub(" ", normalized).strip()
+
+
+class QueryLog:
+    """Statements run by one request, by fingerprint"""
+
+    __slots__ = ("count", "fingerprints")
+
+    def __init__(self):
+        self.count = 0
+        self.fingerprints = Counter()
+
+    def repeated(self):
+        """Fingerprints run ``N_PLUS_ONE_THRESHOLD`` times or more"""
+        return [(sql, times) for sql, times in self.fingerprints.items() if times >= N_PLUS_ONE_THRESHOLD]
+
+    def describe(self) -> str:
+        return "\n".join(f"  {times} x {sql}" for sql, times in self.fingerprints.most_common())
+
+
+# Statements of the request being served in the current context
+current_queries: contextvars.ContextVar[Optional[QueryLog]] = contextvars.ContextVar(
+    "query_budget_current", default=None
+)
+
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    log = current_queries.get()
+    if log is not None:
+        log.count += 1
+        log.fingerprints[fingerprint(statement)] += 1
+
+
+def count_queries(engine) -> None:
+    """
+    Count every statement run on ``engine`` (a sync Engine, e.g.
+    ``async_engine.sync_engine``) against the current request
+    """
+    if not event.contains(engine, "before_cursor_execute", _count_statement):
+        event.listen(engine, "before_cursor_execute", _count_statement)
+
+
+class QueryBudgetMiddleware:
+    """
+    Pure ASGI middleware checking requests against their endpoint's budget
+    """
+
+    def __init__(self, app, mode: Optional[str] = None):
+        self.app = app
+        self.mode = mode or settings.QUERY_BUDGET_MODE
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.mode not in ("log", "enforce"):
+            await self.app(scope, receive, send)
+            return
+
+        log = QueryLog()
+        token = current_queries.set(log)
+
+        async def send_wrapper(message):
+            # Statements after this point (e.g. of a streamed body) are still
+            # counted against the budget, just not in the header
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((QUERY_COUNT_HEADER.lower().encode(), str(log.count).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_queries.reset(token)
+
+        route = scope.get("route")
+        budget = endpoint_budget(getattr(route, "endpoint", None))
+        target = f"{scope['method']} {scope['path']}"
+
+        repeated = log.repeated()
+        if repeated:
+            logger.warning(
+                "%s ran %d statements, repeated fingerprints suggest an N+1 query:\n%s",
+                target, log.count, log.describe(),
+            )
+
+        if budget is not None and log.count > budget:
+            message = f"{target} ran {log.count} SQL statements, budget is {budget}:\n{log.describe()}"
+            if self.mode == "enforce":
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        else:
+            logger.debug("%s ran %d statements", target, log.count)
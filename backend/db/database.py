@@ -1,26 +1,196 @@
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from backend.core.config import settings
+from backend.db.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool
+
+# Sync drivers mapped to their asyncio counterparts
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "mysql+mysqldb": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
+
+def get_async_database_url(database_url: str) -> str:
+    """
+    Derive the asyncio driver URL from a sync database URL
+    (e.g. mysql+pymysql:// -> mysql+aiomysql://)
+    """
+    url = make_url(database_url)
+    async_driver = ASYNC_DRIVERS.get(url.drivername)
+    if async_driver is None:
+        # Already an async driver or unknown, use as is
+        return database_url
+    return url.set(drivername=async_driver).render_as_string(hide_password=False)
+
+def is_memory_database(database_url: str) -> bool:
+    """
+    Whether the URL points at an in-memory SQLite database
+    """
+    url = make_url(database_url)
+    return url.get_backend_name() == "sqlite" and (
+        url.database in (None, "", ":memory:") or url.query.get("mode") == "memory"
+    )
+
+def pool_options(database_url: str, poolclass) -> dict:
+    """
+    Engine keyword arguments for the connection pool configured in settings.
+    In-memory SQLite keeps SQLAlchemy's default single-connection pool.
+    """
+    if is_memory_database(database_url):
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+# Async driver URL used by the API
+ASYNC_DATABASE_URL = settings.ASYNC_DATABASE_URL or get_async_database_url(settings.DATABASE_URL)
+
+# Session info key of the replica engine a read-only request reads from (see db/replicas.py)
+REPLICA_KEY = "replica"
+
+class RoutingSession(Session):
+    """
+    Session that reads from the replica engine in ``info[REPLICA_KEY]``, when
+    one is set. Flushes, INSERT/UPDATE/DELETE statements and calls passing
+    ``bind_arguments={"primary": True}`` always go to the primary.
+    """
+    def get_bind(self, mapper=None, *, clause=None, primary: bool = False, **kw):
+        replica = self.info.get(REPLICA_KEY)
+        if replica is not None and not primary and not self._flushing and not getattr(clause, "is_dml", False):
+            return replica.sync_engine
+        return super().get_bind(mapper, clause=clause, **kw)
 
-# SQLAlchemy engine with specified connection URL
-engine = create_engine(
-    settings.DATABASE_URL,
-    echo=False,  # Set to False in production
-    pool_pre_ping=True,  # Check connection before using it
-    pool_recycle=3600,   # Recycle connections every hour
-)
+# Engines and their session factories are created on first use, so importing
+# the app (or tooling that imports it) never touches the database. Access them
+# as module attributes (``engine``, ``async_engine``, ``SessionLocal``,
+# ``AsyncSessionLocal``) or through ``get_engine`` / ``get_async_engine``.
+_engine: Optional[Engine] = None
+_async_engine: Optional[AsyncEngine] = None
+_replica_engines: Optional[List[AsyncEngine]] = None
+_engine_callbacks: List[Callable[[Engine], None]] = []
+_lock = threading.Lock()
 
-# Create SessionLocal class for database sessions
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def on_engine_created(callback: Callable[[Engine], None]) -> None:
+    """
+    Run ``callback`` with every engine's sync ``Engine`` (for the async
+    engine, its ``sync_engine``) when it is created, e.g. to attach event
+    listeners. Engines that already exist get it right away.
+    """
+    with _lock:
+        _engine_callbacks.append(callback)
+        created = [value for value in (_engine, _async_engine and _async_engine.sync_engine) if value is not None]
+        created += [replica.sync_engine for replica in _replica_engines or []]
+    for sync_engine in created:
+        callback(sync_engine)
+
+def get_engine() -> Engine:
+    """
+    Sync engine used by scripts and migrations, created on first call
+    """
+    global _engine, engine, SessionLocal
+    if _engine is None:
+        with _lock:
+            if _engine is None:
+                new_engine = create_engine(
+                    settings.DATABASE_URL,
+                    echo=False,  # Set to False in production
+                    **pool_options(settings.DATABASE_URL, InstrumentedQueuePool),
+                )
+                for callback in _engine_callbacks:
+                    callback(new_engine)
+                # Create SessionLocal class for database sessions
+                SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=new_engine)
+                engine = _engine = new_engine
+    return _engine
+
+def get_async_engine() -> AsyncEngine:
+    """
+    Async engine used by the API endpoints, created on first call
+    """
+    global _async_engine, async_engine, AsyncSessionLocal
+    if _async_engine is None:
+        with _lock:
+            if _async_engine is None:
+                new_engine = create_async_engine(
+                    ASYNC_DATABASE_URL,
+                    echo=False,
+                    **pool_options(ASYNC_DATABASE_URL, InstrumentedAsyncQueuePool),
+                )
+                for callback in _engine_callbacks:
+                    callback(new_engine.sync_engine)
+                # Async sessions keep loaded attributes after commit to avoid implicit IO
+                AsyncSessionLocal = async_sessionmaker(
+                    bind=new_engine,
+                    class_=AsyncSession,
+                    sync_session_class=RoutingSession,
+                    autoflush=False,
+                    expire_on_commit=False,
+                )
+                async_engine = _async_engine = new_engine
+    return _async_engine
+
+def replica_database_urls() -> List[str]:
+    """
+    The read replica URLs configured in ``DATABASE_REPLICA_URLS``
+    """
+    return [url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+
+def get_replica_engines() -> List[AsyncEngine]:
+    """
+    Async engines of the read replicas in ``DATABASE_REPLICA_URLS`` (empty
+    when none are configured), created on first call. Each has its own pool,
+    sized like the primary's.
+    """
+    global _replica_engines
+    if _replica_engines is None:
+        with _lock:
+            if _replica_engines is None:
+                new_engines = []
+                for database_url in replica_database_urls():
+                    async_url = get_async_database_url(database_url)
+                    new_engine = create_async_engine(
+                        async_url,
+                        echo=False,
+                        **pool_options(async_url, InstrumentedAsyncQueuePool),
+                    )
+                    for callback in _engine_callbacks:
+                        callback(new_engine.sync_engine)
+                    new_engines.append(new_engine)
+                _replica_engines = new_engines
+    return _replica_engines
+
+def created_engines() -> Dict[str, Any]:
+    """
+    The engines created so far, by label ("async", "sync", "replica0", ...)
+    """
+    engines = {"async": _async_engine, "sync": _engine}
+    engines.update({f"replica{index}": replica for index, replica in enumerate(_replica_engines or [])})
+    return {label: value for label, value in engines.items() if value is not None}
+
+def __getattr__(name: str):
+    # Only reached until the engine behind ``name`` has been created
+    if name in ("engine", "SessionLocal"):
+        get_engine()
+    elif name in ("async_engine", "AsyncSessionLocal"):
+        get_async_engine()
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return globals()[name]
 
 # Create Base class for SQLAlchemy models
 Base = declarative_base()
-
-# Dependency to get DB session
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close() 
\ No newline at end of file
@@ -0,0 +1,122 @@
+"""
+Instrumented connection pools.
+
+``InstrumentedQueuePool`` and ``InstrumentedAsyncQueuePool`` behave exactly
+like SQLAlchemy's ``QueuePool`` / ``AsyncAdaptedQueuePool`` but time every
+checkout, i.e. how long a caller waited to get a usable connection, and
+count checkouts that gave up after ``DB_POOL_TIMEOUT``. Together with the pool's
+own counters (connections in use, overflow) this shows whether requests are
+slow because of the database or because they queue for a connection.
+"""
+import threading
+import time
+from collections import deque
+from typing import Any, Dict
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Recent checkout waits kept for percentiles
+SAMPLE_SIZE = 2048
+
+
+def _percentile(ordered, pct: float) -> float:
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+class PoolMetrics:
+    """
+    Checkout counters and recent wait times of one pool
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=SAMPLE_SIZE)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+            self._waits.append(seconds)
+
+    def timed_out(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = sorted(self._waits)
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_ms_total": round(self.wait_seconds_total * 1000, 3),
+                "wait_ms_max": round(self.wait_seconds_max * 1000, 3),
+                "wait_ms_p50": round(_percentile(waits, 50) * 1000, 3),
+                "wait_ms_p99": round(_percentile(waits, 99) * 1000, 3),
+            }
+
+
+class _InstrumentedMixin:
+    """
+    Times ``connect``: waiting for a free connection, plus opening a new one
+    or pre-pinging an idle one
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.metrics.timed_out()
+            raise
+        self.metrics.observe(time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        # Keep the counters when the engine recreates the pool (e.g. dispose)
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def stats(self) -> Dict[str, Any]:
+        """Gauges and checkout counters of the pool"""
+        return {
+            "size": self.size(),
+            "max_overflow": self._max_overflow,
+            "timeout_seconds": self._timeout,
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            **self.metrics.snapshot(),
+        }
+
+
+class InstrumentedQueuePool(_InstrumentedMixin, QueuePool):
+    """QueuePool with checkout metrics, used by the sync engine"""
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool with checkout metrics, used by the async engine"""
+
+
+def pool_stats(engine) -> Dict[str, Any]:
+    """
+    Metrics of an engine's pool, or just its class name when it is not
+    instrumented (e.g. in-memory SQLite)
+    """
+    pool = engine.pool
+    if isinstance(pool, _InstrumentedMixin):
+        return {"pool": type(pool).__name__, **pool.stats()}
+    return {"pool": type(pool).__name__, "status": pool.status()}
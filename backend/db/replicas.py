@@ -0,0 +1,160 @@
+"""
+Read replica routing.
+
+Endpoints decorated with ``read_only`` (analytics, exports, listings, user
+lookups) read from the replicas in ``DATABASE_REPLICA_URLS``; everything else,
+writes and the paths that read back what the client just wrote, stays on the
+primary. ``get_async_db`` calls ``route_to_replica`` for a read-only request:
+the session checks out a connection from the next replica in round-robin
+order and keeps reading from it (see ``RoutingSession``). A replica that
+cannot be connected to, or drops a connection, is skipped for
+``DATABASE_REPLICA_RETRY_SECONDS``; when none is reachable the request reads
+from the primary.
+
+Replicas lag the primary, so read-only endpoints must not write and should
+tolerate slightly stale data. Principal lookups always read the primary, so
+a deactivated user is not re-cached as active from a lagging replica.
+"""
+import itertools
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from backend.core.config import settings
+from backend.db import database
+
+# ``bind_arguments`` forcing a statement of a replica-routed session to the primary
+PRIMARY = {"primary": True}
+
+
+def read_only(endpoint: Callable) -> Callable:
+    """
+    Serve an endpoint from a read replica when one is configured
+
+    Apply below the route decorator::
+
+        @router.get("/")
+        @read_only
+        async def read_items(...):
+    """
+    endpoint.__read_only__ = True
+    return endpoint
+
+
+def is_read_only(endpoint: Optional[Callable]) -> bool:
+    """Whether ``endpoint`` is marked ``read_only``"""
+    return getattr(endpoint, "__read_only__", False)
+
+
+class ReplicaSet:
+    """
+    Round-robin over the replica engines, skipping those marked down
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._turn = itertools.count()
+        self._down_until: Dict[int, float] = {}
+        self._listening = set()
+        self.routed: Dict[int, int] = {}
+        self.failures: Dict[int, int] = {}
+        self.fallbacks = 0
+
+    def engines(self) -> List[AsyncEngine]:
+        """The replica engines, watched for lost connections"""
+        engines = database.get_replica_engines()
+        if len(self._listening) < len(engines):
+            with self._lock:
+                for index, engine in enumerate(engines):
+                    if index not in self._listening:
+                        self._listening.add(index)
+                        event.listen(engine.sync_engine, "handle_error", self._on_error(index))
+        return engines
+
+    def _on_error(self, index: int) -> Callable:
+        def handle_error(context) -> None:
+            # Connection refused or lost, as opposed to a failing statement
+            if context.is_disconnect or context.connection is None:
+                self.mark_down(index)
+        return handle_error
+
+    def candidates(self) -> List[Any]:
+        """(index, engine) of the replicas that are up, starting with the next in turn"""
+        engines = self.engines()
+        if not engines:
+            return []
+        start = next(self._turn) % len(engines)
+        now = time.monotonic()
+        order = [index % len(engines) for index in range(start, start + len(engines))]
+        return [(index, engines[index]) for index in order if self._down_until.get(index, 0) <= now]
+
+    def mark_down(self, index: int) -> None:
+        """Skip replica ``index`` for ``DATABASE_REPLICA_RETRY_SECONDS``"""
+        with self._lock:
+            self._down_until[index] = time.monotonic() + settings.DATABASE_REPLICA_RETRY_SECONDS
+            self.failures[index] = self.failures.get(index, 0) + 1
+
+    def count_routed(self, index: int) -> None:
+        with self._lock:
+            self.routed[index] = self.routed.get(index, 0) + 1
+
+    def count_fallback(self) -> None:
+        with self._lock:
+            self.fallbacks += 1
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        replicas = []
+        for index, engine in enumerate(self.engines()):
+            down_for = self._down_until.get(index, 0) - now
+            replicas.append({
+                "url": engine.url.render_as_string(hide_password=True),
+                "up": down_for <= 0,
+                "retry_in_seconds": round(max(down_for, 0), 1),
+                "sessions": self.routed.get(index, 0),
+                "failures": self.failures.get(index, 0),
+            })
+        return {"replicas": replicas, "primary_fallbacks": self.fallbacks}
+
+
+replicas = ReplicaSet()
+
+
+async def route_to_replica(db: AsyncSession) -> Optional[AsyncEngine]:
+    """
+    Point ``db`` at the first reachable replica and return its engine, or
+    None (reads stay on the primary) when none is configured or reachable.
+
+    The replica's connection is checked out right away, so a replica that is
+    down is detected here and the request fails over instead of failing.
+    """
+    candidates = replicas.candidates()
+    for index, engine in candidates:
+        db.info[database.REPLICA_KEY] = engine
+        try:
+            await db.connection()
+        except exc.DBAPIError:
+            replicas.mark_down(index)
+            del db.info[database.REPLICA_KEY]
+            await db.rollback()
+            continue
+        replicas.count_routed(index)
+        return engine
+
+    if database.replica_database_urls():
+        replicas.count_fallback()
+    return None
+
+
+def replica_of(db: AsyncSession) -> Optional[AsyncEngine]:
+    """The replica engine ``db`` reads from, or None for the primary"""
+    return db.info.get(database.REPLICA_KEY)
+
+
+def use_replica(db: AsyncSession, replica: Optional[AsyncEngine]) -> None:
+    """Make ``db`` read from ``replica`` (as returned by ``replica_of``), if any"""
+    if replica is not None:
+        db.info[database.REPLICA_KEY] = replica
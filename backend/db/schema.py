@@ -0,0 +1,72 @@
+"""
+Schema setup at application startup.
+
+Tables used to be created with ``Base.metadata.create_all`` when
+``backend.main`` was imported, so every worker (and every tool importing the
+app) connected to the database and inspected each table before doing
+anything else. ``prepare_schema`` runs from the app's lifespan handler
+instead and checks a single table first: when ``migration_history`` lists
+every migration in ``migrations/``, ``migrate.py`` has brought the schema up
+to date and nothing else is done. Otherwise (a fresh database, or pending
+migrations) missing tables are created as before.
+"""
+import os
+from typing import List, Set
+
+from sqlalchemy import inspect, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from backend.db.database import Base
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations")
+
+
+def get_migration_files() -> List[str]:
+    """
+    Get all migration files sorted by version number.
+
+    Returns:
+        list: Sorted list of migration filenames
+    """
+    migration_files = []
+
+    for filename in os.listdir(MIGRATIONS_DIR):
+        # Only numbered files (e.g. 003_add_index.py) are migrations
+        if filename.endswith('.py') and filename.split('_')[0].isdigit():
+            migration_files.append(filename)
+
+    # Sort migrations by version number (the prefix before underscore)
+    migration_files.sort(key=lambda x: x.split('_')[0])
+    return migration_files
+
+
+def _applied_versions(connection) -> Set[str]:
+    from backend.models.migration import MigrationHistory
+
+    if not inspect(connection).has_table(MigrationHistory.__tablename__):
+        return set()
+    return set(connection.execute(select(MigrationHistory.version)).scalars())
+
+
+def _create_tables(connection) -> None:
+    import backend.models  # noqa: F401 - register models on the metadata
+
+    Base.metadata.create_all(bind=connection)
+
+
+async def prepare_schema(engine: AsyncEngine) -> str:
+    """
+    Make sure the schema exists before serving
+
+    Returns:
+        str: "migrated" when all migrations were applied and nothing was
+        done, "created" when missing tables were created
+    """
+    # Migration files are named after their migration_id
+    versions = {filename.split('_')[0] for filename in get_migration_files()}
+
+    async with engine.begin() as connection:
+        if versions <= await connection.run_sync(_applied_versions):
+            return "migrated"
+        await connection.run_sync(_create_tables)
+    return "created"
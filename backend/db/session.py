@@ -1,7 +1,11 @@
-from typing import Generator
+from typing import AsyncGenerator, Generator
+from fastapi import Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from backend.db.database import SessionLocal
+from backend.core.config import settings
+from backend.db import database
+from backend.db.replicas import is_read_only, route_to_replica
 
 def get_db() -> Generator[Session, None, None]:
     """
@@ -10,8 +14,30 @@ def get_db() -> Generator[Session, None, None]:
     Yields:
         Session: SQLAlchemy database session
     """
-    db = SessionLocal()
+    db = database.SessionLocal()
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+async def get_async_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency function to get an async database session.
+    Used by the API endpoints so queries do not block the event loop.
+    
+    This is the request's unit of work: FastAPI resolves it once per request,
+    so the endpoint and its dependencies (authentication included) share the
+    session, and its connection is checked out once, on the first query.
+    Work the endpoint did not commit is rolled back when the request ends.
+    
+    Endpoints marked ``read_only`` read from a replica when replicas are
+    configured (see db/replicas.py).
+    
+    Yields:
+        AsyncSession: SQLAlchemy async database session
+    """
+    async with database.AsyncSessionLocal() as db:
+        route = request.scope.get("route")
+        if settings.DATABASE_REPLICA_URLS and is_read_only(getattr(route, "endpoint", None)):
+            await route_to_replica(db)
+        yield db
@@ -1,18 +1,56 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.docs import get_swagger_ui_html
 from fastapi.openapi.utils import get_openapi
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 
 from backend.core.config import settings
 from backend.api.api_v1.api import api_router
-from backend.db.database import Base, engine
+from backend.core.metrics import (
+    CONTENT_TYPE, MetricsMiddleware, instrument_engine, render, run_metrics_flush, write_snapshot,
+)
+from backend.core.query_budget import QueryBudgetMiddleware, count_queries
+from backend.db.database import created_engines, get_async_engine, get_replica_engines, on_engine_created
+from backend.db.schema import prepare_schema
+from backend.services.pagination import NEXT_CURSOR_HEADER, InvalidCursorError
+from backend.services.password_executor import PasswordHashingBusyError
+from backend.services.principal_cache import run_principal_sync, sync_principal_changes
+from backend.services.token_revocation import run_revocation_sync, sync_revocations
 
-# Create tables if they don't exist
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Create missing tables on startup, unless migrate.py already brought the
+    schema up to date, keep the token revocations and principal changes of
+    all workers synced and share this worker's metrics; close pooled
+    connections on shutdown
+    """
+    await prepare_schema(get_async_engine())
+    await sync_revocations()
+    await sync_principal_changes()
+    background = [asyncio.create_task(run_revocation_sync()), asyncio.create_task(run_principal_sync())]
+    if settings.METRICS_ENABLED and settings.METRICS_MULTIPROCESS_DIR:
+        background.append(asyncio.create_task(
+            run_metrics_flush(settings.METRICS_MULTIPROCESS_DIR, settings.METRICS_FLUSH_SECONDS, created_engines)
+        ))
+    yield
+    for task in background:
+        task.cancel()
+    # The last snapshot keeps this worker's counters once it has exited
+    if settings.METRICS_ENABLED and settings.METRICS_MULTIPROCESS_DIR:
+        write_snapshot(settings.METRICS_MULTIPROCESS_DIR, created_engines())
+    await get_async_engine().dispose()
+    for replica in get_replica_engines():
+        await replica.dispose()
 
 # Create FastAPI app
 app = FastAPI(
     title=settings.PROJECT_NAME,
+    lifespan=lifespan,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     docs_url=None,  # Disable default docs
     redoc_url=None,  # Disable default redoc
@@ -25,11 +63,48 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+# Per-route request metrics, exposed on /metrics
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    on_engine_created(instrument_engine)
+
+# Query counting and budgets, for development and CI
+if settings.QUERY_BUDGET_MODE in ("log", "enforce"):
+    app.add_middleware(QueryBudgetMiddleware)
+    on_engine_created(count_queries)
+
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+# Shed load instead of queueing logins without bound
+@app.exception_handler(PasswordHashingBusyError)
+async def password_hashing_busy_handler(request: Request, exc: PasswordHashingBusyError):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "1"},
+    )
+
+# A saturated connection pool means "try again shortly", not a server bug
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Database connection pool exhausted, please retry"},
+        headers={"Retry-After": "1"},
+    )
+
+# Malformed pagination cursors are a client error
+@app.exception_handler(InvalidCursorError)
+async def invalid_cursor_handler(request: Request, exc: InvalidCursorError):
+    return JSONResponse(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        content={"detail": str(exc)},
+    )
+
 # Custom docs endpoint with authentication (if needed)
 @app.get("/docs", include_in_schema=False)
 async def custom_swagger_ui_html():
@@ -39,6 +114,18 @@ async def custom_swagger_ui_html():
         oauth2_redirect_url=app.swagger_ui_oauth2_redirect_url,
     )
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Request, SQL and connection pool metrics in Prometheus text format,
+    of all workers when they share METRICS_MULTIPROCESS_DIR
+    """
+    if not settings.METRICS_ENABLED:
+        return PlainTextResponse("Metrics are disabled\n", status_code=status.HTTP_404_NOT_FOUND)
+    return PlainTextResponse(
+        render(created_engines(), settings.METRICS_MULTIPROCESS_DIR), media_type=CONTENT_TYPE
+    )
+
 @app.get("/", tags=["Health Check"])
 async def root():
     """
@@ -46,7 +133,7 @@ async def root():
     """
     return {"status": "healthy", "message": f"Welcome to {settings.PROJECT_NAME} API"}
 
-# For development server
+# For development server; production runs python -m backend.serve
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("backend.main:app", host="0.0.0.0", port=8000, reload=True) 
\ No newline at end of file
@@ -21,28 +21,9 @@ from sqlalchemy.exc import OperationalError, SQLAlchemyError
 
 # Import project modules
 from backend.db.database import engine, Base
+from backend.db.schema import MIGRATIONS_DIR, get_migration_files
 from backend.models.migration import MigrationHistory
 
-# Configuration
-MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "migrations")
-
-def get_migration_files():
-    """
-    Get all migration files sorted by version number.
-    
-    Returns:
-        list: Sorted list of migration filenames
-    """
-    migration_files = []
-    
-    for filename in os.listdir(MIGRATIONS_DIR):
-        if filename.endswith('.py') and not filename.startswith('__'):
-            migration_files.append(filename)
-    
-    # Sort migrations by version number (the prefix before underscore)
-    migration_files.sort(key=lambda x: x.split('_')[0])
-    return migration_files
-
 def get_applied_migrations(session):
     """
     Get all previously applied migrations from the database.
@@ -20,9 +20,14 @@ def upgrade(engine):
     Args:
         engine: SQLAlchemy engine instance
     """
-    # This is handled by Base.metadata.create_all() in the first run
-    # This is included here for documentation purposes as it represents
-    # the initial schema
+    # The application no longer creates tables on every import, so a fresh
+    # database migrated before the first start needs its tables here.
+    # create_all only creates missing tables; the later migrations check
+    # for the columns and indexes it already added.
+    import backend.models  # noqa: F401 - register models on the metadata
+    from backend.db.database import Base
+    
+    Base.metadata.create_all(bind=engine)
     
     # You would put actual schema modifications here for future migrations
     
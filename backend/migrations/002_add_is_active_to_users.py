@@ -17,9 +17,9 @@ def upgrade(engine):
     Args:
         engine: SQLAlchemy engine instance
     """
-    with engine.connect() as connection:
+    with engine.begin() as connection:
         # Check if column already exists to make migration idempotent
-        inspector = engine.dialect.get_columns(connection, "users", engine.schema)
+        inspector = engine.dialect.get_columns(connection, "users")
         column_names = [column["name"] for column in inspector]
         
         if "is_active" not in column_names:
@@ -37,9 +37,9 @@ def downgrade(engine):
     Args:
         engine: SQLAlchemy engine instance
     """
-    with engine.connect() as connection:
+    with engine.begin() as connection:
         # Check if column exists before trying to drop it
-        inspector = engine.dialect.get_columns(connection, "users", engine.schema)
+        inspector = engine.dialect.get_columns(connection, "users")
         column_names = [column["name"] for column in inspector]
         
         if "is_active" in column_names:
@@ -0,0 +1,64 @@
+"""
+Add indexes on created_at to users and health_records.
+The analytics summary filters both tables by created_at ranges.
+"""
+from sqlalchemy import inspect
+from sqlalchemy.sql import text
+
+# Migration metadata
+migration_id = "003"
+migration_name = "add_created_at_indexes"
+description = "Add created_at indexes to users and health_records"
+
+# (index name, table, columns) - names match SQLAlchemy's index=True naming
+INDEXES = [
+    ("ix_users_created_at", "users", "created_at"),
+    ("ix_health_records_created_at", "health_records", "created_at"),
+]
+
+def upgrade(engine):
+    """
+    Run the migration: Create the created_at indexes
+    
+    Args:
+        engine: SQLAlchemy engine instance
+    """
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        
+        for index_name, table, columns in INDEXES:
+            # Check if index already exists to make migration idempotent
+            existing = [index["name"] for index in inspector.get_indexes(table)]
+            
+            if index_name not in existing:
+                connection.execute(text(f"CREATE INDEX {index_name} ON {table} ({columns})"))
+                print(f"Created index '{index_name}' on {table}")
+            else:
+                print(f"Index '{index_name}' already exists on {table}")
+    
+    print(f"Applied {migration_id}_{migration_name}: {description}")
+
+def downgrade(engine):
+    """
+    Rollback the migration: Drop the created_at indexes
+    
+    Args:
+        engine: SQLAlchemy engine instance
+    """
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        
+        for index_name, table, columns in INDEXES:
+            existing = [index["name"] for index in inspector.get_indexes(table)]
+            
+            if index_name in existing:
+                # MySQL requires the table name, SQLite does not accept it
+                if connection.dialect.name == "mysql":
+                    connection.execute(text(f"DROP INDEX {index_name} ON {table}"))
+                else:
+                    connection.execute(text(f"DROP INDEX {index_name}"))
+                print(f"Dropped index '{index_name}' from {table}")
+            else:
+                print(f"Index '{index_name}' does not exist on {table}")
+    
+    print(f"Rolled back {migration_id}_{migration_name}: {description}")
@@ -0,0 +1,92 @@
+"""
+Add a stored, indexed risk_level column to health_records.
+Existing rows are classified in SQL with the same rules as services/risk.py.
+"""
+from sqlalchemy import inspect, select, func, update
+from sqlalchemy.sql import text
+
+from backend.models.health_record import HealthRecord
+from backend.services.risk import risk_level_case
+
+# Migration metadata
+migration_id = "004"
+migration_name = "add_risk_level_to_health_records"
+description = "Add risk_level column to health_records and backfill it"
+
+INDEX_NAME = "ix_health_records_risk_level"
+
+# Rows classified per UPDATE, keeps lock time short on large tables
+BACKFILL_BATCH_SIZE = 50000
+
+def upgrade(engine):
+    """
+    Run the migration: Add, backfill and index the risk_level column
+    
+    Args:
+        engine: SQLAlchemy engine instance
+    """
+    with engine.begin() as connection:
+        # Check if column already exists to make migration idempotent
+        column_names = [column["name"] for column in inspect(connection).get_columns("health_records")]
+        
+        if "risk_level" not in column_names:
+            connection.execute(text("ALTER TABLE health_records ADD COLUMN risk_level VARCHAR(16) NULL"))
+            print("Added 'risk_level' column to health_records table")
+        else:
+            print("Column 'risk_level' already exists in health_records table")
+    
+    # Backfill in id ranges, one transaction per batch
+    table = HealthRecord.__table__
+    with engine.connect() as connection:
+        max_id = connection.execute(select(func.max(table.c.id))).scalar() or 0
+    
+    classified = 0
+    for start in range(0, max_id + 1, BACKFILL_BATCH_SIZE):
+        with engine.begin() as connection:
+            result = connection.execute(
+                update(table)
+                .where(
+                    table.c.id >= start,
+                    table.c.id < start + BACKFILL_BATCH_SIZE,
+                    table.c.risk_level.is_(None),
+                )
+                .values(risk_level=risk_level_case(table.c))
+            )
+            classified += result.rowcount
+    print(f"Classified {classified} existing health records")
+    
+    with engine.begin() as connection:
+        existing = [index["name"] for index in inspect(connection).get_indexes("health_records")]
+        
+        if INDEX_NAME not in existing:
+            connection.execute(text(f"CREATE INDEX {INDEX_NAME} ON health_records (risk_level)"))
+            print(f"Created index '{INDEX_NAME}' on health_records")
+    
+    print(f"Applied {migration_id}_{migration_name}: {description}")
+
+def downgrade(engine):
+    """
+    Rollback the migration: Drop the risk_level column and its index
+    
+    Args:
+        engine: SQLAlchemy engine instance
+    """
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        existing = [index["name"] for index in inspector.get_indexes("health_records")]
+        
+        if INDEX_NAME in existing:
+            if connection.dialect.name == "mysql":
+                connection.execute(text(f"DROP INDEX {INDEX_NAME} ON health_records"))
+            else:
+                connection.execute(text(f"DROP INDEX {INDEX_NAME}"))
+        
+        column_names = [column["name"] for column in inspector.get_columns("health_records")]
+        
+        if "risk_level" in column_names:
+            connection.execute(text("ALTER TABLE health_records DROP COLUMN risk_level"))
+            print("Removed 'risk_level' column from health_records table")
+        else:
+            print("Column 'risk_level' does not exist in health_records table")
+    
+    print(f"Rolled back {migration_id}_{migration_name}: {description}")
@@ -0,0 +1,64 @@
+"""
+Add a composite (user_id, created_at, id) index to health_records.
+Keyset pagination of a user's records seeks on user_id and reads
+(created_at, id) in index order, so any page is a short range scan.
+"""
+from sqlalchemy import inspect
+from sqlalchemy.sql import text
+
+# Migration metadata
+migration_id = "005"
+migration_name = "add_health_records_keyset_index"
+description = "Add (user_id, created_at, id) index to health_records"
+
+# (index name, table, columns) - the name matches the model's __table_args__
+INDEXES = [
+    ("ix_health_records_user_created_id", "health_records", "user_id, created_at, id"),
+]
+
+def upgrade(engine):
+    """
+    Run the migration: Create the keyset pagination index
+    
+    Args:
+        engine: SQLAlchemy engine instance
+    """
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        
+        for index_name, table, columns in INDEXES:
+            # Check if index already exists to make migration idempotent
+            existing = [index["name"] for index in inspector.get_indexes(table)]
+            
+            if index_name not in existing:
+                connection.execute(text(f"CREATE INDEX {index_name} ON {table} ({columns})"))
+                print(f"Created index '{index_name}' on {table}")
+            else:
+                print(f"Index '{index_name}' already exists on {table}")
+    
+    print(f"Applied {migration_id}_{migration_name}: {description}")
+
+def downgrade(engine):
+    """
+    Rollback the migration: Drop the keyset pagination index
+    
+    Args:
+        engine: SQLAlchemy engine instance
+    """
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        
+        for index_name, table, columns in INDEXES:
+            existing = [index["name"] for index in inspector.get_indexes(table)]
+            
+            if index_name in existing:
+                # MySQL requires the table name, SQLite does not accept it
+                if connection.dialect.name == "mysql":
+                    connection.execute(text(f"DROP INDEX {index_name} ON {table}"))
+                else:
+                    connection.execute(text(f"DROP INDEX {index_name}"))
+                print(f"Dropped index '{index_name}' from {table}")
+            else:
+                print(f"Index '{index_name}' does not exist on {table}")
+    
+    print(f"Rolled back {migration_id}_{migration_name}: {description}")
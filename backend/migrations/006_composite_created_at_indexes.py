@@ -0,0 +1,78 @@
+"""
+Replace the single-column created_at indexes with (created_at, id) composites.
+Listings page through both tables in (created_at DESC, id DESC) order. InnoDB
+and SQLite happen to append the primary key to secondary indexes, but naming
+id explicitly makes the index cover the full sort key on every engine. Range
+filters on created_at (analytics) still use the leading column.
+"""
+from sqlalchemy import inspect
+from sqlalchemy.sql import text
+
+# Migration metadata
+migration_id = "006"
+migration_name = "composite_created_at_indexes"
+description = "Replace created_at indexes with (created_at, id) indexes on users and health_records"
+
+# (new index name, replaced index name, table, columns) - new names match the models' __table_args__
+INDEXES = [
+    ("ix_users_created_id", "ix_users_created_at", "users", "created_at, id"),
+    ("ix_health_records_created_id", "ix_health_records_created_at", "health_records", "created_at, id"),
+]
+
+def _drop_index(connection, index_name, table):
+    # MySQL requires the table name, SQLite does not accept it
+    if connection.dialect.name == "mysql":
+        connection.execute(text(f"DROP INDEX {index_name} ON {table}"))
+    else:
+        connection.execute(text(f"DROP INDEX {index_name}"))
+
+def upgrade(engine):
+    """
+    Run the migration: Create the composite indexes, then drop the ones they replace
+    
+    Args:
+        engine: SQLAlchemy engine instance
+    """
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        
+        for index_name, replaced_name, table, columns in INDEXES:
+            # Check existing indexes to make migration idempotent
+            existing = [index["name"] for index in inspector.get_indexes(table)]
+            
+            if index_name not in existing:
+                connection.execute(text(f"CREATE INDEX {index_name} ON {table} ({columns})"))
+                print(f"Created index '{index_name}' on {table}")
+            else:
+                print(f"Index '{index_name}' already exists on {table}")
+            
+            if replaced_name in existing:
+                _drop_index(connection, replaced_name, table)
+                print(f"Dropped index '{replaced_name}' from {table}")
+    
+    print(f"Applied {migration_id}_{migration_name}: {description}")
+
+def downgrade(engine):
+    """
+    Rollback the migration: Restore the created_at indexes and drop the composites
+    
+    Args:
+        engine: SQLAlchemy engine instance
+    """
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        
+        for index_name, replaced_name, table, columns in INDEXES:
+            existing = [index["name"] for index in inspector.get_indexes(table)]
+            
+            if replaced_name not in existing:
+                connection.execute(text(f"CREATE INDEX {replaced_name} ON {table} (created_at)"))
+                print(f"Created index '{replaced_name}' on {table}")
+            
+            if index_name in existing:
+                _drop_index(connection, index_name, table)
+                print(f"Dropped index '{index_name}' from {table}")
+            else:
+                print(f"Index '{index_name}' does not exist on {table}")
+    
+    print(f"Rolled back {migration_id}_{migration_name}: {description}")
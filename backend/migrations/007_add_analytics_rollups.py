@@ -0,0 +1,59 @@
+"""
+Add the analytics rollup tables and fill them from the existing data.
+daily_counts holds per-day record, registration and risk bucket counts,
+total_counts the all-time risk bucket counts. Both are kept up to date by
+the API from now on (see services/rollups.py).
+"""
+from sqlalchemy import inspect
+
+from backend.models.analytics_rollup import DailyCount, TotalCount
+from backend.services.rollups import rebuild
+
+# Migration metadata
+migration_id = "007"
+migration_name = "add_analytics_rollups"
+description = "Add daily_counts and total_counts rollup tables and backfill them"
+
+TABLES = [DailyCount.__table__, TotalCount.__table__]
+
+def upgrade(engine):
+    """
+    Run the migration: Create the rollup tables and rebuild them
+    
+    Args:
+        engine: SQLAlchemy engine instance
+    """
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        
+        for table in TABLES:
+            # Check if table already exists to make migration idempotent
+            if not inspector.has_table(table.name):
+                table.create(connection)
+                print(f"Created table '{table.name}'")
+            else:
+                print(f"Table '{table.name}' already exists")
+        
+        daily_rows, total_rows = rebuild(connection)
+        print(f"Rebuilt rollups: {daily_rows} daily row(s), {total_rows} total row(s)")
+    
+    print(f"Applied {migration_id}_{migration_name}: {description}")
+
+def downgrade(engine):
+    """
+    Rollback the migration: Drop the rollup tables
+    
+    Args:
+        engine: SQLAlchemy engine instance
+    """
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        
+        for table in TABLES:
+            if inspector.has_table(table.name):
+                table.drop(connection)
+                print(f"Dropped table '{table.name}'")
+            else:
+                print(f"Table '{table.name}' does not exist")
+    
+    print(f"Rolled back {migration_id}_{migration_name}: {description}")
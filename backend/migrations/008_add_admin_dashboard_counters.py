@@ -0,0 +1,59 @@
+"""
+Add the recent-activity log for the admin dashboard and backfill the
+all-time user, active user and record counters in total_counts, which the API
+maintains from now on (see services/rollups.py and services/activity.py).
+"""
+from sqlalchemy import inspect
+
+from backend.models.activity import RecentActivity
+from backend.services.rollups import rebuild
+
+# Migration metadata
+migration_id = "008"
+migration_name = "add_admin_dashboard_counters"
+description = "Add recent_activities table and backfill the dashboard counters"
+
+def upgrade(engine):
+    """
+    Run the migration: Create the activity table and rebuild the counters
+    
+    Args:
+        engine: SQLAlchemy engine instance
+    """
+    table = RecentActivity.__table__
+    
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        
+        # Check if table already exists to make migration idempotent
+        if not inspector.has_table(table.name):
+            table.create(connection)
+            print(f"Created table '{table.name}'")
+        else:
+            print(f"Table '{table.name}' already exists")
+        
+        daily_rows, total_rows = rebuild(connection)
+        print(f"Rebuilt rollups: {daily_rows} daily row(s), {total_rows} total row(s)")
+    
+    print(f"Applied {migration_id}_{migration_name}: {description}")
+
+def downgrade(engine):
+    """
+    Rollback the migration: Drop the activity table.
+    The extra total_counts rows are left in place; nothing reads them.
+    
+    Args:
+        engine: SQLAlchemy engine instance
+    """
+    table = RecentActivity.__table__
+    
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        
+        if inspector.has_table(table.name):
+            table.drop(connection)
+            print(f"Dropped table '{table.name}'")
+        else:
+            print(f"Table '{table.name}' does not exist")
+    
+    print(f"Rolled back {migration_id}_{migration_name}: {description}")
@@ -0,0 +1,54 @@
+"""
+Add the revoked_tokens table, so a token revoked on logout is rejected by
+every worker and survives restarts (see services/token_revocation.py).
+"""
+from sqlalchemy import inspect
+
+from backend.models.revoked_token import RevokedToken
+
+# Migration metadata
+migration_id = "009"
+migration_name = "add_revoked_tokens"
+description = "Add revoked_tokens table shared by all workers"
+
+def upgrade(engine):
+    """
+    Run the migration: Create the revoked_tokens table
+    
+    Args:
+        engine: SQLAlchemy engine instance
+    """
+    table = RevokedToken.__table__
+    
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        
+        # Check if table already exists to make migration idempotent
+        if not inspector.has_table(table.name):
+            table.create(connection)
+            print(f"Created table '{table.name}'")
+        else:
+            print(f"Table '{table.name}' already exists")
+    
+    print(f"Applied {migration_id}_{migration_name}: {description}")
+
+def downgrade(engine):
+    """
+    Rollback the migration: Drop the revoked_tokens table.
+    Tokens revoked so far are accepted again until they expire.
+    
+    Args:
+        engine: SQLAlchemy engine instance
+    """
+    table = RevokedToken.__table__
+    
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        
+        if inspector.has_table(table.name):
+            table.drop(connection)
+            print(f"Dropped table '{table.name}'")
+        else:
+            print(f"Table '{table.name}' does not exist")
+    
+    print(f"Rolled back {migration_id}_{migration_name}: {description}")
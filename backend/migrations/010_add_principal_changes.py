@@ -0,0 +1,54 @@
+"""
+Add the principal_changes table, so a change to a user's role or active
+flag invalidates the cached principal in every worker, not only the one
+that handled it (see services/principal_cache.py).
+"""
+from sqlalchemy import inspect
+
+from backend.models.principal_change import PrincipalChange
+
+# Migration metadata
+migration_id = "010"
+migration_name = "add_principal_changes"
+description = "Add principal_changes table shared by all workers"
+
+def upgrade(engine):
+    """
+    Run the migration: Create the principal_changes table
+    
+    Args:
+        engine: SQLAlchemy engine instance
+    """
+    table = PrincipalChange.__table__
+    
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        
+        # Check if table already exists to make migration idempotent
+        if not inspector.has_table(table.name):
+            table.create(connection)
+            print(f"Created table '{table.name}'")
+        else:
+            print(f"Table '{table.name}' already exists")
+    
+    print(f"Applied {migration_id}_{migration_name}: {description}")
+
+def downgrade(engine):
+    """
+    Rollback the migration: Drop the principal_changes table.
+    
+    Args:
+        engine: SQLAlchemy engine instance
+    """
+    table = PrincipalChange.__table__
+    
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        
+        if inspector.has_table(table.name):
+            table.drop(connection)
+            print(f"Dropped table '{table.name}'")
+        else:
+            print(f"Table '{table.name}' does not exist")
+    
+    print(f"Rolled back {migration_id}_{migration_name}: {description}")
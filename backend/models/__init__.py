@@ -1,5 +1,9 @@
 from backend.models.user import User, UserRole
-from backend.models.health_record import HealthRecord
+from backend.models.health_record import HealthRecord, RiskLevel
+from backend.models.analytics_rollup import DailyCount, TotalCount
+from backend.models.activity import RecentActivity
+from backend.models.revoked_token import RevokedToken
+from backend.models.principal_change import PrincipalChange
 
 # This allows importing all models from backend.models
-__all__ = ["User", "UserRole", "HealthRecord"] 
\ No newline at end of file
+__all__ = ["User", "UserRole", "HealthRecord", "RiskLevel", "DailyCount", "TotalCount", "RecentActivity", "RevokedToken", "PrincipalChange"] 
\ No newline at end of file
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+
+from backend.db.database import Base
+from backend.utils.timestamps import utc_now
+
+class RecentActivity(Base):
+    """
+    Bounded log of recent user activity for the admin dashboard.
+    Entries are numbered by the autoincrement ``id`` and pruned by it, so the
+    table keeps about ``ADMIN_ACTIVITY_LOG_SIZE`` rows, see services/activity.py
+    """
+
+    __tablename__ = "recent_activities"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    activity = Column(String(255), nullable=False)
+    created_at = Column(DateTime, default=utc_now, nullable=False)
+
+    def __repr__(self):
+        return f"<RecentActivity #{self.id} user={self.user_id} {self.activity}>"
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Date, Integer, String
+
+from backend.db.database import Base
+
+class DailyCount(Base):
+    """
+    Per-day counter maintained incrementally on every write.
+    Metrics: "records", "registrations" and "risk:<level>", see services/rollups.py
+    """
+
+    __tablename__ = "daily_counts"
+
+    day = Column(Date, primary_key=True)
+    metric = Column(String(32), primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<DailyCount {self.day} {self.metric}={self.value}>"
+
+class TotalCount(Base):
+    """
+    All-time counter maintained alongside ``DailyCount``
+    """
+
+    __tablename__ = "total_counts"
+
+    metric = Column(String(32), primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<TotalCount {self.metric}={self.value}>"
@@ -1,11 +1,24 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
-from datetime import datetime
+import enum
 
 from backend.db.database import Base
+from backend.utils.timestamps import utc_now
+
+class RiskLevel(str, enum.Enum):
+    NORMAL = "normal"
+    MILD = "mild"
+    MODERATE = "moderate"
+    SEVERE = "severe"
 
 class HealthRecord(Base):
     __tablename__ = "health_records"
+    __table_args__ = (
+        # Per-user listings seek on user_id and walk (created_at, id) in order
+        Index("ix_health_records_user_created_id", "user_id", "created_at", "id"),
+        # Admin listings walk (created_at, id); analytics ranges use created_at
+        Index("ix_health_records_created_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -15,7 +28,8 @@ class HealthRecord(Base):
     blood_pressure_systolic = Column(Integer, comment="Systolic blood pressure in mmHg")
     blood_pressure_diastolic = Column(Integer, comment="Diastolic blood pressure in mmHg")
     symptoms = Column(Text, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    risk_level = Column(String(16), index=True, nullable=True, comment="Computed on write, see services/risk.py")
+    created_at = Column(DateTime, default=utc_now, nullable=False)
 
     # Relationship with user
     user = relationship("User", back_populates="health_records")
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer
+
+from backend.db.database import Base
+
+class PrincipalChange(Base):
+    """
+    Latest change to a user's role or active flag (or their deletion), so
+    every worker drops its cached principal for them. Rows older than the
+    principal cache TTL are pruned, see services/principal_cache.py
+    """
+
+    __tablename__ = "principal_changes"
+
+    # No foreign key: deleted users are recorded too
+    user_id = Column(Integer, primary_key=True, autoincrement=False)
+    generation = Column(Integer, nullable=False, default=1)
+    # Unix timestamp of the change
+    changed_at = Column(Integer, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<PrincipalChange user={self.user_id} #{self.generation} at {self.changed_at}>"
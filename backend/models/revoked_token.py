@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String
+
+from backend.db.database import Base
+
+class RevokedToken(Base):
+    """
+    Access token revoked before its expiry (e.g. on logout), shared by all
+    workers. Rows are pruned once the token has expired, see
+    services/token_revocation.py
+    """
+
+    __tablename__ = "revoked_tokens"
+
+    # Hex SHA-256 digest of the token, never the token itself
+    digest = Column(String(64), primary_key=True)
+    # The token's ``exp`` claim (Unix timestamp)
+    expires_at = Column(Integer, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<RevokedToken {self.digest[:12]} until {self.expires_at}>"
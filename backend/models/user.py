@@ -1,9 +1,9 @@
-from sqlalchemy import Column, Integer, String, DateTime, Enum, func
+from sqlalchemy import Column, Integer, String, DateTime, Enum, Boolean, Index, func
 from sqlalchemy.orm import relationship
 import enum
-from datetime import datetime
 
 from backend.db.database import Base
+from backend.utils.timestamps import utc_now
 
 class UserRole(str, enum.Enum):
     USER = "user"
@@ -11,13 +11,18 @@ class UserRole(str, enum.Enum):
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # User listings walk (created_at, id); analytics ranges use created_at
+        Index("ix_users_created_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False)
     email = Column(String(100), unique=True, index=True, nullable=False)
     password_hash = Column(String(255), nullable=False)
     role = Column(Enum(UserRole), default=UserRole.USER, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    is_active = Column(Boolean, default=True, nullable=False)
+    created_at = Column(DateTime, default=utc_now, nullable=False)
 
     # Relationship with health records
     health_records = relationship("HealthRecord", back_populates="user", cascade="all, delete-orphan")
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+"""
+Analytics rollup utility for the HPN MEC project.
+
+Rollups (daily_counts, total_counts) are maintained incrementally by every
+write. Rebuild them from scratch after bulk changes made outside the API,
+e.g. direct SQL imports or restoring a backup.
+
+Usage:
+    python rollup.py [command]
+
+Commands:
+    rebuild - Recompute all rollups from health_records and users
+    status  - Show rollup row counts next to the raw table counts, with
+              records classified afresh for the risk levels
+    help    - Show this help message
+"""
+import sys
+import time
+import argparse
+from sqlalchemy import func, select
+
+# Import project modules
+from backend.db.database import engine, Base
+from backend.models.analytics_rollup import DailyCount, TotalCount
+from backend.models.health_record import HealthRecord, RiskLevel
+from backend.models.user import User
+from backend.services.risk import risk_distribution_query
+from backend.services.rollups import ACTIVE_USERS, RECORDS, REGISTRATIONS, RISK_METRICS, USERS, rebuild
+
+def rebuild_rollups():
+    """
+    Recompute all rollups in a single transaction.
+    """
+    # Make sure the rollup tables exist
+    Base.metadata.create_all(bind=engine, tables=[DailyCount.__table__, TotalCount.__table__])
+    
+    started = time.perf_counter()
+    with engine.begin() as connection:
+        daily_rows, total_rows = rebuild(connection)
+    
+    elapsed = time.perf_counter() - started
+    print(f"✅ Rebuilt rollups: {daily_rows} daily row(s), {total_rows} total row(s) in {elapsed:.2f}s")
+
+def show_status():
+    """
+    Compare rollup sums against the raw tables.
+    """
+    with engine.connect() as connection:
+        raw_records = connection.execute(select(func.count()).select_from(HealthRecord)).scalar()
+        raw_users = connection.execute(select(func.count()).select_from(User)).scalar()
+        raw_active = connection.execute(
+            select(func.count()).select_from(User).where(User.is_active.is_(True))
+        ).scalar()
+        totals = dict(connection.execute(
+            select(TotalCount.metric, TotalCount.value)
+            .where(TotalCount.metric.in_([RECORDS, USERS, ACTIVE_USERS]))
+        ).all())
+        # Classified afresh, so a stale stored risk_level shows up as drift too
+        raw_risk = dict(connection.execute(risk_distribution_query()).all())
+        risk_totals = dict(connection.execute(
+            select(TotalCount.metric, TotalCount.value).where(TotalCount.metric.in_(RISK_METRICS.values()))
+        ).all())
+        rollup_rows = connection.execute(select(func.count()).select_from(DailyCount)).scalar()
+        sums = dict(connection.execute(
+            select(DailyCount.metric, func.sum(DailyCount.value))
+            .where(DailyCount.metric.in_([RECORDS, REGISTRATIONS]))
+            .group_by(DailyCount.metric)
+        ).all())
+    
+    print("\nRollup Status:")
+    print("-" * 60)
+    print(f"{'Metric':<20} {'Raw':<15} {'Rollup':<15} {'Status':<10}")
+    print("-" * 60)
+    rows = [
+        (f"daily {RECORDS}", raw_records, sums.get(RECORDS)),
+        (f"daily {REGISTRATIONS}", raw_users, sums.get(REGISTRATIONS)),
+        (f"total {RECORDS}", raw_records, totals.get(RECORDS)),
+        (f"total {USERS}", raw_users, totals.get(USERS)),
+        (f"total {ACTIVE_USERS}", raw_active, totals.get(ACTIVE_USERS)),
+    ]
+    rows += [
+        (f"total {RISK_METRICS[level.value]}", raw_risk.get(level.value, 0), risk_totals.get(RISK_METRICS[level.value]))
+        for level in RiskLevel
+    ]
+    for metric, raw, rolled_up in rows:
+        rolled_up = int(rolled_up or 0)
+        status = "OK" if rolled_up == raw else "DRIFT"
+        print(f"{metric:<20} {raw:<15} {rolled_up:<15} {status:<10}")
+    print("-" * 60)
+    print(f"Daily rollup rows: {rollup_rows}")
+    print()
+
+def main():
+    """Main rollup utility function."""
+    parser = argparse.ArgumentParser(description="Analytics rollup utility")
+    parser.add_argument("command", nargs="?", default="status",
+                      choices=["rebuild", "status", "help"],
+                      help="Rollup command to execute")
+    
+    args = parser.parse_args()
+    
+    if args.command == "help":
+        print(__doc__)
+        return
+    
+    try:
+        if args.command == "rebuild":
+            rebuild_rollups()
+        elif args.command == "status":
+            show_status()
+    except Exception as e:
+        print(f"Rollup error: {str(e)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
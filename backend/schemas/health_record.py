@@ -49,6 +49,7 @@ class HealthRecordResponse(HealthRecordBase):
     id: int
     user_id: int
     created_at: datetime
+    risk_level: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -62,7 +63,8 @@ class HealthRecordResponse(HealthRecordBase):
                 "blood_pressure_systolic": 120,
                 "blood_pressure_diastolic": 80,
                 "symptoms": "Occasional headache and mild fever",
-                "created_at": "2023-05-20T14:30:00Z"
+                "created_at": "2023-05-20T14:30:00Z",
+                "risk_level": "normal"
             }
         }
 
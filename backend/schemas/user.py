@@ -84,6 +84,23 @@ class UserResponse(UserBase):
             }
         }
 
+# Schema for users in the admin user management list
+class AdminUserResponse(UserResponse):
+    is_active: bool
+
+    class Config:
+        from_attributes = True
+        json_schema_extra = {
+            "example": {
+                "id": 1,
+                "name": "John Doe",
+                "email": "john.doe@example.com",
+                "role": "user",
+                "is_active": True,
+                "created_at": "2023-05-20T14:30:00Z"
+            }
+        }
+
 # Schema for updating user information
 class UserUpdate(BaseModel):
     name: Optional[str] = Field(None, min_length=1, max_length=100)
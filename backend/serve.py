@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+"""
+Production server for the HPN MEC API.
+
+Serves ``backend.main:app`` with ``SERVER_WORKERS`` worker processes (by
+default one per CPU available to the process):
+
+- gunicorn with uvicorn workers when gunicorn is installed. The app is
+  imported once in the master (``preload_app``) and the workers are forked
+  from it, so they start quickly and an import error stops the launch before
+  any worker exists. Database engines are created lazily in each worker, so
+  no connection crosses the fork.
+- ``uvicorn --workers`` otherwise (e.g. on Windows). Each worker imports the
+  app itself; it is imported once up front anyway so errors surface early.
+
+uvloop and httptools are used when installed. Keep-alive, the listen backlog,
+the graceful shutdown timeout and worker recycling come from the
+``SERVER_*`` settings. Access logs are off; the metrics middleware counts
+requests instead.
+
+Every worker has its own connection pools, so the database sees up to
+workers x (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections per engine.
+
+Workers share no memory, so with more than one (``share_worker_state``):
+
+- the response cache uses the ``sqlite`` backend when ``memory`` is
+  configured; a per-worker cache would keep serving responses made stale by
+  a write another worker handled
+- ``METRICS_MULTIPROCESS_DIR`` defaults to a directory per port, emptied at
+  launch, through which ``/metrics`` reports the requests of all workers
+  instead of the one that happens to answer the scrape
+
+The in-process caches of the workers stay consistent on their own: token
+revocations (services/token_revocation.py) and changes to a user's role or
+active flag (services/principal_cache.py) are synced through the database
+within seconds, and cached trend series expire after
+``TRENDS_CACHE_TTL_SECONDS``.
+
+Usage:
+    python -m backend.serve [--workers N] [--host HOST] [--port PORT] [--server auto|gunicorn|uvicorn]
+    python -m backend.serve --print-config
+
+For development, run ``uvicorn backend.main:app --reload`` instead.
+"""
+import argparse
+import glob
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+
+from backend.core.config import settings
+
+APP = "backend.main:app"
+
+
+def available_cpus() -> int:
+    """CPUs this process may run on (respects CPU affinity, e.g. in containers)"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+
+def installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def server_config(args) -> dict:
+    """
+    Resolve the server, worker count and tuning options
+    """
+    server = args.server
+    if server == "auto":
+        server = "gunicorn" if installed("gunicorn") else "uvicorn"
+
+    max_requests = settings.SERVER_MAX_REQUESTS
+    port = args.port or settings.SERVER_PORT
+    workers = args.workers or settings.SERVER_WORKERS or available_cpus()
+    response_cache = settings.RESPONSE_CACHE_BACKEND
+    metrics_dir = settings.METRICS_MULTIPROCESS_DIR
+    if workers > 1:
+        if response_cache == "memory":
+            response_cache = "sqlite"
+        if settings.METRICS_ENABLED and not metrics_dir:
+            metrics_dir = os.path.join(tempfile.gettempdir(), f"hpn_mec_metrics_{port}")
+    return {
+        "server": server,
+        "host": args.host or settings.SERVER_HOST,
+        "port": port,
+        "workers": workers,
+        "loop": "uvloop" if installed("uvloop") else "asyncio",
+        "http": "httptools" if installed("httptools") else "h11",
+        "keepalive": settings.SERVER_KEEPALIVE_SECONDS,
+        "backlog": settings.SERVER_BACKLOG,
+        "graceful_timeout": settings.SERVER_GRACEFUL_TIMEOUT,
+        "max_requests": max_requests,
+        "max_requests_jitter": max_requests // 10,
+        "response_cache": response_cache,
+        "metrics_dir": metrics_dir,
+    }
+
+
+def share_worker_state(config: dict) -> None:
+    """
+    Apply the resolved response cache backend and metrics directory to this
+    process (gunicorn workers are forked from it) and to the environment
+    (uvicorn workers are spawned and read it), and drop metrics of a previous run
+    """
+    if config["response_cache"] != settings.RESPONSE_CACHE_BACKEND:
+        print(f"RESPONSE_CACHE_BACKEND={settings.RESPONSE_CACHE_BACKEND} is per worker, "
+              f"using {config['response_cache']} for {config['workers']} workers", file=sys.stderr)
+    settings.RESPONSE_CACHE_BACKEND = os.environ["RESPONSE_CACHE_BACKEND"] = config["response_cache"]
+
+    if config["metrics_dir"]:
+        settings.METRICS_MULTIPROCESS_DIR = os.environ["METRICS_MULTIPROCESS_DIR"] = config["metrics_dir"]
+        os.makedirs(config["metrics_dir"], exist_ok=True)
+        for path in glob.glob(os.path.join(config["metrics_dir"], "*.json")):
+            os.remove(path)
+
+
+def run_gunicorn(config: dict) -> None:
+    from gunicorn.app.base import BaseApplication
+
+    # The maintained worker class, then the one bundled with older uvicorn
+    worker_class = "uvicorn_worker.UvicornWorker" if installed("uvicorn_worker") else "uvicorn.workers.UvicornWorker"
+    options = {
+        "bind": f"{config['host']}:{config['port']}",
+        "workers": config["workers"],
+        "worker_class": worker_class,
+        "preload_app": True,
+        "keepalive": config["keepalive"],
+        "backlog": config["backlog"],
+        "graceful_timeout": config["graceful_timeout"],
+        "max_requests": config["max_requests"],
+        "max_requests_jitter": config["max_requests_jitter"],
+    }
+
+    class Server(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from backend.main import app
+            return app
+
+    Server().run()
+
+
+def run_uvicorn(config: dict) -> None:
+    import uvicorn
+
+    # Fail before spawning workers if the app does not import
+    import backend.main  # noqa: F401
+
+    uvicorn.run(
+        APP,
+        host=config["host"],
+        port=config["port"],
+        workers=config["workers"],
+        loop=config["loop"],
+        http=config["http"],
+        timeout_keep_alive=config["keepalive"],
+        backlog=config["backlog"],
+        timeout_graceful_shutdown=config["graceful_timeout"],
+        limit_max_requests=config["max_requests"] or None,
+        access_log=False,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HPN MEC production server")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: SERVER_WORKERS or one per CPU)")
+    parser.add_argument("--host", help="Bind address (default: SERVER_HOST)")
+    parser.add_argument("--port", type=int, help="Port (default: SERVER_PORT)")
+    parser.add_argument("--server", choices=["auto", "gunicorn", "uvicorn"], default="auto",
+                        help="Process manager; auto prefers gunicorn when installed")
+    parser.add_argument("--print-config", action="store_true", help="Print the resolved configuration and exit")
+    args = parser.parse_args()
+
+    config = server_config(args)
+    if args.print_config:
+        print(json.dumps(config, indent=2))
+        return
+
+    print(f"Serving {APP} on {config['host']}:{config['port']} with {config['workers']} "
+          f"{config['server']} worker(s), {config['loop']}/{config['http']}", file=sys.stderr)
+    share_worker_state(config)
+    if config["server"] == "gunicorn":
+        run_gunicorn(config)
+    else:
+        run_uvicorn(config)
+
+
+if __name__ == "__main__":
+    main()
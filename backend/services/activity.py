@@ -0,0 +1,61 @@
+"""
+Recent-activity log for the admin dashboard.
+
+Entries are numbered by the autoincrement ``recent_activities.id``, so
+concurrent writers never wait on each other for a number. Each new entry
+``n`` deletes entry ``n - ADMIN_ACTIVITY_LOG_SIZE``, the one that just fell
+out of the window: a point delete on a row no other writer touches, which
+keeps the table at ``ADMIN_ACTIVITY_LOG_SIZE`` rows and reading the latest
+entries cheap however much activity there has been. Numbers burnt by rolled
+back transactions leave rows nobody prunes that way, so every
+``ADMIN_ACTIVITY_LOG_SIZE``-th entry also sweeps everything older.
+
+Entries are written in the caller's transaction and disappear with it on
+rollback.
+"""
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.core.config import settings
+from backend.models.activity import RecentActivity
+
+
+async def record_activity(db: AsyncSession, user_id: Optional[int], activity: str) -> None:
+    """
+    Append an entry to the log and prune the one that fell out of it.
+    Runs in the caller's transaction; the caller commits.
+    """
+    table = RecentActivity.__table__
+    result = await db.execute(insert(table).values(user_id=user_id, activity=activity[:255]))
+    entry_id = result.inserted_primary_key[0]
+
+    size = settings.ADMIN_ACTIVITY_LOG_SIZE
+    if entry_id % size == 0:
+        await db.execute(delete(table).where(table.c.id <= entry_id - size))
+    else:
+        await db.execute(delete(table).where(table.c.id == entry_id - size))
+
+
+async def recent_activities(db: AsyncSession, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Latest entries, newest first
+
+    Returns:
+        list: ``{"user_id", "activity", "timestamp"}`` per entry
+    """
+    limit = limit or settings.ADMIN_ACTIVITY_LOG_SIZE
+    # The latest entries are the primary key range ending at the newest id,
+    # read without walking the table; ids burnt by rollbacks only shorten it
+    newest = select(func.max(RecentActivity.id)).scalar_subquery()
+    rows = await db.execute(
+        select(RecentActivity.user_id, RecentActivity.activity, RecentActivity.created_at)
+        .where(RecentActivity.id > newest - limit)
+        .order_by(RecentActivity.id.desc())
+        .limit(limit)
+    )
+    return [
+        {"user_id": user_id, "activity": activity, "timestamp": created_at}
+        for user_id, activity, created_at in rows
+    ]
@@ -1,12 +1,23 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from passlib.context import CryptContext
-from datetime import datetime, timedelta
+import time
 from typing import Optional
-from jose import jwt, JWTError
+from jose import JWTError
 
-from backend.models.user import User
+from backend.db.replicas import PRIMARY
+from backend.models.user import User, UserRole
 from backend.schemas.user import UserCreate
-from backend.core.config import settings
+from backend.services.activity import record_activity
+from backend.services.password_executor import password_executor
+from backend.services.principal_cache import Principal, principal_cache
+from backend.services.rollups import RollupDeltas
+from backend.services.token_revocation import is_revoked
+from backend.utils.security import decode_access_token, token_cache, token_digest
+
+# Session.info key holding the user loaded during authentication
+AUTHENTICATED_USER_KEY = "authenticated_user"
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -23,75 +34,134 @@ def get_password_hash(password: str) -> str:
     """
     return pwd_context.hash(password)
 
-def create_user(db: Session, user_data: UserCreate) -> User:
+async def averify_password(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify a password on the hashing pool without blocking the event loop
+    """
+    return await password_executor.run(verify_password, plain_password, hashed_password)
+
+async def ahash_password(password: str) -> str:
+    """
+    Hash a password on the hashing pool without blocking the event loop
+    """
+    return await password_executor.run(get_password_hash, password)
+
+async def create_user(db: AsyncSession, user_data: UserCreate, password_hash: Optional[str] = None) -> User:
     """
-    Create a new user with hashed password
+    Create a new user with hashed password.
+    The password is hashed on the worker pool unless ``password_hash`` is given.
     """
-    # Create a new user model instance
+    if password_hash is None:
+        password_hash = await ahash_password(user_data.password)
+    
+    # Create a new user model instance; defaults (is_active, created_at) are
+    # filled in client-side at flush, so no refresh is needed after commit
     db_user = User(
         email=user_data.email,
         name=user_data.name,
-        password_hash=get_password_hash(user_data.password),
-        role=user_data.role
+        password_hash=password_hash,
+        role=UserRole(user_data.role or UserRole.USER)
     )
     
-    # Add to database
+    # Add to database, counting the registration in the rollups and the activity log
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.flush()
+    await RollupDeltas().add_registration(db_user.created_at, db_user.is_active).apply(db)
+    await record_activity(db, db_user.id, "registered")
+    await db.commit()
     
     return db_user
 
-def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
+async def authenticate_user(db: AsyncSession, email: str, password: str) -> Optional[User]:
     """
-    Authenticate a user by email and password
+    Authenticate a user by email and password, verifying on the hashing pool
     """
     # Find the user by email
-    user = db.query(User).filter(User.email == email).first()
+    user = await db.scalar(select(User).where(User.email == email))
     
     # Return None if user not found or password doesn't match
-    if not user or not verify_password(password, user.password_hash):
+    if not user or not await averify_password(password, user.password_hash):
         return None
     
     return user
 
-def get_user_from_token(db: Session, token: str) -> Optional[User]:
+async def decode_token(db: AsyncSession, token: str) -> dict:
+    """
+    Decode a token like ``decode_access_token``, also checking the shared
+    revocations the first time this process sees the token
+    
+    Raises:
+        JWTError: The token is invalid, expired or revoked
+    """
+    digest = token_digest(token)
+    cached = token_cache.contains(digest)
+    payload = decode_access_token(token)
+    if not cached and await is_revoked(db, digest):
+        raise JWTError("Token has been revoked")
+    return payload
+
+async def get_user_from_token(db: AsyncSession, token: str) -> Optional[User]:
     """
     Validate JWT token and extract user_id
     """
     try:
-        # Decode the JWT token
-        payload = jwt.decode(
-            token, 
-            settings.SECRET_KEY, 
-            algorithms=["HS256"]
-        )
-        
+        # Decode the JWT token (verified once, then served from the token cache)
+        payload = await decode_token(db, token)
+    
         # Extract the user_id from the 'sub' claim
         user_id = int(payload.get("sub"))
-        
-        # Get the user from database
-        return db.query(User).filter(User.id == user_id).first()
     except JWTError:
         # Invalid token
         return None
     except (ValueError, TypeError):
         # Invalid user_id in token
         return None
+    
+    # Get the user from database
+    return await db.get(User, user_id)
+
+async def get_principal_from_token(db: AsyncSession, token: str) -> Optional[Principal]:
+    """
+    Validate JWT token and return the cached principal for it.
+    The database is only queried on a cache miss.
+    """
+    try:
+        payload = await decode_token(db, token)
+        user_id = int(payload.get("sub"))
+    except JWTError:
+        return None
+    except (ValueError, TypeError):
+        return None
+    
+    # Tokens issued together share sub and iat, so they share an entry
+    cache_key = (user_id, payload.get("iat"))
+    principal = principal_cache.get(cache_key)
+    if principal is not None:
+        return principal
+    
+    # Load the whole user and keep it referenced by the session (the identity
+    # map only holds weak references), so an endpoint that needs the profile
+    # gets it from the identity map instead of a second query. Read from the
+    # primary even on a read-only request: a lagging replica could hand back
+    # a just-deactivated user, who would then stay cached as active
+    user = await db.run_sync(Session.get, User, user_id, bind_arguments=PRIMARY)
+    if not user:
+        return None
+    db.info[AUTHENTICATED_USER_KEY] = user
+    
+    principal = Principal(id=user.id, role=user.role, is_active=user.is_active)
+    expires_in = payload["exp"] - time.time() if payload.get("exp") else None
+    principal_cache.put(cache_key, principal, max_ttl=expires_in)
+    return principal
 
-def get_current_user(db: Session, user_id: Optional[int] = None, token: Optional[str] = None) -> Optional[User]:
+async def get_current_user(db: AsyncSession, user_id: Optional[int] = None, token: Optional[str] = None) -> Optional[User]:
     """
     Get user by ID or from token
     """
     if token:
         # Extract user from token
-        return get_user_from_token(db, token)
+        return await get_user_from_token(db, token)
     elif user_id:
         # Get user by ID directly
-        return db.query(User).filter(User.id == user_id).first()
+        return await db.get(User, user_id)
     return None
-
-# These functions would be expanded for JWT token handling in the future
-# For example:
-# - create_access_token(data: dict, expires_delta: Optional[timedelta] = None)
-# - decode_access_token(token: str) -> dict 
\ No newline at end of file
@@ -0,0 +1,116 @@
+"""
+Keyset (cursor) pagination on ``(created_at, id)``, newest first.
+
+Instead of ``OFFSET n``, which makes the database walk and discard ``n``
+rows, each page continues strictly after the last row of the previous one:
+
+    WHERE created_at <= :c AND (created_at < :c OR id < :i)
+    ORDER BY created_at DESC, id DESC
+    LIMIT :limit
+
+The redundant ``created_at <= :c`` gives the planner a plain range bound
+(SQLite and MySQL do not derive one from the OR alone), so with an index
+ending in ``(created_at, id)`` this is an index range seek and page 10,000
+costs the same as page 1. ``id`` breaks ties between rows that share a
+timestamp, which also makes the order deterministic.
+
+Cursors are opaque to clients: URL-safe base64 of the last row's key.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+# Response header carrying the cursor of the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Page size bounds for listing endpoints
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a cursor cannot be decoded"""
+
+
+def encode_cursor(created_at: datetime, id: int) -> str:
+    """
+    Encode a row's sort key as an opaque cursor
+    """
+    raw = json.dumps([created_at.isoformat(), id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a cursor produced by ``encode_cursor``
+
+    Raises:
+        InvalidCursorError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError("Invalid cursor") from e
+
+
+async def paginate(
+    db: AsyncSession,
+    query: Select,
+    model,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> Tuple[List, Optional[str]]:
+    """
+    Fetch one page of ``query`` ordered by ``(created_at, id)`` descending.
+
+    Args:
+        db: Database session
+        query: Select of ``model`` entities, or of columns including
+            ``created_at`` and ``id``, already filtered
+        model: Mapped class with ``created_at`` and ``id`` columns
+        cursor: Cursor returned with the previous page, None for the first page
+        limit: Page size
+
+    Returns:
+        tuple: (entities or Core rows of the page, cursor of the next page or
+            None on the last page)
+
+    Raises:
+        InvalidCursorError: If ``cursor`` is malformed
+    """
+    if cursor:
+        created_at, id = decode_cursor(cursor)
+        query = query.where(
+            model.created_at <= created_at,
+            or_(model.created_at < created_at, model.id < id),
+        )
+
+    # One extra row tells whether another page exists
+    result = await db.execute(
+        query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+    )
+    rows = (result.scalars() if _selects_entity(query) else result).all()
+
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last.created_at, last.id)
+
+
+def _selects_entity(query: Select) -> bool:
+    # select(Model) yields entities; select(Model.a, Model.b) yields rows
+    columns = query.column_descriptions
+    return (
+        len(columns) == 1
+        and columns[0]["entity"] is not None
+        and columns[0]["expr"] is columns[0]["entity"]
+    )
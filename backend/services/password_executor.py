@@ -0,0 +1,93 @@
+"""
+Bounded worker pool for password hashing.
+
+bcrypt is deliberately slow (~200-300 ms per call). Running it inside an
+``async def`` handler blocks the event loop for every other request, so all
+hashing and verification is submitted to a small thread pool instead. The
+bcrypt C extension releases the GIL while it works, so threads give real
+parallelism here without the pickling cost of a process pool.
+
+The pool accepts at most ``workers + queue_limit`` jobs at once. Anything
+beyond that is rejected with ``PasswordHashingBusyError`` (mapped to a 503 by
+the application) instead of queueing without bound.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from backend.core.config import settings
+
+
+class PasswordHashingBusyError(Exception):
+    """Raised when the password hashing queue is full"""
+
+
+class PasswordHashingExecutor:
+    """
+    Thread pool with an admission limit for CPU-bound password work
+    """
+
+    def __init__(self, workers: int, queue_limit: int):
+        self.workers = max(1, workers)
+        self.queue_limit = max(0, queue_limit)
+        self.capacity = self.workers + self.queue_limit
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Threads are started lazily so importing the module stays cheap
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers,
+                thread_name_prefix="password-hash",
+            )
+        return self._executor
+
+    @property
+    def pending(self) -> int:
+        """Number of jobs running or waiting in the queue"""
+        return self._pending
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run ``func(*args)`` on the pool and await its result.
+
+        Raises:
+            PasswordHashingBusyError: If the pool is already at capacity
+        """
+        with self._lock:
+            if self._pending >= self.capacity:
+                raise PasswordHashingBusyError(
+                    "Password hashing queue is full, please retry shortly"
+                )
+            self._pending += 1
+
+        try:
+            future = self._get_executor().submit(func, *args)
+        except BaseException:
+            self._release()
+            raise
+        # Released when the job itself is done, not when the caller stops
+        # waiting: a cancelled request (client disconnect) leaves the job
+        # running, and it must keep its place in the admission count
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, future=None) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def shutdown(self) -> None:
+        """Stop the worker threads"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Shared executor used by the auth service
+password_executor = PasswordHashingExecutor(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    queue_limit=settings.PASSWORD_HASH_QUEUE_LIMIT,
+)
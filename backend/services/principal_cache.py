@@ -0,0 +1,227 @@
+"""
+In-process cache of authenticated principals.
+
+Every authenticated request used to load the full ``User`` row. The cache
+keeps a small, detached ``Principal`` (id, role, is_active) per token, keyed
+by the token's ``sub`` and ``iat`` claims, so steady-state requests do not
+touch the database for authentication.
+
+Entries expire after ``PRINCIPAL_CACHE_TTL_SECONDS`` (never later than the
+token itself) and the least recently used entries are evicted once
+``PRINCIPAL_CACHE_MAX_ENTRIES`` is reached. Changes to a user's role or
+active flag, and user deletion, invalidate that user's entries through
+SQLAlchemy events, so every write path is covered.
+
+The cache is per process. The same events bump the user's generation in
+the ``principal_changes`` table, in the transaction making the change, and
+every worker reads the changes of the last ``PRINCIPAL_CACHE_TTL_SECONDS``
+every ``PRINCIPAL_CACHE_SYNC_SECONDS`` (``run_principal_sync``), dropping
+the entries of users whose generation moved. Older changes cannot concern
+any cached entry; they are pruned when a user is first recorded.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, NamedTuple, Optional, Set
+
+from sqlalchemy import delete, event, insert, inspect, select, update
+from sqlalchemy.orm import Session
+
+from backend.core.config import settings
+from backend.db import database
+from backend.models.principal_change import PrincipalChange
+from backend.models.user import User, UserRole
+
+logger = logging.getLogger(__name__)
+
+
+class Principal(NamedTuple):
+    """Lightweight authenticated identity, safe to share between sessions"""
+    id: int
+    role: UserRole
+    is_active: bool
+
+
+class PrincipalCache:
+    """
+    Thread-safe TTL + LRU cache of principals
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[Principal]:
+        """Return the cached principal for ``key`` or None"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            principal, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return principal
+
+    def put(self, key: Hashable, principal: Principal, max_ttl: Optional[float] = None) -> None:
+        """
+        Cache a principal.
+
+        Args:
+            key: Cache key, usually ``(sub, iat)``
+            principal: Principal to store
+            max_ttl: Upper bound on the lifetime, e.g. seconds until token expiry
+        """
+        if self.max_entries <= 0:
+            return
+
+        ttl = self.ttl_seconds if max_ttl is None else min(self.ttl_seconds, max_ttl)
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (principal, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_user(self, user_id: int) -> int:
+        """Drop every entry for ``user_id`` and return how many were removed"""
+        with self._lock:
+            keys = [key for key, (principal, _) in self._entries.items() if principal.id == user_id]
+            for key in keys:
+                del self._entries[key]
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def clear(self) -> None:
+        """Drop all entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+            }
+
+
+# Shared cache used by the auth service
+principal_cache = PrincipalCache(
+    max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+# Invalidation hooks
+# Entries are dropped as soon as the change is flushed and again after commit,
+# so a request racing with the transaction cannot re-cache the old state.
+_PENDING_KEY = "principal_cache_invalidate"
+
+
+def _mark_user_changed(connection, target: User) -> None:
+    session = inspect(target).session
+    if target.id is not None:
+        principal_cache.invalidate_user(target.id)
+        if session is not None:
+            session.info.setdefault(_PENDING_KEY, set()).add(target.id)
+        _record_change(connection, target.id)
+
+
+def _record_change(connection, user_id: int) -> None:
+    """Bump the user's generation for the other workers, in the current transaction"""
+    table = PrincipalChange.__table__
+    now = int(time.time())
+    bumped = connection.execute(
+        update(table).where(table.c.user_id == user_id).values(generation=table.c.generation + 1, changed_at=now)
+    )
+    if bumped.rowcount == 0:
+        connection.execute(insert(table).values(user_id=user_id, generation=1, changed_at=now))
+        # Changes older than any cached entry concern nobody
+        connection.execute(delete(table).where(table.c.changed_at < now - 2 * _sync_window()))
+
+
+def _sync_window() -> float:
+    """Age of the oldest change a cached entry can predate"""
+    return settings.PRINCIPAL_CACHE_TTL_SECONDS + settings.PRINCIPAL_CACHE_SYNC_SECONDS
+
+
+@event.listens_for(User, "after_update")
+def _user_updated(mapper, connection, target: User) -> None:
+    state = inspect(target)
+    if state.attrs.role.history.has_changes() or state.attrs.is_active.history.has_changes():
+        _mark_user_changed(connection, target)
+
+
+@event.listens_for(User, "after_delete")
+def _user_deleted(mapper, connection, target: User) -> None:
+    _mark_user_changed(connection, target)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    user_ids: Set[int] = session.info.pop(_PENDING_KEY, set())
+    for user_id in user_ids:
+        principal_cache.invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+# Generation of every user changed within the sync window, as last read
+_seen_generations: Dict[int, int] = {}
+
+
+async def sync_principal_changes() -> int:
+    """
+    Drop the cached principals of users changed by any worker since the last
+    call; returns how many users were invalidated
+    """
+    global _seen_generations
+    table = PrincipalChange.__table__
+    async with database.AsyncSessionLocal() as db:
+        rows = await db.execute(
+            select(table.c.user_id, table.c.generation).where(table.c.changed_at >= int(time.time() - _sync_window()))
+        )
+        generations = dict(rows.all())
+
+    changed = [user_id for user_id, generation in generations.items()
+               if _seen_generations.get(user_id) != generation]
+    for user_id in changed:
+        principal_cache.invalidate_user(user_id)
+    _seen_generations = generations
+    return len(changed)
+
+
+async def run_principal_sync() -> None:
+    """Call ``sync_principal_changes`` every ``PRINCIPAL_CACHE_SYNC_SECONDS`` until cancelled"""
+    while True:
+        await asyncio.sleep(settings.PRINCIPAL_CACHE_SYNC_SECONDS)
+        try:
+            await sync_principal_changes()
+        except Exception:
+            # Entries still expire after PRINCIPAL_CACHE_TTL_SECONDS; the next round retries
+            logger.exception("Syncing principal changes failed")
@@ -0,0 +1,121 @@
+"""
+Batch creation of health records.
+
+Wearable bridges send many readings at once. All readings of a batch are
+validated and classified together (``validate_rows``), and the valid ones are
+written in one transaction. Their ids come back from the INSERTs themselves,
+never from one SELECT per row:
+
+- ``RETURNING``, ordered by parameter position, where SQLAlchemy can batch
+  it (PostgreSQL, MariaDB, SQL Server)
+- SQLite and MySQL: multi-row ``INSERT ... VALUES`` statements of
+  ``VALUES_CHUNK_SIZE`` rows. On SQLite the ids of one statement are
+  consecutive, so the ``lastrowid`` (the last id) gives the whole range. On
+  MySQL ``lastrowid`` is the first id, but the others step by
+  ``auto_increment_increment`` (e.g. multi-primary setups) and may interleave
+  with concurrent inserts (``innodb_autoinc_lock_mode`` 2), so they are read
+  back in the same transaction: the owners' rows from the first id on, in
+  id order, which is the order MySQL numbers the rows of one statement
+- otherwise one INSERT per reading, reading ``inserted_primary_key``
+
+Rollups and the activity log are updated in the same transaction. Items are
+reported in request order with their own status, so invalid readings do not
+keep the valid ones out.
+"""
+from typing import Any, Dict, List
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.compiler import InsertmanyvaluesSentinelOpts
+
+from backend.models.health_record import HealthRecord
+from backend.services.activity import record_activity
+from backend.services.record_import import validate_rows
+from backend.services.rollups import RollupDeltas
+
+# Rows per multi-row INSERT, well below SQLite's and MySQL's parameter limits
+VALUES_CHUNK_SIZE = 500
+
+
+async def insert_returning_ids(db: AsyncSession, values: List[Dict[str, Any]]) -> List[int]:
+    """
+    Insert health records and return their ids in the order of ``values``
+    """
+    table = HealthRecord.__table__
+    dialect = db.get_bind().dialect
+
+    # Without an implicit sentinel SQLAlchemy keeps the order by inserting one row at a time
+    if dialect.insert_executemany_returning_sort_by_parameter_order and \
+            dialect.insertmanyvalues_implicit_sentinel & InsertmanyvaluesSentinelOpts.ANY_AUTOINCREMENT:
+        result = await db.execute(insert(table).returning(table.c.id, sort_by_parameter_order=True), values)
+        return list(result.scalars())
+
+    if dialect.name in ("sqlite", "mysql"):
+        ids = []
+        for start in range(0, len(values), VALUES_CHUNK_SIZE):
+            chunk = values[start:start + VALUES_CHUNK_SIZE]
+            owners = {row["user_id"] for row in chunk}
+            result = await db.execute(
+                insert(table).values(chunk)
+                # The values are inline, so name the owners for cache invalidation
+                .execution_options(health_record_user_ids=owners)
+            )
+            if dialect.name == "sqlite":
+                first_id = result.lastrowid - len(chunk) + 1
+                ids.extend(range(first_id, first_id + len(chunk)))
+            else:
+                ids.extend(await db.scalars(
+                    select(table.c.id)
+                    .where(table.c.user_id.in_(owners), table.c.id >= result.lastrowid)
+                    .order_by(table.c.id)
+                    .limit(len(chunk))
+                ))
+        return ids
+
+    ids = []
+    for row in values:
+        result = await db.execute(insert(table), [row])
+        ids.append(result.inserted_primary_key[0])
+    return ids
+
+
+async def create_records(db: AsyncSession, user_id: int, items: List[Any]) -> Dict[str, Any]:
+    """
+    Create the valid readings of ``items`` for ``user_id`` in one transaction
+
+    Returns:
+        dict: Status, created and error counts, and one entry per item in
+        request order: ``{"index", "status": "created", "id", "created_at",
+        "risk_level"}`` or ``{"index", "status": "invalid", "error"}``
+    """
+    valid, invalid = validate_rows(items, 0, user_id)
+    results: List[Dict[str, Any]] = [None] * len(items)
+    for index, message in invalid:
+        results[index] = {"index": index, "status": "invalid", "error": message}
+
+    if valid:
+        values = [row_values for _, row_values in valid]
+        ids = await insert_returning_ids(db, values)
+
+        deltas = RollupDeltas()
+        for row_values in values:
+            deltas.add_record(row_values["created_at"], row_values["risk_level"])
+        await deltas.apply(db)
+        await record_activity(db, user_id, f"created {len(values)} health records in a batch")
+        await db.commit()
+
+        for (index, row_values), record_id in zip(valid, ids):
+            results[index] = {
+                "index": index,
+                "status": "created",
+                "id": record_id,
+                "created_at": row_values["created_at"],
+                "risk_level": row_values["risk_level"],
+            }
+
+    return {
+        "status": "success" if not invalid else ("partial" if valid else "failed"),
+        "created_count": len(valid),
+        "error_count": len(invalid),
+        "items": results,
+    }
@@ -0,0 +1,101 @@
+"""
+Streaming export of health records.
+
+Rows are read through a server-side cursor (``stream_results`` +
+``yield_per``) and encoded straight from Core result tuples, one partition
+at a time, so memory stays flat regardless of how many records a user has
+and the first bytes reach the client as soon as the first partition is
+read.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from backend.core.config import settings
+from backend.db import database
+from backend.db.replicas import use_replica
+from backend.models.health_record import HealthRecord
+
+# Streaming formats and their media types
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# Exported columns, in output order
+EXPORT_COLUMNS = [
+    HealthRecord.id,
+    HealthRecord.user_id,
+    HealthRecord.height,
+    HealthRecord.weight,
+    HealthRecord.heart_rate,
+    HealthRecord.blood_pressure_systolic,
+    HealthRecord.blood_pressure_diastolic,
+    HealthRecord.symptoms,
+    HealthRecord.risk_level,
+    HealthRecord.created_at,
+]
+EXPORT_FIELDS = [column.key for column in EXPORT_COLUMNS]
+
+def negotiate_export_format(format: Optional[str], accept: Optional[str]) -> str:
+    """
+    Pick the export format from the ``format`` query parameter, falling back
+    to the Accept header. Returns "json" when neither asks for a stream.
+    """
+    if format:
+        return format
+    if accept:
+        for media_type in accept.split(","):
+            media_type = media_type.split(";")[0].strip()
+            for name, streaming_type in EXPORT_MEDIA_TYPES.items():
+                if media_type == streaming_type:
+                    return name
+    return "json"
+
+def _to_text(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def _encode_ndjson(rows) -> str:
+    return "".join(
+        json.dumps(dict(zip(EXPORT_FIELDS, map(_to_text, row))), ensure_ascii=False) + "\n"
+        for row in rows
+    )
+
+def _encode_csv(rows) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows([[_to_text(value) for value in row] for row in rows])
+    return buffer.getvalue()
+
+async def stream_user_records(user_id: int, format: str, replica: Optional[AsyncEngine] = None) -> AsyncIterator[bytes]:
+    """
+    Yield a user's health records, newest first, encoded as NDJSON or CSV.
+
+    The generator owns its session: depending on the FastAPI version,
+    request-scoped dependencies are closed before the streaming body has
+    been sent. ``replica`` is the replica engine the request was routed to,
+    if any, so the stream reads from it too.
+    """
+    encode = _encode_ndjson if format == "ndjson" else _encode_csv
+    if format == "csv":
+        yield _encode_csv([EXPORT_FIELDS]).encode()
+
+    query = (
+        select(*EXPORT_COLUMNS)
+        .where(HealthRecord.user_id == user_id)
+        .order_by(HealthRecord.created_at.desc())
+        .execution_options(yield_per=settings.EXPORT_STREAM_BATCH_SIZE)
+    )
+
+    async with database.AsyncSessionLocal() as db:
+        use_replica(db, replica)
+        result = await db.stream(query)
+        async for partition in result.partitions():
+            yield encode(partition).encode()
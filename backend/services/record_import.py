@@ -0,0 +1,196 @@
+"""
+Batched import of health records.
+
+Rows are validated against ``HealthRecordCreate`` in chunks, classified with
+the vectorized risk classifier and written with one executemany INSERT, one
+set of analytics rollup upserts and one commit per chunk. A row that fails validation is reported and skipped
+without affecting the rest of its chunk. If the database rejects a chunk,
+that chunk alone is retried row by row so the failing rows can be reported
+while the others are still imported.
+"""
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.core.config import settings
+from backend.models.health_record import HealthRecord
+from backend.schemas.health_record import HealthRecordCreate
+from backend.services.activity import record_activity
+from backend.services.risk import classify_batch
+from backend.services.rollups import RollupDeltas
+from backend.utils.timestamps import stored_timestamp, utc_now
+
+# camelCase keys sent by the frontend export, mapped to column names
+CAMEL_CASE_ALIASES = {
+    "heartRate": "heart_rate",
+    "bloodPressureSystolic": "blood_pressure_systolic",
+    "bloodPressureDiastolic": "blood_pressure_diastolic",
+    "createdAt": "created_at",
+}
+
+def normalize_row(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Map camelCase keys to snake_case; snake_case wins when both are present
+    """
+    row = dict(raw)
+    for alias, field in CAMEL_CASE_ALIASES.items():
+        if row.get(field) is None and row.get(alias) is not None:
+            row[field] = row[alias]
+    return row
+
+def validate_row(raw: Dict[str, Any], user_id: int) -> Dict[str, Any]:
+    """
+    Validate one imported row and return the column values to insert
+
+    Raises:
+        ValueError: If the row is not a valid health record
+    """
+    row = normalize_row(raw)
+    record = HealthRecordCreate(**{
+        field: row.get(field) for field in HealthRecordCreate.model_fields
+    })
+
+    created_at = row.get("created_at")
+    if created_at:
+        created_at = datetime.fromisoformat(str(created_at).replace("Z", "+00:00"))
+        # Stored as naive UTC: convert timestamps with an offset, keep naive ones
+        if created_at.tzinfo is not None:
+            created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+        created_at = stored_timestamp(created_at)
+    else:
+        # UTC, like the model default of records created one at a time
+        created_at = utc_now()
+
+    return {
+        "user_id": user_id,
+        "created_at": created_at,
+        **record.model_dump(),
+    }
+
+def _format_error(exc: Exception) -> str:
+    if isinstance(exc, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors()
+        )
+    return str(exc)
+
+def validate_rows(rows: List[Any], start: int, user_id: int) -> Tuple[List[Tuple[int, Dict[str, Any]]], List[Tuple[int, str]]]:
+    """
+    Validate and classify rows, keeping their position
+
+    Returns:
+        tuple: ((row index, values to insert) pairs, (row index, error message) pairs)
+    """
+    valid = []
+    invalid = []
+    for offset, raw in enumerate(rows):
+        index = start + offset
+        try:
+            if not isinstance(raw, dict):
+                raise ValueError("Record must be an object")
+            valid.append((index, validate_row(raw, user_id)))
+        except (ValidationError, ValueError, TypeError) as e:
+            invalid.append((index, _format_error(e)))
+
+    if valid:
+        levels = classify_batch(
+            [values["height"] for _, values in valid],
+            [values["weight"] for _, values in valid],
+            [values["heart_rate"] for _, values in valid],
+            [values["blood_pressure_systolic"] for _, values in valid],
+            [values["blood_pressure_diastolic"] for _, values in valid],
+        )
+        for (_, values), level in zip(valid, levels):
+            values["risk_level"] = str(level)
+
+    return valid, invalid
+
+def validate_chunk(rows: List[Dict[str, Any]], start: int, user_id: int) -> Tuple[List[Tuple[int, Dict[str, Any]]], List[str]]:
+    """
+    Validate and classify a chunk of rows
+
+    Returns:
+        tuple: ((row index, values to insert) pairs, error messages)
+    """
+    valid, invalid = validate_rows(rows, start, user_id)
+    return valid, [f"Row {index}: {message}" for index, message in invalid]
+
+async def import_records(
+    db: AsyncSession,
+    user_id: int,
+    rows: List[Dict[str, Any]],
+    batch_size: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Import health records for a user in batches.
+
+    Args:
+        db: Database session
+        user_id: Owner of the imported records
+        rows: Raw records as sent by the client
+        batch_size: Rows per INSERT/commit, defaults to ``IMPORT_BATCH_SIZE``
+
+    Returns:
+        dict: Status, imported count, per-row errors and throughput stats
+    """
+    batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+    table = HealthRecord.__table__
+    imported_count = 0
+    errors = []
+    batches = 0
+    started = time.perf_counter()
+
+    for start in range(0, len(rows), batch_size):
+        indexed, chunk_errors = validate_chunk(rows[start:start + batch_size], start, user_id)
+        errors.extend(chunk_errors)
+        if not indexed:
+            continue
+        values = [row_values for _, row_values in indexed]
+
+        batches += 1
+        try:
+            await db.execute(insert(table), values)
+            deltas = RollupDeltas()
+            for row_values in values:
+                deltas.add_record(row_values["created_at"], row_values["risk_level"])
+            await deltas.apply(db)
+            await db.commit()
+            imported_count += len(values)
+            continue
+        except SQLAlchemyError:
+            await db.rollback()
+
+        # Isolate the rows the database rejected, keep the rest of the chunk
+        for index, row_values in indexed:
+            try:
+                await db.execute(insert(table), [row_values])
+                await RollupDeltas().add_record(row_values["created_at"], row_values["risk_level"]).apply(db)
+                await db.commit()
+                imported_count += 1
+            except SQLAlchemyError as e:
+                await db.rollback()
+                errors.append(f"Row {index}: {e.__class__.__name__}: {getattr(e, 'orig', e)}")
+
+    if imported_count:
+        await record_activity(db, user_id, f"imported {imported_count} health records")
+        await db.commit()
+
+    elapsed = time.perf_counter() - started
+    return {
+        "status": "success" if not errors else "partial",
+        "imported_count": imported_count,
+        "error_count": len(errors),
+        "errors": errors,
+        "stats": {
+            "received": len(rows),
+            "batches": batches,
+            "batch_size": batch_size,
+            "elapsed_seconds": round(elapsed, 4),
+            "rows_per_second": round(imported_count / elapsed, 1) if elapsed > 0 else None,
+        },
+    }
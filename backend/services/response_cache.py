@@ -0,0 +1,347 @@
+"""
+Response cache for read-heavy analytics and admin endpoints.
+
+Cached bodies are keyed by a "data generation": a counter bumped after every
+committed write to ``users``, ``health_records`` or ``recent_activities``
+(detected with SQLAlchemy session events, for ORM objects and Core
+statements alike). A bump makes
+every older entry unreachable, so entries never have to be invalidated one
+by one and are never served stale.
+
+Responses carry an ``ETag`` derived from the generation and the cache key.
+A client that sends it back in ``If-None-Match`` gets ``304 Not Modified``
+without the endpoint running a single query.
+
+Backends (``RESPONSE_CACHE_BACKEND``):
+
+- ``memory``: per-process LRU, the default
+- ``sqlite``: a local SQLite file (``RESPONSE_CACHE_PATH``) shared by all
+  workers on the host, including the generation counter
+- ``off``: no caching, endpoints always run
+
+A SQLite bump is a single ``UPDATE`` of the counter; entries of older
+generations are unreachable and pruned by the next ``set``. Run from a
+request, it goes to a background thread instead of blocking the event loop
+on the file lock, and the next cached response of this process waits for
+it. A bump that fails is logged, never raised after the commit it follows;
+caching is bypassed until a later bump succeeds.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from backend.core.config import settings
+from backend.models.activity import RecentActivity
+from backend.models.health_record import HealthRecord
+from backend.models.user import User
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryCacheBackend:
+    """
+    Thread-safe LRU of response bodies for a single process
+    """
+
+    # bump() is cheap enough to run on the event loop
+    blocking = False
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # A fresh epoch per process keeps ETags from a previous run from matching
+        self._epoch = uuid.uuid4().hex[:8]
+        self._counter = 0
+
+    def generation(self) -> str:
+        return f"{self._epoch}-{self._counter}"
+
+    def bump(self) -> None:
+        with self._lock:
+            self._counter += 1
+            self._entries.clear()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def set(self, key: str, body: bytes) -> None:
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class SQLiteCacheBackend:
+    """
+    Response bodies and the generation counter in a SQLite file, shared by
+    every worker process on the host
+    """
+
+    # bump() may wait on the file lock held by another worker
+    blocking = True
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._inherited = []
+        self._connect()
+        # A SQLite connection must not be used across fork, and the production
+        # server forks workers from a master that imported the app. Children
+        # open their own; the inherited one is kept open, since closing it
+        # could touch files the parent still uses
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reconnect_after_fork)
+
+    def _connect(self) -> None:
+        self._connection = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS response_cache (key TEXT PRIMARY KEY, body BLOB NOT NULL, stored_at REAL NOT NULL)"
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS response_cache_meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+        # The epoch is created once per file and shared by all workers using it
+        self._connection.execute(
+            "INSERT OR IGNORE INTO response_cache_meta (name, value) VALUES ('epoch', ?), ('generation', '0')",
+            (uuid.uuid4().hex[:8],),
+        )
+
+    def _reconnect_after_fork(self) -> None:
+        self._inherited.append(self._connection)
+        self._lock = threading.Lock()
+        self._connect()
+
+    def generation(self) -> str:
+        with self._lock:
+            rows = dict(self._connection.execute("SELECT name, value FROM response_cache_meta").fetchall())
+        return f"{rows['epoch']}-{rows['generation']}"
+
+    def bump(self) -> None:
+        with self._lock:
+            self._connection.execute(
+                "UPDATE response_cache_meta SET value = CAST(value AS INTEGER) + 1 WHERE name = 'generation'"
+            )
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._connection.execute("SELECT body FROM response_cache WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, body: bytes) -> None:
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO response_cache (key, body, stored_at) VALUES (?, ?, ?)",
+                (key, body, time.time()),
+            )
+            # Entries of older generations are unreachable
+            generation = key.split(":", 1)[0]
+            self._connection.execute("DELETE FROM response_cache WHERE key NOT LIKE ?", (generation + ":%",))
+            # Drop the oldest entries beyond capacity
+            self._connection.execute(
+                "DELETE FROM response_cache WHERE key IN ("
+                "SELECT key FROM response_cache ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def size(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+
+
+class ResponseCache:
+    """
+    Generation-versioned JSON response cache with ETag revalidation
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.bump_failures = 0
+        # Set while the generation could not be bumped after a write
+        self._bump_failed = False
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: Set[Future] = set()
+
+    async def respond(
+        self,
+        request: Request,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        cache: bool = True,
+    ) -> Response:
+        """
+        Serve ``key`` from the cache, or run ``compute`` and cache its result.
+
+        Args:
+            request: Incoming request, for ``If-None-Match``
+            key: Cache key; must include everything the result depends on
+                besides the data (e.g. the current month, the user for
+                per-user results)
+            compute: Coroutine function returning the JSON-serializable result
+            cache: False to compute without caching or an ETag, for results
+                that may be older than the current generation (e.g. read
+                from a lagging replica)
+        """
+        # Bumps for writes this process committed come first
+        if self._pending:
+            await asyncio.gather(*(asyncio.wrap_future(future) for future in list(self._pending)))
+
+        if self.backend is None or not cache or self._bump_failed:
+            return JSONResponse(jsonable_encoder(await compute()))
+
+        versioned_key = f"{self.backend.generation()}:{key}"
+        etag = '"' + hashlib.sha1(versioned_key.encode()).hexdigest()[:20] + '"'
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+
+        body = self.backend.get(versioned_key)
+        if body is None:
+            self.misses += 1
+            body = JSONResponse(jsonable_encoder(await compute())).body
+            self.backend.set(versioned_key, body)
+            headers["X-Cache"] = "MISS"
+        else:
+            self.hits += 1
+            headers["X-Cache"] = "HIT"
+
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def bump(self) -> None:
+        """
+        Start a new data generation, making every cached response stale.
+        Never raises; runs in the background when the backend may block and
+        an event loop is running.
+        """
+        if self.backend is None:
+            return
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # Scripts and migrations using sync sessions
+            self._bump_now()
+            return
+        if not self.backend.blocking:
+            self._bump_now()
+            return
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="response-cache-bump")
+        future = self._executor.submit(self._bump_now)
+        self._pending.add(future)
+        future.add_done_callback(self._pending.discard)
+
+    def _bump_now(self) -> None:
+        try:
+            self.backend.bump()
+        except Exception:
+            self.bump_failures += 1
+            self._bump_failed = True
+            logger.exception("Bumping the response cache generation failed; caching is bypassed until the next bump")
+        else:
+            self._bump_failed = False
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        return {
+            "backend": settings.RESPONSE_CACHE_BACKEND,
+            "generation": self.backend.generation() if self.backend is not None else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "bump_failures": self.bump_failures,
+            "size": self.backend.size() if self.backend is not None else 0,
+        }
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return "*" in candidates or any(
+        (candidate[2:] if candidate.startswith("W/") else candidate) == etag
+        for candidate in candidates
+    )
+
+
+def create_backend():
+    """Build the backend selected by ``RESPONSE_CACHE_BACKEND``"""
+    if settings.RESPONSE_CACHE_BACKEND == "off":
+        return None
+    if settings.RESPONSE_CACHE_BACKEND == "sqlite":
+        path = settings.RESPONSE_CACHE_PATH or os.path.join(tempfile.gettempdir(), "hpn_mec_response_cache.db")
+        return SQLiteCacheBackend(path, settings.RESPONSE_CACHE_MAX_ENTRIES)
+    return MemoryCacheBackend(settings.RESPONSE_CACHE_MAX_ENTRIES)
+
+
+# Shared cache used by the analytics and admin endpoints
+response_cache = ResponseCache(create_backend())
+
+# Generation bumps
+# Writes are noted while the transaction runs and the generation is bumped
+# only after commit, so a response computed from uncommitted data is never
+# cached under the new generation.
+_PENDING_KEY = "response_cache_bump"
+TRACKED_TABLES = {User.__tablename__, HealthRecord.__tablename__, RecentActivity.__tablename__}
+
+
+@event.listens_for(Session, "after_flush")
+def _note_orm_writes(session: Session, flush_context) -> None:
+    if any(
+        isinstance(instance, (User, HealthRecord))
+        for instance in (*session.new, *session.dirty, *session.deleted)
+    ):
+        session.info[_PENDING_KEY] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _note_statement_writes(orm_execute_state) -> None:
+    # Core INSERT/UPDATE/DELETE run through a session, e.g. batched imports
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if table is not None and table.name in TRACKED_TABLES:
+            orm_execute_state.session.info[_PENDING_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_after_commit(session: Session) -> None:
+    if session.info.pop(_PENDING_KEY, False):
+        response_cache.bump()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,217 @@
+"""
+Health record risk classification.
+
+Each record gets exactly one risk level: the worst band that any of its
+metrics (heart rate, systolic/diastolic blood pressure, BMI) falls into.
+Missing metrics are ignored and a record with no abnormal metric is
+"normal". Readings below the normal range (e.g. low blood pressure or
+BMI < 18) count as "mild".
+
+The bands are defined once below and compiled into three equivalent forms:
+
+- ``classify_record``: plain Python, used on single writes
+- ``classify_batch``: vectorized NumPy, used for in-memory batches (imports)
+- ``risk_level_case``: a SQL ``CASE`` expression, used to classify stored rows
+  in one pass: the migration 004 backfill, and ``risk_distribution``, a single
+  GROUP BY classifying each record once. The analytics summary reads the
+  same distribution from the rollups, which writes keep current;
+  ``rollup.py status`` compares the two
+
+BMI bands compare the unrounded BMI (normal is 18 <= BMI < 25). The original
+distribution queries compared ``CAST(bmi AS INTEGER)``, which matches on
+SQLite (truncation) but rounds on MySQL, where a BMI from 24.5 to 25 used to
+count as mild. Readings below the normal ranges were not counted at all.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import Select, and_, case, false, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.models.health_record import HealthRecord, RiskLevel
+
+# Levels from worst to best; classification picks the first that matches
+LEVEL_PRECEDENCE = [RiskLevel.SEVERE, RiskLevel.MODERATE, RiskLevel.MILD]
+
+# Bands per metric as (lower bound inclusive, upper bound exclusive, level)
+Band = Tuple[Optional[float], Optional[float], RiskLevel]
+
+BANDS: Dict[str, List[Band]] = {
+    "heart_rate": [
+        (None, 40, RiskLevel.SEVERE),
+        (40, 50, RiskLevel.MODERATE),
+        (50, 60, RiskLevel.MILD),
+        (60, 101, RiskLevel.NORMAL),
+        (101, 111, RiskLevel.MILD),
+        (111, 121, RiskLevel.MODERATE),
+        (121, None, RiskLevel.SEVERE),
+    ],
+    "blood_pressure_systolic": [
+        (None, 90, RiskLevel.MILD),
+        (90, 140, RiskLevel.NORMAL),
+        (140, 160, RiskLevel.MILD),
+        (160, 180, RiskLevel.MODERATE),
+        (180, None, RiskLevel.SEVERE),
+    ],
+    "blood_pressure_diastolic": [
+        (None, 60, RiskLevel.MILD),
+        (60, 90, RiskLevel.NORMAL),
+        (90, 100, RiskLevel.MILD),
+        (100, 110, RiskLevel.MODERATE),
+        (110, None, RiskLevel.SEVERE),
+    ],
+    "bmi": [
+        (None, 18, RiskLevel.MILD),
+        (18, 25, RiskLevel.NORMAL),
+        (25, 30, RiskLevel.MILD),
+        (30, 35, RiskLevel.MODERATE),
+        (35, None, RiskLevel.SEVERE),
+    ],
+}
+
+def _in_band(value, lower, upper):
+    """Apply a band to a scalar, array or SQL expression"""
+    conditions = []
+    if lower is not None:
+        conditions.append(value >= lower)
+    if upper is not None:
+        conditions.append(value < upper)
+    return conditions
+
+def _matches_level(values: Dict[str, float], level: RiskLevel) -> bool:
+    for metric, bands in BANDS.items():
+        value = values.get(metric)
+        if value is None:
+            continue
+        for lower, upper, band_level in bands:
+            if band_level == level and all(_in_band(value, lower, upper)):
+                return True
+    return False
+
+def compute_bmi(height: Optional[float], weight: Optional[float]) -> Optional[float]:
+    """
+    BMI from height in centimeters and weight in kilograms
+    """
+    if not height or weight is None:
+        return None
+    return weight * 10000 / (height * height)
+
+def classify_record(
+    height: Optional[float],
+    weight: Optional[float],
+    heart_rate: Optional[int],
+    blood_pressure_systolic: Optional[int],
+    blood_pressure_diastolic: Optional[int],
+) -> str:
+    """
+    Classify a single reading
+
+    Returns:
+        str: One of the ``RiskLevel`` values
+    """
+    values = {
+        "heart_rate": heart_rate,
+        "blood_pressure_systolic": blood_pressure_systolic,
+        "blood_pressure_diastolic": blood_pressure_diastolic,
+        "bmi": compute_bmi(height, weight),
+    }
+    for level in LEVEL_PRECEDENCE:
+        if _matches_level(values, level):
+            return level.value
+    return RiskLevel.NORMAL.value
+
+def classify_batch(
+    height: Sequence[Optional[float]],
+    weight: Sequence[Optional[float]],
+    heart_rate: Sequence[Optional[int]],
+    blood_pressure_systolic: Sequence[Optional[int]],
+    blood_pressure_diastolic: Sequence[Optional[int]],
+) -> np.ndarray:
+    """
+    Classify many readings at once.
+    Missing values (None/NaN) never match a band, as in ``classify_record``.
+
+    Returns:
+        np.ndarray: Risk level strings, one per input row
+    """
+    def as_array(values):
+        return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+    height_arr = as_array(height)
+    weight_arr = as_array(weight)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bmi = weight_arr * 10000 / (height_arr * height_arr)
+
+    values = {
+        "heart_rate": as_array(heart_rate),
+        "blood_pressure_systolic": as_array(blood_pressure_systolic),
+        "blood_pressure_diastolic": as_array(blood_pressure_diastolic),
+        "bmi": np.where(np.isfinite(bmi), bmi, np.nan),
+    }
+
+    size = len(height_arr)
+    conditions = []
+    for level in LEVEL_PRECEDENCE:
+        matched = np.zeros(size, dtype=bool)
+        for metric, bands in BANDS.items():
+            for lower, upper, band_level in bands:
+                if band_level != level:
+                    continue
+                in_band = np.ones(size, dtype=bool)
+                for condition in _in_band(values[metric], lower, upper):
+                    in_band &= condition
+                matched |= in_band
+        conditions.append(matched)
+
+    return np.select(
+        conditions,
+        [level.value for level in LEVEL_PRECEDENCE],
+        default=RiskLevel.NORMAL.value,
+    )
+
+def risk_level_case(columns):
+    """
+    SQL CASE expression classifying a row, equivalent to ``classify_record``.
+
+    Args:
+        columns: Object exposing the health record columns as attributes,
+            e.g. the ``HealthRecord`` model or ``health_records.c``
+    """
+    values = {
+        "heart_rate": columns.heart_rate,
+        "blood_pressure_systolic": columns.blood_pressure_systolic,
+        "blood_pressure_diastolic": columns.blood_pressure_diastolic,
+        # NULL height/weight give a NULL BMI, which matches no band
+        "bmi": columns.weight * 10000 / (columns.height * columns.height),
+    }
+
+    whens = []
+    for level in LEVEL_PRECEDENCE:
+        matches = [
+            and_(*_in_band(values[metric], lower, upper))
+            for metric, bands in BANDS.items()
+            for lower, upper, band_level in bands
+            if band_level == level
+        ]
+        whens.append((or_(false(), *matches), level.value))
+
+    return case(*whens, else_=RiskLevel.NORMAL.value)
+
+def risk_distribution_query(columns=HealthRecord) -> Select:
+    """
+    (risk level, count) rows classifying every record with ``risk_level_case``,
+    whatever its stored ``risk_level``
+    """
+    level = risk_level_case(columns).label("level")
+    return select(level, func.count()).select_from(HealthRecord).group_by(level)
+
+async def risk_distribution(db: AsyncSession) -> Dict[str, int]:
+    """
+    Number of health records per risk level, classified in one GROUP BY
+
+    Returns:
+        dict: Count per ``RiskLevel`` value, including empty levels
+    """
+    counts = {level.value: 0 for level in RiskLevel}
+    counts.update((level, count) for level, count in await db.execute(risk_distribution_query()))
+    return counts
@@ -0,0 +1,252 @@
+"""
+Precomputed analytics rollups.
+
+Writes to ``health_records`` and ``users`` keep two small tables up to date
+in the same transaction:
+
+- ``daily_counts``: one row per (day, metric) for the metrics
+  "records", "registrations" and "risk:<level>"
+- ``total_counts``: all-time value per metric: "records", "users",
+  "active_users" and "risk:<level>"
+
+Callers collect changes in a ``RollupDeltas`` and ``apply`` it before they
+commit. Deltas are summed per key first, so an import of thousands of rows
+costs a handful of upserts. The upserts are dialect-specific
+(``ON CONFLICT DO UPDATE`` / ``ON DUPLICATE KEY UPDATE``) and add to the
+stored value, so concurrent writers never overwrite each other's counts.
+
+``rebuild`` recomputes every rollup from the raw tables; it is exposed as
+``python -m backend.rollup rebuild``.
+"""
+from collections import Counter
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import case, func, insert, literal, literal_column, select, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.models.analytics_rollup import DailyCount, TotalCount
+from backend.models.health_record import HealthRecord, RiskLevel
+from backend.models.user import User
+
+# Metric names
+RECORDS = "records"
+REGISTRATIONS = "registrations"
+USERS = "users"
+ACTIVE_USERS = "active_users"
+
+def risk_metric(risk_level: str) -> str:
+    """Metric name of a risk bucket"""
+    return f"risk:{risk_level}"
+
+RISK_METRICS = {level.value: risk_metric(level.value) for level in RiskLevel}
+
+
+class RollupDeltas:
+    """
+    Pending changes to the rollup tables
+    """
+
+    def __init__(self):
+        self.daily: Counter = Counter()
+        self.totals: Counter = Counter()
+
+    def add_record(self, created_at: datetime, risk_level: Optional[str], sign: int = 1) -> "RollupDeltas":
+        """Count a health record created (sign=1) or deleted (sign=-1)"""
+        day = created_at.date()
+        self.daily[(day, RECORDS)] += sign
+        self.totals[RECORDS] += sign
+        if risk_level:
+            self.daily[(day, risk_metric(risk_level))] += sign
+            self.totals[risk_metric(risk_level)] += sign
+        return self
+
+    def change_risk_level(self, created_at: datetime, old: Optional[str], new: Optional[str]) -> "RollupDeltas":
+        """Move a record from one risk bucket to another"""
+        if old != new:
+            day = created_at.date()
+            for level, sign in ((old, -1), (new, 1)):
+                if level:
+                    self.daily[(day, risk_metric(level))] += sign
+                    self.totals[risk_metric(level)] += sign
+        return self
+
+    def add_registration(self, created_at: datetime, is_active: bool = True, sign: int = 1) -> "RollupDeltas":
+        """Count a user registered (sign=1) or deleted (sign=-1)"""
+        self.daily[(created_at.date(), REGISTRATIONS)] += sign
+        self.totals[USERS] += sign
+        if is_active:
+            self.totals[ACTIVE_USERS] += sign
+        return self
+
+    def change_active(self, was_active: bool, is_active: bool) -> "RollupDeltas":
+        """Count a user activated or deactivated"""
+        if was_active != is_active:
+            self.totals[ACTIVE_USERS] += 1 if is_active else -1
+        return self
+
+    async def apply(self, db: AsyncSession) -> None:
+        """
+        Add the pending deltas to the rollup tables and reset them.
+        Runs in the caller's transaction; the caller commits.
+
+        Rows are upserted in key order, so concurrent transactions lock the
+        rollup rows they share in the same order and cannot deadlock on
+        them (e.g. two updates moving records normal->mild and mild->normal).
+        """
+        daily = [
+            {"day": day, "metric": metric, "value": value}
+            for (day, metric), value in sorted(self.daily.items()) if value
+        ]
+        totals = [{"metric": metric, "value": value} for metric, value in sorted(self.totals.items()) if value]
+
+        if daily:
+            await _increment(db, DailyCount.__table__, ["day", "metric"], daily)
+        if totals:
+            await _increment(db, TotalCount.__table__, ["metric"], totals)
+
+        self.daily.clear()
+        self.totals.clear()
+
+
+async def _increment(db: AsyncSession, table, key_columns: List[str], rows: List[Dict[str, Any]]) -> None:
+    """Upsert ``rows``, adding ``value`` to existing rows with the same key"""
+    dialect = db.bind.dialect.name
+
+    if dialect in ("sqlite", "postgresql"):
+        dialect_insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        statement = dialect_insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=key_columns,
+            set_={"value": table.c.value + statement.excluded.value},
+        )
+        await db.execute(statement, rows)
+    elif dialect == "mysql":
+        statement = mysql.insert(table)
+        statement = statement.on_duplicate_key_update(value=table.c.value + statement.inserted.value)
+        await db.execute(statement, rows)
+    else:
+        # Portable fallback: update, then insert the rows that did not exist
+        for row in rows:
+            key = [table.c[column] == row[column] for column in key_columns]
+            result = await db.execute(update(table).where(*key).values(value=table.c.value + row["value"]))
+            if result.rowcount == 0:
+                await db.execute(insert(table).values(**row))
+
+
+async def read_totals(db: AsyncSession, metrics: List[str]) -> Dict[str, int]:
+    """
+    Current value of all-time counters in one query (0 for missing ones)
+    """
+    rows = await db.execute(
+        select(TotalCount.metric, TotalCount.value).where(TotalCount.metric.in_(metrics))
+    )
+    values = dict(rows.all())
+    return {metric: int(values.get(metric, 0)) for metric in metrics}
+
+
+async def sum_per_month(db: AsyncSession, metric: str, month_starts: List[datetime]) -> List[Dict[str, Any]]:
+    """
+    Monthly totals of a daily metric, read from ``daily_counts``.
+    Reads at most one row per day in the range.
+
+    Args:
+        db: Database session
+        metric: Metric name, e.g. ``RECORDS``
+        month_starts: Boundaries from ``get_month_starts``
+
+    Returns:
+        list: ``{"month": "Jan 2024", "count": n}`` per month, oldest first
+    """
+    months = len(month_starts) - 1
+    starts = [start.date() for start in month_starts]
+    bucket = case(
+        *[(DailyCount.day < starts[i + 1], i) for i in range(months)]
+    ).label("bucket")
+
+    rows = await db.execute(
+        select(bucket, func.sum(DailyCount.value))
+        .where(DailyCount.metric == metric, DailyCount.day >= starts[0], DailyCount.day < starts[-1])
+        .group_by(literal_column("bucket"))
+    )
+    counts = {row[0]: int(row[1] or 0) for row in rows}
+
+    return [
+        {"month": month_starts[i].strftime("%b %Y"), "count": counts.get(i, 0)}
+        for i in range(months)
+    ]
+
+
+async def risk_level_totals(db: AsyncSession) -> Dict[str, int]:
+    """
+    All-time number of health records per risk level, read from ``total_counts``
+
+    Returns:
+        dict: Count per ``RiskLevel`` value (levels without records are 0)
+    """
+    values = await read_totals(db, list(RISK_METRICS.values()))
+    return {level: values[metric] for level, metric in RISK_METRICS.items()}
+
+
+def rebuild(connection) -> Tuple[int, int]:
+    """
+    Recompute all rollups from ``health_records`` and ``users``.
+    Runs on a sync connection inside the caller's transaction.
+    Writes that happen while it runs may be missed; run it offline.
+
+    Returns:
+        tuple: (daily rows written, total rows written)
+    """
+    daily_table = DailyCount.__table__
+    total_table = TotalCount.__table__
+    total_metrics = [RECORDS, USERS, ACTIVE_USERS, *RISK_METRICS.values()]
+    connection.execute(daily_table.delete())
+    connection.execute(total_table.delete().where(total_table.c.metric.in_(total_metrics)))
+
+    record_day = func.date(HealthRecord.created_at)
+    user_day = func.date(User.created_at)
+    sources = [
+        select(record_day, literal(RECORDS), func.count()).group_by(record_day),
+        select(user_day, literal(REGISTRATIONS), func.count()).group_by(user_day),
+        select(record_day, literal("risk:") + HealthRecord.risk_level, func.count())
+        .where(HealthRecord.risk_level.isnot(None))
+        .group_by(record_day, HealthRecord.risk_level),
+    ]
+
+    daily_rows = 0
+    for source in sources:
+        rows = [
+            {"day": _as_date(day), "metric": metric, "value": value}
+            for day, metric, value in connection.execute(source)
+        ]
+        if rows:
+            connection.execute(insert(daily_table), rows)
+        daily_rows += len(rows)
+
+    totals = [
+        {"metric": risk_metric(level), "value": value}
+        for level, value in connection.execute(
+            select(HealthRecord.risk_level, func.count())
+            .where(HealthRecord.risk_level.isnot(None))
+            .group_by(HealthRecord.risk_level)
+        )
+    ]
+    totals += [
+        {"metric": RECORDS, "value": connection.execute(select(func.count()).select_from(HealthRecord)).scalar()},
+        {"metric": USERS, "value": connection.execute(select(func.count()).select_from(User)).scalar()},
+        {"metric": ACTIVE_USERS, "value": connection.execute(
+            select(func.count()).select_from(User).where(User.is_active.is_(True))
+        ).scalar()},
+    ]
+    if totals:
+        connection.execute(insert(total_table), totals)
+
+    return daily_rows, len(totals)
+
+
+def _as_date(value) -> date:
+    # DATE() comes back as a string on SQLite and as a date on MySQL
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    return value
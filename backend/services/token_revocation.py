@@ -0,0 +1,96 @@
+"""
+Token revocations shared by all workers.
+
+``utils/security.py`` rejects revoked tokens from an in-process list, which
+on its own leaves a token revoked on logout valid in every other worker,
+and in all of them after a restart. Revocations are therefore stored in the
+``revoked_tokens`` table, keyed by the token digest, with the list as a
+local copy:
+
+- ``revoke_token`` (logout) adds the row, pruning rows of expired tokens
+- ``is_revoked`` checks the table the first time a worker sees a token (a
+  token cache miss), before its claims are trusted
+- ``sync_revocations`` loads the unexpired rows into the list, at startup
+  and every ``TOKEN_REVOCATION_SYNC_SECONDS`` (``run_revocation_sync``), so a
+  token another worker already cached is rejected there within that interval
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict
+
+from jose import JWTError
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.core.config import settings
+from backend.db import database
+from backend.db.replicas import PRIMARY
+from backend.models.revoked_token import RevokedToken
+from backend.utils.security import revoke_access_token, token_cache, token_digest
+
+logger = logging.getLogger(__name__)
+
+# Stored expiry of a token without an ``exp`` claim
+NEVER = 2**31 - 1
+
+
+async def revoke_token(db: AsyncSession, token: str) -> Dict[str, Any]:
+    """
+    Revoke a valid access token in every worker and commit
+    
+    Returns:
+        dict: The claims of the revoked token
+    
+    Raises:
+        JWTError: The token is already invalid, expired or revoked
+    """
+    claims = revoke_access_token(token)
+    
+    # Expired tokens fail verification anyway
+    await db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= int(time.time())))
+    db.add(RevokedToken(digest=token_digest(token).hex(), expires_at=int(claims.get("exp", NEVER))))
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Revoked by another worker, which this one has not synced yet
+        await db.rollback()
+        raise JWTError("Token has been revoked")
+    return claims
+
+
+async def is_revoked(db: AsyncSession, digest: bytes) -> bool:
+    """
+    Whether the token was revoked by any worker; a revoked token is added to
+    the local list
+    """
+    # From the primary: a lagging replica may miss a fresh revocation
+    expires_at = await db.scalar(
+        select(RevokedToken.expires_at).where(RevokedToken.digest == digest.hex()),
+        bind_arguments=PRIMARY,
+    )
+    if expires_at is None:
+        return False
+    token_cache.sync_revoked({digest: expires_at})
+    return True
+
+
+async def sync_revocations() -> int:
+    """Load the revocations of unexpired tokens into the local list; returns how many were new"""
+    async with database.AsyncSessionLocal() as db:
+        rows = await db.execute(
+            select(RevokedToken.digest, RevokedToken.expires_at).where(RevokedToken.expires_at > int(time.time()))
+        )
+        return token_cache.sync_revoked({bytes.fromhex(digest): expires_at for digest, expires_at in rows})
+
+
+async def run_revocation_sync() -> None:
+    """Call ``sync_revocations`` every ``TOKEN_REVOCATION_SYNC_SECONDS`` until cancelled"""
+    while True:
+        await asyncio.sleep(settings.TOKEN_REVOCATION_SYNC_SECONDS)
+        try:
+            await sync_revocations()
+        except Exception:
+            # Keep serving with the current list; the next round retries
+            logger.exception("Syncing token revocations failed")
@@ -0,0 +1,410 @@
+"""
+Per-user health trends computed with NumPy.
+
+A user's readings are loaded in one query as columnar arrays (timestamps plus
+one float array per metric, BMI derived from height and weight) and kept in
+an in-process LRU, ``series_cache``, bounded by ``TRENDS_CACHE_MAX_ENTRIES``
+users and ``TRENDS_CACHE_MAX_BYTES`` of arrays (a series larger than that is
+not cached). Trends are then computed from the arrays in vectorized code:
+
+- resampling to day, week (starting Monday) or month buckets, averaging the
+  readings in each bucket; buckets without readings are omitted
+- moving averages over the last ``window`` buckets
+- summary statistics over the whole series
+- week-over-week deltas: the mean of the last 7 days against the 7 days
+  before, counted back from the latest reading
+
+Computing from cached arrays takes a few milliseconds even for 100k
+readings, so the cache holds series rather than finished responses and any
+bucket/window combination is served without a query.
+
+Writes to ``health_records`` drop the affected users' series when they are
+flushed and again after commit. Each user also has a version that every
+invalidation bumps; a series loaded while a write was in flight is not
+cached, so a stale series is never stored. Invalidation only reaches the
+process that wrote, so series also expire after ``TRENDS_CACHE_TTL_SECONDS``:
+with several workers, or writes made outside the API, a worker serves a
+user's trends at most that much out of date.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import String, event, select, type_coerce
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from backend.core.config import settings
+from backend.models.health_record import HealthRecord
+
+# Metrics in the order they appear in responses; "bmi" is derived
+METRICS = ["weight", "bmi", "heart_rate", "blood_pressure_systolic", "blood_pressure_diastolic"]
+
+# Resampling periods
+BUCKETS = ("day", "week", "month")
+
+WEEK = np.timedelta64(7, "D")
+
+
+class Series(NamedTuple):
+    """A user's readings as columnar arrays, oldest first"""
+    timestamps: np.ndarray  # datetime64[us]
+    values: Dict[str, np.ndarray]  # float64 per metric, NaN when missing
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the arrays"""
+        return self.timestamps.nbytes + sum(array.nbytes for array in self.values.values())
+
+
+class SeriesCache:
+    """
+    Thread-safe LRU of user series with per-user versions and a TTL, bounded
+    by entries and by the bytes of their arrays
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, max_bytes: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._versions: Dict[int, int] = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+        self.too_large = 0
+
+    def _drop(self, user_id: int) -> Optional[tuple]:
+        entry = self._entries.pop(user_id, None)
+        if entry is not None:
+            self._bytes -= entry[0].nbytes
+        return entry
+
+    def get(self, user_id: int) -> Optional[Series]:
+        """Return the cached series of ``user_id`` or None"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            series, expires_at = entry
+            if expires_at <= now:
+                self._drop(user_id)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return series
+
+    def version(self, user_id: int) -> Tuple[int, int]:
+        """Current version of ``user_id``; take it before loading a series"""
+        with self._lock:
+            return self._epoch, self._versions.get(user_id, 0)
+
+    def put(self, user_id: int, series: Series, version: Tuple[int, int]) -> None:
+        """Cache a series loaded at ``version``, unless the user changed since"""
+        if self.max_entries <= 0 or self.ttl_seconds <= 0:
+            return
+        size = series.nbytes
+        with self._lock:
+            if size > self.max_bytes:
+                self.too_large += 1
+                return
+            if (self._epoch, self._versions.get(user_id, 0)) != version:
+                return
+            self._drop(user_id)
+            self._entries[user_id] = (series, time.monotonic() + self.ttl_seconds)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Drop the series of ``user_id`` and bump its version"""
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+            if self._drop(user_id) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        """Drop all series and outdate every version"""
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+                "too_large": self.too_large,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+
+# Shared cache used by the trends endpoint
+series_cache = SeriesCache(
+    max_entries=settings.TRENDS_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.TRENDS_CACHE_TTL_SECONDS,
+    max_bytes=settings.TRENDS_CACHE_MAX_BYTES,
+)
+
+
+async def load_series(db: AsyncSession, user_id: int) -> Series:
+    """
+    Load all readings of ``user_id`` in one query, through the cache
+    """
+    series = series_cache.get(user_id)
+    if series is not None:
+        return series
+
+    version = series_cache.version(user_id)
+    result = await db.execute(
+        select(
+            # Raw value: SQLite's stored string parses much faster in NumPy
+            # than through datetime objects; other drivers return datetimes
+            type_coerce(HealthRecord.created_at, String),
+            HealthRecord.height,
+            HealthRecord.weight,
+            HealthRecord.heart_rate,
+            HealthRecord.blood_pressure_systolic,
+            HealthRecord.blood_pressure_diastolic,
+        )
+        .where(HealthRecord.user_id == user_id)
+        .order_by(HealthRecord.created_at, HealthRecord.id)
+    )
+    rows = result.all()
+
+    created_at = [row[0] for row in rows]
+    if created_at and isinstance(created_at[0], datetime) and created_at[0].tzinfo:
+        created_at = [_naive(value) for value in created_at]
+    timestamps = np.array(created_at, dtype="datetime64[us]")
+
+    # One float matrix for all metrics; NULL becomes NaN
+    matrix = np.array([row[1:] for row in rows], dtype=np.float64).reshape(len(rows), 5)
+    height, weight, heart_rate, systolic, diastolic = matrix.T.copy()
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bmi = weight / (height / 100) ** 2
+    values = {
+        "weight": weight,
+        "bmi": np.where(np.isfinite(bmi), bmi, np.nan),
+        "heart_rate": heart_rate,
+        "blood_pressure_systolic": systolic,
+        "blood_pressure_diastolic": diastolic,
+    }
+
+    series = Series(timestamps=timestamps, values=values)
+    series_cache.put(user_id, series, version)
+    return series
+
+
+def compute_trends(series: Series, bucket: str = "week", window: int = 4,
+                   since: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Resampled series, moving averages, summary statistics and week-over-week
+    deltas of every metric
+
+    Args:
+        series: Readings from ``load_series``
+        bucket: "day", "week" or "month"
+        window: Number of buckets in each moving average
+        since: Ignore readings before this time
+
+    Returns:
+        dict: ``count``, ``first``/``last`` reading times, ``periods`` (bucket
+        start dates), per-metric ``series`` (bucket mean and moving average),
+        ``summary`` and ``week_over_week``
+    """
+    timestamps, values = series.timestamps, series.values
+    if since is not None:
+        start = np.searchsorted(timestamps, np.datetime64(_naive(since), "us"))
+        timestamps = timestamps[start:]
+        values = {metric: array[start:] for metric, array in values.items()}
+
+    count = len(timestamps)
+    result = {
+        "bucket": bucket,
+        "window": window,
+        "count": count,
+        "first": timestamps[0].item() if count else None,
+        "last": timestamps[-1].item() if count else None,
+        "periods": [],
+        "series": {},
+        "summary": {},
+        "week_over_week": {},
+    }
+    if not count:
+        return result
+
+    # Bucket boundaries: timestamps are sorted, so each bucket is a contiguous run
+    keys = _bucket_starts(timestamps, bucket)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    result["periods"] = [str(day) for day in keys[starts].astype("datetime64[D]")]
+
+    # Week-over-week windows, counted back from the latest reading
+    latest = timestamps[-1]
+    this_week = timestamps > latest - WEEK
+    last_week = (timestamps > latest - 2 * WEEK) & ~this_week
+
+    for metric in METRICS:
+        array = values[metric]
+        present = ~np.isnan(array)
+
+        # Bucket means (NaN where a bucket has no value for this metric)
+        sums = np.add.reduceat(np.where(present, array, 0.0), starts)
+        counts = np.add.reduceat(present.astype(np.int64), starts)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            means = sums / counts
+
+        result["series"][metric] = {
+            "mean": _to_list(means),
+            "moving_average": _to_list(_moving_average(means, window)),
+        }
+
+        if present.any():
+            valid = array[present]
+            result["summary"][metric] = {
+                "count": int(valid.size),
+                "mean": _round(valid.mean()),
+                "min": _round(valid.min()),
+                "max": _round(valid.max()),
+                "std": _round(valid.std()),
+                "latest": _round(valid[-1]),
+                "change": _round(valid[-1] - valid[0]),
+            }
+        else:
+            result["summary"][metric] = {"count": 0}
+
+        current = _mean(array[this_week])
+        previous = _mean(array[last_week])
+        result["week_over_week"][metric] = {
+            "current": _round(current),
+            "previous": _round(previous),
+            "delta": _round(current - previous),
+        }
+
+    return result
+
+
+def _bucket_starts(timestamps: np.ndarray, bucket: str) -> np.ndarray:
+    """Start of the bucket of each timestamp, as datetime64[D]"""
+    days = timestamps.astype("datetime64[D]")
+    if bucket == "day":
+        return days
+    if bucket == "month":
+        return days.astype("datetime64[M]").astype("datetime64[D]")
+    # 1970-01-01 was a Thursday; shift so weeks start on Monday
+    return days - (days.astype(np.int64) + 3) % 7
+
+
+def _moving_average(means: np.ndarray, window: int) -> np.ndarray:
+    """Trailing mean of the last ``window`` buckets, skipping NaN"""
+    present = ~np.isnan(means)
+    sums = np.cumsum(np.where(present, means, 0.0))
+    counts = np.cumsum(present)
+    sums[window:] = sums[window:] - sums[:-window]
+    counts[window:] = counts[window:] - counts[:-window]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return sums / counts
+
+
+def _mean(array: np.ndarray) -> float:
+    array = array[~np.isnan(array)]
+    return float(array.mean()) if array.size else float("nan")
+
+
+def _round(value) -> Optional[float]:
+    value = float(value)
+    return None if np.isnan(value) else round(value, 2)
+
+
+def _to_list(array: np.ndarray) -> List[Optional[float]]:
+    rounded = np.round(array, 2)
+    return [None if np.isnan(value) else value for value in rounded.tolist()]
+
+
+def _naive(value: datetime) -> datetime:
+    # Stored timestamps are naive UTC; convert aware values to UTC before
+    # dropping tzinfo (which NumPy would warn about)
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+
+# Invalidation hooks
+# ORM writes are seen per object at flush; Core statements (batched imports)
+# carry the owner in their parameters or, when their values are inlined, in
+# the ``health_record_user_ids`` execution option. Series are dropped at
+# flush and again after commit, bumping the user's version each time.
+# ``None`` in the pending set stands for "every user".
+_PENDING_KEY = "trends_invalidate"
+
+
+def _invalidate(session: Session, user_ids: Set[Optional[int]]) -> None:
+    for user_id in user_ids:
+        if user_id is None:
+            series_cache.clear()
+        else:
+            series_cache.invalidate_user(user_id)
+    session.info.setdefault(_PENDING_KEY, set()).update(user_ids)
+
+
+@event.listens_for(Session, "after_flush")
+def _note_orm_writes(session: Session, flush_context) -> None:
+    user_ids = {
+        instance.user_id
+        for instance in (*session.new, *session.dirty, *session.deleted)
+        if isinstance(instance, HealthRecord) and instance.user_id is not None
+    }
+    if user_ids:
+        _invalidate(session, user_ids)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _note_statement_writes(orm_execute_state) -> None:
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    table = getattr(orm_execute_state.statement, "table", None)
+    if table is None or table.name != HealthRecord.__tablename__:
+        return
+
+    # Statements with inline values (multi-row VALUES) name their owners
+    user_ids = orm_execute_state.execution_options.get("health_record_user_ids")
+    if user_ids is None:
+        parameters = orm_execute_state.parameters
+        rows = parameters if isinstance(parameters, list) else [parameters or {}]
+        # None when the owner is unknown, e.g. a bulk UPDATE by criteria
+        user_ids = {row.get("user_id") for row in rows}
+    _invalidate(orm_execute_state.session, set(user_ids))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    user_ids = session.info.pop(_PENDING_KEY, set())
+    if None in user_ids:
+        series_cache.clear()
+    else:
+        for user_id in user_ids:
+            series_cache.invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -1,11 +1,39 @@
-"""JWT token creation and validation utilities."""
+"""
+JWT token creation and validation utilities.
+
+Verifying a token means checking its HMAC signature and parsing its claims
+on every request, although clients present the same token many times.
+``decode_access_token`` keeps the claims of verified tokens in a bounded LRU
+cache keyed by the SHA-256 digest of the token until the token expires, so a
+repeated token skips verification. Revoked tokens (``revoke_access_token``,
+e.g. on logout) are dropped from the cache and rejected until they expire.
+The cache and this revocation list are kept per process; the list is a
+local copy of the ``revoked_tokens`` table shared by all workers, which
+services/token_revocation.py writes on logout, checks when a worker sees a
+token for the first time and loads into the list periodically.
+
+Tokens are verified with python-jose unless ``JWT_BACKEND=pyjwt`` selects
+PyJWT; the setting is ignored when PyJWT is not installed. Both accept the
+same HS256 tokens and report failures as ``JWTError``.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Any, Optional, Union
+from typing import Any, Dict, Optional, Union
 
-from jose import jwt
+from jose import JWTError, jwt
 
 from backend.core.config import settings
 
+try:
+    import jwt as pyjwt
+except ImportError:  # pragma: no cover
+    pyjwt = None
+
+ALGORITHM = "HS256"
+
 def create_access_token(subject: Union[str, Any], expires_delta: Optional[int] = None) -> str:
     """
     Create a new JWT access token.
@@ -35,7 +63,187 @@ def create_access_token(subject: Union[str, Any], expires_delta: Optional[int] =
     encoded_jwt = jwt.encode(
         to_encode, 
         settings.SECRET_KEY, 
-        algorithm="HS256"
+        algorithm=ALGORITHM
     )
     
-    return encoded_jwt 
\ No newline at end of file
+    # A token just issued is valid and cannot have been revoked yet, so its
+    # first use skips both verification and the shared revocation check
+    claims = verify_access_token(encoded_jwt)
+    token_cache.put(token_digest(encoded_jwt), claims, claims["exp"])
+    
+    return encoded_jwt
+
+
+class TokenCache:
+    """
+    Thread-safe LRU cache of verified token claims, plus the list of revoked
+    tokens, both keyed by token digest
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._revoked: Dict[bytes, float] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.revocations = 0
+        self.synced_revocations = 0
+
+    def get(self, digest: bytes) -> Optional[Dict[str, Any]]:
+        """Return the cached claims for ``digest`` or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            claims, expires_at = entry
+            if expires_at <= now:
+                del self._entries[digest]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return claims
+
+    def put(self, digest: bytes, claims: Dict[str, Any], expires_at: float) -> None:
+        """Cache verified claims until ``expires_at`` (a Unix timestamp)"""
+        if self.max_entries <= 0:
+            return
+
+        with self._lock:
+            # Revoked while it was being verified
+            if digest in self._revoked:
+                return
+            self._entries[digest] = (claims, expires_at)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def revoke(self, digest: bytes, expires_at: float) -> None:
+        """Reject the token from now until ``expires_at`` and drop its entry"""
+        now = time.time()
+        with self._lock:
+            self._entries.pop(digest, None)
+            self._revoked[digest] = expires_at
+            self.revocations += 1
+            # Expired tokens fail verification anyway
+            for key in [key for key, until in self._revoked.items() if until <= now]:
+                del self._revoked[key]
+
+    def is_revoked(self, digest: bytes) -> bool:
+        """Whether the token was revoked"""
+        return digest in self._revoked
+
+    def contains(self, digest: bytes) -> bool:
+        """Whether claims are cached for ``digest``, without touching the counters"""
+        return digest in self._entries
+
+    def sync_revoked(self, revoked: Dict[bytes, float]) -> int:
+        """
+        Add revocations made elsewhere (digest -> expiry) to the local list and
+        drop their cached claims; returns how many were new
+        """
+        now = time.time()
+        added = 0
+        with self._lock:
+            for digest, expires_at in revoked.items():
+                if expires_at <= now:
+                    continue
+                added += digest not in self._revoked
+                self._revoked[digest] = expires_at
+                self._entries.pop(digest, None)
+            self.synced_revocations += added
+        return added
+
+    def clear(self) -> None:
+        """Drop all cached claims (revocations are kept)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters, current size and revoked tokens"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "revocations": self.revocations,
+                "synced_revocations": self.synced_revocations,
+                "revoked": len(self._revoked),
+                "backend": jwt_backend(),
+            }
+
+
+# Shared cache used by decode_access_token
+token_cache = TokenCache(max_entries=settings.TOKEN_CACHE_MAX_ENTRIES)
+
+
+def jwt_backend() -> str:
+    """Library verifying tokens: pyjwt when selected and installed, otherwise jose"""
+    return "pyjwt" if settings.JWT_BACKEND == "pyjwt" and pyjwt is not None else "jose"
+
+
+def verify_access_token(token: str, backend: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Check the signature and registered claims of a token, without the cache
+    
+    Raises:
+        JWTError: The token is invalid or expired, whichever library verified it
+    """
+    if (backend or jwt_backend()) == "pyjwt":
+        try:
+            return pyjwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
+        except pyjwt.PyJWTError as e:
+            raise JWTError(str(e)) from e
+    return jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
+
+
+def token_digest(token: str) -> bytes:
+    """SHA-256 digest of a token, the key of the cache and the revocation list"""
+    return hashlib.sha256(token.encode()).digest()
+
+
+def decode_access_token(token: str) -> Dict[str, Any]:
+    """
+    Return the claims of a valid access token, verifying it only when it is
+    not cached yet
+    
+    Raises:
+        JWTError: The token is invalid, expired or revoked
+    """
+    digest = token_digest(token)
+    claims = token_cache.get(digest)
+    if claims is not None:
+        return dict(claims)
+    
+    if token_cache.is_revoked(digest):
+        raise JWTError("Token has been revoked")
+    
+    claims = verify_access_token(token)
+    # Tokens without an expiry are verified every time
+    if isinstance(claims.get("exp"), (int, float)):
+        token_cache.put(digest, claims, claims["exp"])
+    return dict(claims)
+
+
+def revoke_access_token(token: str) -> Dict[str, Any]:
+    """
+    Revoke a valid access token, e.g. on logout
+    
+    Returns:
+        dict: The claims of the revoked token
+    
+    Raises:
+        JWTError: The token is already invalid, expired or revoked
+    """
+    claims = decode_access_token(token)
+    token_cache.revoke(token_digest(token), claims.get("exp", float("inf")))
+    return claims 
\ No newline at end of file
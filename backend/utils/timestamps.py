@@ -0,0 +1,21 @@
+"""
+Timestamps as stored in the database.
+
+``created_at`` columns hold naive UTC ``DateTime`` values, which MySQL stores
+as ``DATETIME(0)``: fractional seconds are rounded away on store, which can
+carry a value into the next second, minute or day. Timestamps set by the app
+are truncated to whole seconds before the INSERT instead, so the value kept
+in memory, returned to the client and counted in the daily rollups is the
+one stored.
+"""
+from datetime import datetime
+
+
+def stored_timestamp(value: datetime) -> datetime:
+    """``value`` truncated to the precision of the ``created_at`` columns"""
+    return value.replace(microsecond=0)
+
+
+def utc_now() -> datetime:
+    """Current naive UTC time at stored precision; the ``created_at`` default"""
+    return stored_timestamp(datetime.utcnow())